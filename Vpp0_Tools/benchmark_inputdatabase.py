@@ -0,0 +1,136 @@
+import importlib
+import importlib.util
+import argparse
+import gc
+import os
+import pickle
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def load_database(stage):
+
+    # The parser package of a stage, without the PLY parser
+    parser_dir = os.path.join(stage, "Package", "parser")
+    init = os.path.join(parser_dir, "__init__.py")
+    spec = importlib.util.spec_from_file_location(
+        "vpp_parser", init, submodule_search_locations=[parser_dir])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["vpp_parser"] = module
+    spec.loader.exec_module(module)
+
+    return importlib.import_module("vpp_parser.inputdatabase"), importlib.import_module("vpp_parser.fastparser")
+
+
+def synthetic_input(entries, probes):
+
+    # Boundary blocks of 7 entries (the block included) and a probe list
+    lines = ["scale = 2.5"]
+    for i in range(entries // 7):
+        lines.append("body_{} {{".format(i))
+        lines.append("    index = [{}, {}, {}]".format(i, i + 1, i + 2))
+        lines.append("    name = [\"body_{}\"] write = TRUE".format(i))
+        lines.append("    radius = {}.5".format(i % 100))
+        lines.append("    area = radius ^ 2 * scale")
+        lines.append("    outline = [{}]".format(", ".join("({}.25, {}.75)".format(i, j) for j in range(8))))
+        lines.append("}")
+    lines.append("probes = [{}]".format(", ".join("({0}.5, 0.{0}, 0.0)".format(j) for j in range(probes))))
+    return "\n".join(lines)
+
+
+def paths(database, prefix = ""):
+
+    # Dotted paths of all variables
+    names = []
+    for name in database.variables():
+        value = database._contents[name]
+        if type(value) is type(database):
+            names += paths(value, prefix + name + ".")
+        else:
+            names.append(prefix + name)
+    return names
+
+
+def measure(function):
+
+    # Garbage of the previous operation is not charged to this one
+    gc.collect()
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def unpickle(inputdatabase, data):
+
+    # As the on-disk parse cache is read
+    with inputdatabase._gc_paused():
+        return pickle.loads(data)
+
+
+def run(inputdatabase, fastparser, entries, probes):
+
+    raw = synthetic_input(entries, probes)
+
+    database, parse_time = measure(lambda: fastparser.parse_string(raw))
+
+    # Memory of the parsed database, traced separately as tracing slows
+    # the parser down
+    tracemalloc.start()
+    traced = fastparser.parse_string(raw)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traced
+
+    names = paths(database)
+    values, get_time = measure(lambda: [database[name] for name in names])
+    values, cached_time = measure(lambda: [database[name] for name in names])
+
+    text, string_time = measure(database.to_string)
+    raw_text, raw_string_time = measure(lambda: database.to_string(evaluate_expressions = False))
+    copy, copy_time = measure(database.copy)
+    data, dump_time = measure(lambda: pickle.dumps(database, protocol = pickle.HIGHEST_PROTOCOL))
+    loaded, load_time = measure(lambda: unpickle(inputdatabase, data))
+
+    # File round trip, unevaluated like the control files
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "controlDict")
+        none, write_time = measure(lambda: database.to_file(filename))
+        reread, read_time = measure(lambda: inputdatabase.InputDatabase.from_file(filename, cache = False))
+
+    same = all([other[name] for name in names] == values for other in (copy, loaded, reread))
+
+    return {"entries": len(names), "kB": len(raw) // 1024, "MB held": size / 1024 / 1024,
+            "MB peak": peak / 1024 / 1024, "parse": parse_time, "get": get_time, "get cached": cached_time,
+            "to_string": string_time, "to_string raw": raw_string_time, "copy": copy_time,
+            "pickle": dump_time, "unpickle": load_time, "to_file": write_time, "from_file": read_time,
+            "round trip": same}
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Benchmark of large input databases")
+    parser.add_argument("--stage", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                                          "Vpp3_FlowVisualization"),
+                        help = "stage whose parser is benchmarked")
+    parser.add_argument("--entries", type = int, default = 100000)
+    parser.add_argument("--probes", type = int, default = 10000)
+    args = parser.parse_args()
+
+    inputdatabase, fastparser = load_database(args.stage)
+
+    # A tenth of the size as well, linear operations take ten times as long
+    small = run(inputdatabase, fastparser, args.entries // 10, args.probes // 10)
+    large = run(inputdatabase, fastparser, args.entries, args.probes)
+
+    print("{:<16}{:>14}{:>14}{:>10}".format("", "small", "large", "ratio"))
+    for key in large:
+        if isinstance(large[key], bool):
+            print("{:<16}{:>14}{:>14}".format(key, str(small[key]), str(large[key])))
+        else:
+            ratio = large[key] / small[key] if small[key] else float("nan")
+            print("{:<16}{:>14.4g}{:>14.4g}{:>10.2f}".format(key, small[key], large[key], ratio))
+
+    if not (small["round trip"] and large["round trip"]):
+        sys.exit(1)
@@ -0,0 +1,189 @@
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+
+from synthetic_case import generate
+
+tools = os.path.dirname(os.path.abspath(__file__))
+root = os.path.dirname(tools)
+
+# Stages in the order they depend on each other. The Tecplot scripts run on
+# the stub backend, on a case generated with --tecplot-stub
+stages = {"vpp1": os.path.join(root, "Vpp1_SplitFluidData", "main_SplitFluidData.py"),
+          "vpp2": os.path.join(root, "Vpp2_CalcVirtualFlow", "main_CalcVirtualFlow_theory.py"),
+          "vpp3": os.path.join(root, "Vpp3_FlowVisualization", "main_FlowVisualization_native.py"),
+          "vpp3-tecplot": os.path.join(root, "Vpp3_FlowVisualization", "main_FlowVisualization.py"),
+          "pipeline": os.path.join(root, "Vpp3_FlowVisualization", "main_Pipeline.py")}
+stub_stages = ("vpp1", "vpp3-tecplot", "pipeline")
+
+
+def git_revision():
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd = root, capture_output = True,
+                              text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stage(case_dir, script, timing_dir, run, stub=False):
+
+    # Wall time and peak resident size of the stage, its worker processes
+    # included. The spans of the stage are recorded with VPP_TIMING
+    env = dict(os.environ, VPP_TIMING = timing_dir, VPP_TIMING_RUN = run)
+    if stub:
+        env["VPP_TECPLOT"] = "stub"
+
+    path = os.path.join(timing_dir, os.path.basename(script) + ".log")
+    with open(path, "a") as log:
+        offset = log.tell()
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, script], cwd = case_dir, env = env,
+                                   stdout = log, stderr = subprocess.STDOUT)
+        pid, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+
+    if os.waitstatus_to_exitcode(status) != 0:
+        sys.exit("{} failed, see {}".format(os.path.basename(script), path))
+
+    # Kilobytes on Linux, bytes on macOS
+    maxrss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+    # Calls of the stub backend, printed when the stage ends
+    calls = {}
+    with open(path, "r") as log:
+        log.seek(offset)
+        for line in log:
+            if line.startswith("Stub Tecplot calls:"):
+                calls = json.loads(line.split(":", 1)[1])
+
+    return seconds, maxrss, calls
+
+
+def phase_seconds(timing_dir, script, run):
+
+    # Self time of each phase of the stage
+    path = os.path.join(timing_dir, os.path.splitext(os.path.basename(script))[0] + ".jsonl")
+    phases = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["run"] == run:
+                    phases[entry["phase"]] = phases.get(entry["phase"], 0.0) + entry["self"]
+
+    return phases
+
+
+def benchmark(case_dir, case, names, label, repeat=1):
+
+    timing_dir = os.path.join(case_dir, "timing", label)
+    os.makedirs(timing_dir, exist_ok = True)
+
+    results = []
+    for name in names:
+
+        # The fastest of the repeats, the others carry the noise
+        best = None
+        for i in range(repeat):
+            run = "{}-{}-{}".format(label, name, int(time.time() * 1000))
+            seconds, maxrss, calls = run_stage(case_dir, stages[name], timing_dir, run, name in stub_stages)
+            if best is None or seconds < best[0]:
+                best = (seconds, maxrss, calls, phase_seconds(timing_dir, stages[name], run))
+
+        seconds, maxrss, calls, phases = best
+        results.append({"label": label, "date": datetime.datetime.now().isoformat(timespec = "seconds"),
+                        "commit": git_revision(), "case": case, "stage": name, "seconds": seconds,
+                        "steps/s": case["steps"] / seconds, "cells/s": case["steps"] * case["cells"] / seconds,
+                        "peak MB": maxrss / 1024 / 1024, "phases": phases, "tecplot calls": calls})
+
+    return results
+
+
+def read_results(path):
+
+    if not os.path.exists(path):
+        return []
+
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def baseline_of(previous, result, label):
+
+    # The latest result of the label on the same case and stage
+    matches = [entry for entry in previous
+               if entry["label"] == label and entry["case"] == result["case"] and entry["stage"] == result["stage"]]
+
+    return matches[-1] if matches else None
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "End-to-end benchmark of the stages "
+                                                   "on a synthetic case")
+    parser.add_argument("--case", default = os.path.join(tools, "synthetic_case"),
+                        help = "case folder, generated if missing")
+    parser.add_argument("--regenerate", action = "store_true", help = "write the case again")
+    parser.add_argument("--geometry", default = "cylinder2D", choices = ["cylinder2D", "sphere3D"])
+    parser.add_argument("--cells", type = int, default = 100000)
+    parser.add_argument("--steps", type = int, default = 10)
+    parser.add_argument("--format", default = "h5", choices = ["h5", "csv"])
+    parser.add_argument("--workers", type = int, default = 1)
+    parser.add_argument("--probes", type = int, default = 0)
+    parser.add_argument("--tecplot-stub", action = "store_true",
+                        help = "generate the case for the stub Tecplot backend as well")
+    parser.add_argument("--stages", default = "vpp2,vpp3",
+                        help = "comma separated: " + ", ".join(stages) + " (" + ", ".join(stub_stages) +
+                               " on the stub Tecplot backend)")
+    parser.add_argument("--repeat", type = int, default = 1)
+    parser.add_argument("--label", default = None, help = "name of the results, the git revision by default")
+    parser.add_argument("--results", default = os.path.join(tools, "benchmark_results.jsonl"),
+                        help = "results of all runs")
+    parser.add_argument("--baseline", default = None, help = "label of the results to compare against")
+    args = parser.parse_args()
+
+    names = args.stages.split(",")
+    for name in names:
+        if name not in stages:
+            sys.exit("Unknown stage " + name)
+
+    case_file = os.path.join(args.case, "synthetic.json")
+    if args.regenerate or not os.path.exists(case_file):
+        print("Writing the synthetic case to", args.case)
+        case = generate(args.case, args.geometry, args.cells, args.steps, args.format,
+                        args.workers, args.probes, tecplot_stub = args.tecplot_stub)
+    else:
+        with open(case_file, "r") as f:
+            case = json.load(f)
+
+    if any(name in stub_stages for name in names) and not case.get("tecplot_stub"):
+        sys.exit("The stages " + ", ".join(stub_stages) + " need a case generated with --tecplot-stub")
+
+    label = args.label or git_revision() or "unlabelled"
+    previous = read_results(args.results)
+    results = benchmark(os.path.abspath(args.case), case, names, label, args.repeat)
+
+    with open(args.results, "a") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+    print("{} cells, {} faces, {} steps ({}, {})".format(case["cells"], case["faces"], case["steps"],
+                                                         case["geometry"], case["format"]))
+    print("{:<14}{:>10}{:>10}{:>14}{:>10}{:>10}  {}".format("stage", "s", "steps/s", "cells/s", "peak MB",
+                                                          "speedup", "phases [s]"))
+    for result in results:
+        speedup = ""
+        if args.baseline is not None:
+            baseline = baseline_of(previous, result, args.baseline)
+            speedup = "{:.2f}".format(baseline["seconds"] / result["seconds"]) if baseline else "-"
+        phases = ", ".join("{} {:.2f}".format(phase, seconds) for phase, seconds in result["phases"].items())
+        if result["tecplot calls"]:
+            phases += "; {} stub Tecplot calls".format(sum(result["tecplot calls"].values()))
+        print("{:<14}{:>10.2f}{:>10.2f}{:>14.4g}{:>10.1f}{:>10}  {}".format(
+            result["stage"], result["seconds"], result["steps/s"], result["cells/s"], result["peak MB"],
+            speedup, phases))
@@ -0,0 +1,185 @@
+import importlib
+import importlib.util
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+# Virtual motions checked for each shape
+motions = {"cylinder2D": ["virX", "virY", "sourcePoint"],
+           "sphere3D": ["virX", "virY", "virZ", "sourcePoint"]}
+methods = ["get_virU", "get_virPhi", "get_normal_vector", "get_acc", "get_Vb"]
+source_point = [-1.5, 0.3, 0.2]
+
+
+def load_stage(stage):
+
+    # The package of the virtual flow stage
+    package_dir = os.path.join(stage, "Package")
+
+    init = os.path.join(package_dir, "__init__.py")
+    spec = importlib.util.spec_from_file_location(
+        "vpp2_package", init, submodule_search_locations=[package_dir])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["vpp2_package"] = module
+    spec.loader.exec_module(module)
+
+    database = importlib.import_module("vpp2_package.parser.inputdatabase")
+    model = importlib.import_module("vpp2_package.geometry.model")
+
+    return database, model
+
+
+def theory_db(database, directory, geometry, motion, body):
+
+    # A theory control database, the arrays of the multi-body geometry are
+    # included with load() as they would be for a large array of bodies
+    lines = ["model {",
+             "    geometry = \"{}\"".format(geometry),
+             "    motion = \"stationary\"",
+             "    virtualmotion = \"{}\"".format(motion),
+             "    sourcePoint = [{}, {}, {}]".format(*source_point),
+             "}",
+             body]
+
+    path = os.path.join(directory, "theoryControlDict")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    return database.InputDatabase.from_file(path)
+
+
+def single_body(database, directory, shape, motion, center, radius):
+
+    body = "{} {{ radius = {!r} center = [{}] }}".format(shape, float(radius),
+                                                        ", ".join(repr(float(c)) for c in center))
+
+    return theory_db(database, directory, shape, motion, body)
+
+
+def multi_body(database, directory, shape, motion, centers, radii):
+
+    np.save(os.path.join(directory, "centers.npy"), centers)
+    np.save(os.path.join(directory, "radii.npy"), radii)
+    body = "multiBody {{ shape = \"{}\" centers = load(\"centers.npy\") radii = load(\"radii.npy\") }}".format(shape)
+
+    return theory_db(database, directory, "multiBody", motion, body)
+
+
+def points(shape, n, low, high, rng):
+
+    x = rng.uniform(low[0], high[0], n)
+    y = rng.uniform(low[1], high[1], n)
+    z = rng.uniform(-2.0, 2.0, n) if shape == "sphere3D" else np.zeros(n)
+
+    return x, y, z
+
+
+def error(expected, result):
+
+    return np.max(np.abs(result - expected)/(1 + np.abs(expected)))
+
+
+def check_one_body(database, model, directory, rng, tolerance):
+
+    # A single body of the multi-body geometry is the single-body geometry
+    passed = True
+    for shape in motions:
+        center = [0.3, -0.2, 0.1][:2 if shape == "cylinder2D" else 3]
+        x, y, z = points(shape, 100000, (-4.0, -4.0), (4.0, 4.0), rng)
+
+        for motion in motions[shape]:
+            single = model.build_model(shape, 0.0, single_body(database, directory, shape, motion, center, 0.5))
+            multi = model.build_model("multiBody", 0.0,
+                                      multi_body(database, directory, shape, motion, np.array([center]),
+                                                 np.array([0.5])))
+
+            for method in methods:
+                e = error(getattr(single, method)(x, y, z), getattr(multi, method)(x, y, z))
+                if not e <= tolerance:
+                    print("FAIL one {} {}: {} differs by {:.3g}".format(shape, motion, method, e))
+                    passed = False
+
+    return passed
+
+
+def check_array(database, model, directory, rng, bodies, cells, tolerance):
+
+    # An array of bodies is the sum of the single bodies, the source point
+    # counted once. The sum is also the cost of one run per body
+    passed = True
+    columns = int(np.ceil(np.sqrt(bodies)))
+    centers = 3.0 * np.array([[i % columns, i // columns, 0.0] for i in range(bodies)])
+    radii = 0.5 + 0.1 * rng.random(bodies)
+
+    for shape in motions:
+        dimension = 2 if shape == "cylinder2D" else 3
+        x, y, z = points(shape, cells, (-2.0, -2.0), (3.0 * columns, 3.0 * columns), rng)
+
+        for motion in motions[shape]:
+            start = time.perf_counter()
+            multi = model.build_model("multiBody", 0.0,
+                                      multi_body(database, directory, shape, motion, centers[:, :dimension], radii))
+            virU = multi.get_virU(x, y, z)
+            virPhi = multi.get_virPhi(x, y, z)
+            multi_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected_virU = 0
+            expected_virPhi = 0
+            for center, radius in zip(centers[:, :dimension], radii):
+                single = model.build_model(shape, 0.0, single_body(database, directory, shape, motion, center, radius))
+                expected_virU = expected_virU + single.get_virU(x, y, z)
+                expected_virPhi = expected_virPhi + single.get_virPhi(x, y, z)
+            single_time = time.perf_counter() - start
+
+            if motion == "sourcePoint":
+                induction = importlib.import_module("vpp2_package.induction.induction" + shape[-2:].upper())
+                collocation = np.array(source_point[:dimension])
+                point = np.array([x, y, z][:dimension])
+                source_virU = np.zeros((cells, 3))
+                source_virU[:, :dimension] = induction.velocity_point_sigma(collocation, 1, point).T
+                expected_virU -= (bodies - 1) * source_virU
+                expected_virPhi -= (bodies - 1) * induction.phi_point_sigma(collocation, 1, point)[:, None]
+
+            e = max(error(expected_virU, virU), error(expected_virPhi, virPhi))
+            if not e <= tolerance:
+                print("FAIL {} bodies {} {}: differs by {:.3g}".format(bodies, shape, motion, e))
+                passed = False
+
+            print("{:<12}{:<13}{:>10.2f}{:>12.2f}{:>10.2f}".format(shape, motion, multi_time, single_time,
+                                                                 single_time / multi_time))
+
+    return passed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Parity check and benchmark of the multi-body geometry")
+    parser.add_argument("--stage", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                                          "Vpp2_CalcVirtualFlow"),
+                        help = "stage whose models are checked")
+    parser.add_argument("--bodies", type = int, default = 50)
+    parser.add_argument("--cells", type = int, default = 200000)
+    parser.add_argument("--tolerance", type = float, default = 1e-10)
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    database, model = load_stage(args.stage)
+    rng = np.random.default_rng(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        passed = check_one_body(database, model, directory, rng, args.tolerance)
+        print("one body:", "identical to the single-body geometries" if passed else "FAILED")
+
+        print("{} bodies, {} cells [s]".format(args.bodies, args.cells))
+        print("{:<12}{:<13}{:>10}{:>12}{:>10}".format("shape", "motion", "multi", "per body", "speed-up"))
+        passed = check_array(database, model, directory, rng, args.bodies, args.cells, args.tolerance) and passed
+
+    if not passed:
+        sys.exit(1)
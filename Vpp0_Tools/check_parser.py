@@ -0,0 +1,198 @@
+import importlib
+import importlib.util
+import argparse
+import glob
+import os
+import sys
+import time
+
+
+# Inputs of the parity check: valid inputs must give identical databases,
+# invalid ones must be rejected by both parsers
+cases = [
+    '',
+    '// only a comment',
+    'a = 1',
+    'a = -1 b = +2 c = 1.5 d = .5 e = 1e5 f = 1.5e-3 g = -2.e3',
+    'a = TRUE b = false c = True',
+    'TRUEx = 1 y = TRUEx',
+    'name = "a string" empty = ""',
+    'a = 1 + 2 * 3 b = (1 + 2) * 3 c = 2 ^ 3 ^ 2 d = 1 - 2 - 3 e = 8 / 4 / 2',
+    'a = 2 b = -a ^ 2 c = - a * a d = 2 * - a e = --a',
+    'a = 2 b { c = a * 2 d = b_local } b_local = 1',
+    'l = [] m = [1] n = [1, 2, 3] o = 1, 2, 3 p = "a", "b"',
+    'points = [(0.6, 0.1, 0.0), (0.7, 0.2, 0.0)] one = [(1, 2, 3)]',
+    'p = (1, 2), (3, 4)',
+    't = (1, (2, 3)) u = ((1 + 2), 3) v = ((1 + 2)) * 3',
+    'd = {} e = {"a": 1, 2: "b", 1.5: TRUE, TRUE: (1, 2)} f = {"a": 1, "a": 2}',
+    'g = {"a": {"b": 1}}, {"c": 2}',
+    'Path {\n    case = "/tmp/case"\n    write = "/tmp/out" // the output\n}\nnum_zones = 6',
+    'boundary {\n internal { write = TRUE index = [5] name = ["cylinder"] }\n external { write = FALSE }\n}',
+    'a { } b { c { d { e = 1 } } }',
+    'x = a * (b + c) a = 1 b = 2 c = 3',
+    'a = 1 -2',
+    'a = 1 a = 2',
+    'a = [[1, 2], [3, 4]]',
+    'a = (1)',
+    'a = (TRUE)',
+    'a = [1, ]',
+    'a = (1, 2) * 3',
+    'a = 1 + (2, 3)',
+    'a = ',
+    'a = 1 }',
+    'a = {1 2}',
+    'a = $',
+    '= 1',
+    'a { b = 1',
+]
+
+
+def load_parsers(stage):
+
+    # The parser package of a stage
+    parser_dir = os.path.join(stage, "Package", "parser")
+
+    init = os.path.join(parser_dir, "__init__.py")
+    spec = importlib.util.spec_from_file_location(
+        "vpp_parser", init, submodule_search_locations=[parser_dir])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["vpp_parser"] = module
+    spec.loader.exec_module(module)
+
+    start = time.perf_counter()
+    fast = importlib.import_module("vpp_parser.fastparser")
+    fast_import = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference = importlib.import_module("vpp_parser.newparser")
+    reference_import = time.perf_counter() - start
+
+    database = importlib.import_module("vpp_parser.inputdatabase")
+
+    return database, reference, fast, reference_import, fast_import
+
+
+def dump(value, database):
+
+    # Comparable form of a parsed value, expressions are kept unevaluated
+    if type(value) is database.InputDatabase:
+        return ("database", [(name, dump(value._contents[name], database)) for name in value])
+    if type(value) is database.Expression:
+        return ("expression", value.operator, dump(value.a, database), dump(value.b, database))
+    if type(value) is list or type(value) is tuple:
+        return (type(value).__name__, [dump(item, database) for item in value])
+    if type(value) is dict:
+        return ("dict", [(repr(key), dump(value[key], database)) for key in value])
+    return (type(value).__name__, repr(value))
+
+
+def parse(parser, raw):
+
+    try:
+        return parser.parse_string(raw), None
+    except Exception as error:
+        return None, error
+
+
+def check(database, reference, fast, raw, label):
+
+    expected, expected_error = parse(reference, raw)
+    result, error = parse(fast, raw)
+
+    if expected_error is not None or error is not None:
+        if expected_error is None or error is None:
+            print("FAIL ", label, ": reference ", repr(expected_error), ", fast ", repr(error))
+            return False
+        return True
+
+    if dump(expected, database) != dump(result, database):
+        print("FAIL ", label, ": different databases")
+        return False
+
+    # The evaluated contents, expressions and variables included
+    expected_string, expected_error = parse_string(expected)
+    string, error = parse_string(result)
+    if expected_string != string or repr(expected_error) != repr(error):
+        print("FAIL ", label, ": different evaluated databases")
+        return False
+
+    return True
+
+
+def parse_string(database):
+
+    try:
+        return database.to_string(), None
+    except Exception as error:
+        return None, error
+
+
+def large_input(entries):
+
+    # Blocks of scalars, expressions, lists and dictionaries
+    lines = []
+    for i in range(entries // 10):
+        lines.append("block_{} {{".format(i))
+        lines.append("    radius = {}.5".format(i))
+        lines.append("    scale = radius * 2 + {} // comment".format(i))
+        lines.append("    name = \"body_{}\" write = TRUE".format(i))
+        lines.append("    index = [{}, {}, {}]".format(i, i + 1, i + 2))
+        lines.append("    points = [({0}.0, 0.1, 0.0), (0.7, {0}.2, 0.0)]".format(i))
+        lines.append("    options = {{\"a\": {}, \"b\": 1.5e-3}}".format(i))
+        lines.append("    offset = -{}.25 ^ 2".format(i))
+        lines.append("    inner {{ value = {} flag = false }}".format(i))
+        lines.append("}")
+    return "\n".join(lines)
+
+
+def benchmark(parser, raw, repeat):
+
+    best = float("inf")
+    for i in range(repeat):
+        start = time.perf_counter()
+        parser.parse_string(raw)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Parity check and benchmark of the control file parsers")
+    parser.add_argument("files", nargs = "*", help = "control files to check as well (default: input/*)")
+    parser.add_argument("--stage", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                                          "Vpp3_FlowVisualization"),
+                        help = "stage whose parser is checked")
+    parser.add_argument("--entries", type = int, default = 20000, help = "entries of the benchmark input")
+    parser.add_argument("--repeat", type = int, default = 3)
+    args = parser.parse_args()
+
+    database, reference, fast, reference_import, fast_import = load_parsers(args.stage)
+
+    files = args.files or sorted(name for name in glob.glob("input/*") if os.path.isfile(name))
+
+    passed = 0
+    total = 0
+    for i, raw in enumerate(cases):
+        total += 1
+        passed += check(database, reference, fast, raw, "case " + str(i))
+
+    for name in files:
+        with open(name, "r") as f:
+            total += 1
+            passed += check(database, reference, fast, f.read(), name)
+
+    print(passed, " of ", total, " inputs parse identically")
+
+    raw = large_input(args.entries)
+    total += 1
+    passed += check(database, reference, fast, raw, "benchmark input")
+
+    reference_time = benchmark(reference, raw, args.repeat)
+    fast_time = benchmark(fast, raw, args.repeat)
+
+    print("import: PLY ", reference_import * 1000, " ms, recursive descent ", fast_import * 1000, " ms")
+    print(args.entries, " entries (", len(raw) // 1024, " kB): PLY ", reference_time, " s, recursive descent ",
+          fast_time, " s, speed-up ", reference_time / fast_time)
+
+    if passed != total:
+        sys.exit(1)
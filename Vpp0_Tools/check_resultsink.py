@@ -0,0 +1,97 @@
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+
+columns = ["time", "Pressure", "Pressure_prediction"]
+
+
+def load_sink(stage):
+
+    sys.path.insert(0, stage)
+    from Package.result.resultsink import ResultSink, read_result
+
+    return ResultSink, read_result
+
+
+def parquet_engine():
+
+    # pandas writes parquet with pyarrow or fastparquet, neither is required
+    for engine in ("pyarrow", "fastparquet"):
+        if importlib.util.find_spec(engine) is not None:
+            return engine
+
+    return None
+
+
+def check_format(ResultSink, read_result, directory, format, rows, capacity, flush_every):
+
+    # A run killed after some flushes: the sink is never closed, the rows
+    # flushed so far must still be readable. A parquet part is only written
+    # for "capacity" rows
+    path = os.path.join(directory, "pressure." + format)
+    data = np.arange(rows * len(columns), dtype = np.float64).reshape(rows, len(columns))
+
+    sink = ResultSink(path, columns, format = format, capacity = capacity, flush_every = flush_every)
+    for row in data:
+        sink.append(row)
+
+    batch = max(capacity, flush_every) if format == "parquet" else flush_every
+    flushed = rows - rows % batch
+    partial = read_result(path, format)
+
+    passed = True
+    if len(partial) != flushed or flushed > 0 and (not np.array_equal(partial.values, data[:flushed])
+                                                   or list(partial.columns) != columns):
+        print("FAIL {}: {} flushed rows not read back before close".format(format, flushed))
+        passed = False
+    if format == "parquet" and len(os.listdir(directory)) != flushed // batch:
+        print("FAIL {}: {} part files for {} flushed rows".format(format, len(os.listdir(directory)), flushed))
+        passed = False
+
+    sink.close()
+    complete = read_result(path, format)
+
+    if not np.array_equal(complete.values, data):
+        print("FAIL {}: {} rows not read back after close".format(format, rows))
+        passed = False
+    if sorted(os.listdir(directory)) != [os.path.basename(path)]:
+        print("FAIL {}: files left after close {}".format(format, sorted(os.listdir(directory))))
+        passed = False
+
+    print("{}: {} of {} rows readable before close, all after".format(format, len(partial), rows))
+
+    return passed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Partial results of the result sink of an unclosed run")
+    parser.add_argument("--stage", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                                          "Vpp3_FlowVisualization"),
+                        help = "stage whose result sink is checked")
+    parser.add_argument("--formats", nargs = "+", default = ["csv", "parquet"])
+    parser.add_argument("--rows", type = int, default = 11)
+    parser.add_argument("--capacity", type = int, default = 4)
+    parser.add_argument("--flush-every", type = int, default = 3)
+    args = parser.parse_args()
+
+    ResultSink, read_result = load_sink(args.stage)
+
+    passed = True
+    for format in args.formats:
+
+        if format == "parquet" and parquet_engine() is None:
+            print("SKIP parquet: neither pyarrow nor fastparquet is installed")
+            continue
+
+        with tempfile.TemporaryDirectory() as directory:
+            passed = check_format(ResultSink, read_result, directory, format, args.rows, args.capacity,
+                                  args.flush_every) and passed
+
+    if not passed:
+        sys.exit(1)
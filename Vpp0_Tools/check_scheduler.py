@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+import time
+
+
+# Stage durations of the check [s]: the extraction is inline as the Tecplot
+# one of main_Pipeline.py, the later stages run in their pools
+extract_seconds = 0.05
+virtualflow_seconds = 0.02
+integrate_seconds = 0.01
+
+
+def load_scheduler(stage):
+
+    sys.path.insert(0, stage)
+    from Package.pipeline.scheduler import Stage, StepScheduler
+
+    return Stage, StepScheduler
+
+
+def check_overlap(Stage, StepScheduler, steps, limit):
+
+    # The first result must come out while later steps are still extracted,
+    # not once every step that fits in the memory budget has entered
+    def extract(item, payload):
+        time.sleep(extract_seconds)
+        return item[0]
+
+    def virtual_flow(item, payload):
+        time.sleep(virtualflow_seconds)
+        return payload
+
+    def integrate(item, payload):
+        time.sleep(integrate_seconds)
+        return payload
+
+    scheduler = StepScheduler([Stage("extract", extract, inline = True),
+                               Stage("virtualflow", virtual_flow, limit),
+                               Stage("integrate", integrate, limit)])
+
+    start = time.perf_counter()
+    first = None
+    results = []
+    for item, result in scheduler.run([(step, 0.1 * step) for step in range(steps)]):
+        if first is None:
+            first = time.perf_counter() - start
+        results.append(result)
+
+    last_extract = max(entry["end"] for entry in scheduler.get_log() if entry["stage"] == "extract")
+
+    print("{} steps: first result after {:.3f} s, last extraction ended after {:.3f} s".format(
+        steps, first, last_extract))
+
+    passed = True
+    if results != list(range(steps)):
+        print("FAIL results out of order or missing")
+        passed = False
+    if not first < last_extract:
+        print("FAIL the first result waited for the last extraction")
+        passed = False
+
+    return passed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Overlap check of the step scheduler of the pipeline")
+    parser.add_argument("--stage", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                                          "Vpp3_FlowVisualization"),
+                        help = "stage whose scheduler is checked")
+    parser.add_argument("--steps", type = int, default = 20)
+    parser.add_argument("--limit", type = int, default = 2, help = "threads of the pooled stages")
+    args = parser.parse_args()
+
+    Stage, StepScheduler = load_scheduler(args.stage)
+
+    if not check_overlap(Stage, StepScheduler, args.steps, args.limit):
+        sys.exit(1)
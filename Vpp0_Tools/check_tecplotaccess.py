@@ -0,0 +1,106 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+
+# Variables fetched at every step, as the flow variables of Vpp3
+variables = ["X C", "Y C", "Z C", "pressure", "U", "V", "W"]
+derived = ["vir_lamb", "vir_friction"]
+
+
+def load_access(stage):
+
+    sys.path.insert(0, stage)
+    from Package.tecplotio.tecplotaccess import TecplotAccess
+    from Package.tecplotio.stub import StubTecplot
+
+    return TecplotAccess, StubTecplot
+
+
+def stub_dataset(directory, cells, rng):
+
+    # One zone in the layout of the stub backend
+    arrays = {"variables": np.array(variables + derived), "names": np.array(["fluid"]),
+              "times": np.array([0.0]), "sizes": np.array([cells])}
+    for name in variables + derived:
+        arrays["zone/0/" + name] = rng.random(cells)
+
+    path = os.path.join(directory, "stub_dataset.npz")
+    np.savez(path, **arrays)
+
+    return path, arrays
+
+
+def check_calls(TecplotAccess, StubTecplot, steps, cells, rng):
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        path, arrays = stub_dataset(directory, cells, rng)
+
+        tecplot = StubTecplot(report = False)
+        dataset = tecplot.load_tecplot(path)
+
+        # Searches of a variable by name on the Tecplot side
+        searches = {"count": 0}
+        variable = dataset.variable
+
+        def counted(name):
+            if isinstance(name, str):
+                searches["count"] += 1
+            return variable(name)
+
+        dataset.variable = counted
+
+        access = TecplotAccess(tecplot, dataset)
+
+        passed = True
+        for step in range(steps):
+            with access.step():
+                values = access.fetch(0, variables)
+                access.push(0, {name: values["U"] * (step + 1) for name in derived})
+
+            for name in variables:
+                if not np.array_equal(values[name], arrays["zone/0/" + name]):
+                    print("FAIL step {}: {} fetched wrong values".format(step, name))
+                    passed = False
+            for name in derived:
+                pushed = dataset.zone(0).values(access.variable(name)).as_numpy_array()
+                if not np.array_equal(pushed, values["U"] * (step + 1)):
+                    print("FAIL step {}: {} pushed wrong values".format(step, name))
+                    passed = False
+
+    calls = access.get_calls()
+    expected = {"zone": 1, "variable": len(variables) + len(derived),
+                "fetch": steps * len(variables), "push": steps * len(derived), "suspend": steps}
+
+    print("{} steps of {} fetched and {} pushed variables: {}".format(steps, len(variables), len(derived), calls))
+    print("variable searches on the Tecplot side:", searches["count"])
+
+    if calls != expected:
+        print("FAIL expected the calls", expected)
+        passed = False
+    if searches["count"] != len(variables) + len(derived):
+        print("FAIL expected one search per variable, not per transfer")
+        passed = False
+
+    return passed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Call counts of the Tecplot access layer on the stub backend")
+    parser.add_argument("--stage", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                                          "Vpp3_FlowVisualization"),
+                        help = "stage whose access layer is checked")
+    parser.add_argument("--steps", type = int, default = 3)
+    parser.add_argument("--cells", type = int, default = 1000)
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    TecplotAccess, StubTecplot = load_access(args.stage)
+
+    if not check_calls(TecplotAccess, StubTecplot, args.steps, args.cells, np.random.default_rng(args.seed)):
+        sys.exit(1)
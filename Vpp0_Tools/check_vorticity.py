@@ -0,0 +1,87 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from synthetic_case import generate
+
+
+# Integrals of the vorticity compared between the two methods
+integrals = ["vir_lamb", "vir_friction"]
+
+
+def run_stage(stage, script, case):
+
+    # The stages are run in the case folder, as from the command line
+    subprocess.run([sys.executable, os.path.join(stage, script)], cwd = case, check = True,
+                   stdout = subprocess.DEVNULL)
+
+
+def set_vorticity(case, vorticity):
+
+    path = os.path.join(case, "input", "visualizationControlDict")
+    with open(path) as f:
+        lines = [line for line in f.read().splitlines() if not line.startswith("vorticity")]
+    with open(path, "w") as f:
+        f.write("\n".join(lines + ["vorticity = \"{}\"".format(vorticity)]) + "\n")
+
+
+def integrate(stages, case, vorticity):
+
+    set_vorticity(case, vorticity)
+    run_stage(stages[1], "main_FlowVisualization_native.py", case)
+
+    return pd.read_csv(os.path.join(case, "synthetic_DataDir", "Result", "pressure.csv"))
+
+
+def check_vorticity(stages, case, tolerance):
+
+    # The exported vorticity is the one Tecplot (or its stub) writes, exact on
+    # the synthetic case; the native one is the curl of the mesh operators
+    # built from the cell connectivity, one-sided at the wall
+    run_stage(stages[0], "main_CalcVirtualFlow_theory.py", case)
+
+    exported = integrate(stages, case, "auto")
+    native = integrate(stages, case, "native")
+
+    print("{:>6}{:>14}{:>14}{:>14}{:>14}".format("time", "lamb", "native", "friction", "native"))
+    for i in range(len(exported)):
+        print("{:>6.2f}{:>14.4e}{:>14.4e}{:>14.4e}{:>14.4e}".format(
+            exported["time"][i], exported["vir_lamb"][i], native["vir_lamb"][i],
+            exported["vir_friction"][i], native["vir_friction"][i]))
+
+    passed = True
+    for name in integrals:
+        error = np.max(np.abs(native[name].values / exported[name].values - 1))
+        print("{}: native differs by {:.3g} of the exported integral".format(name, error))
+        if not error <= tolerance:
+            print("FAIL {} above the tolerance {:.3g}".format(name, tolerance))
+            passed = False
+
+    return passed
+
+
+if __name__ == "__main__":
+
+    tools = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description = "Native against exported vorticity on the synthetic cylinder")
+    parser.add_argument("--stages", nargs = 2, default = [os.path.join(tools, "..", "Vpp2_CalcVirtualFlow"),
+                                                          os.path.join(tools, "..", "Vpp3_FlowVisualization")],
+                        help = "virtual flow and flow visualization stages")
+    parser.add_argument("--cells", type = int, default = 20000)
+    parser.add_argument("--steps", type = int, default = 3)
+    parser.add_argument("--tolerance", type = float, default = 0.02,
+                        help = "largest difference of an integral, relative to the exported one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as case:
+
+        generate(case, "cylinder2D", args.cells, steps = args.steps, write_format = "csv")
+
+        if not check_vorticity([os.path.abspath(stage) for stage in args.stages], case, args.tolerance):
+            sys.exit(1)
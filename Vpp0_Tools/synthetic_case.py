@@ -0,0 +1,371 @@
+import argparse
+import json
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+
+# Flow past a body at rest in a unit free stream: the potential flow of the
+# body and a Lamb-Oseen vortex carried downstream by the stream, brought to
+# rest at the wall across a layer of thickness "layer" (u = f(r) w with
+# f = 1 - exp(-(r - R)/layer)). The vorticity of the fields is exact.
+radius = 0.5
+outer_radius = 20 * radius
+span = 1.0
+circulation = 1.0
+core = 0.25
+layer = 0.1 * radius
+viscosity = 1.0 / 150
+
+
+def vortex_position(time):
+
+    # Shed at the rear of the body, it leaves the domain after t = 10
+    return np.array([2 * radius + time, 0.5 * radius * np.sin(2 * np.pi * time)])
+
+
+def vortex(x, y, time):
+
+    # Velocity and z vorticity of the Lamb-Oseen vortex
+    xv, yv = vortex_position(time)
+    dx = x - xv
+    dy = y - yv
+    r2 = np.maximum(dx * dx + dy * dy, 1e-12)
+    decay = np.exp(-r2 / (core * core))
+
+    u_theta = circulation / (2 * np.pi * r2) * (1 - decay)
+    omega = circulation / (np.pi * core * core) * decay
+
+    return -u_theta * dy, u_theta * dx, omega
+
+
+def cylinder_flow(x, y, z, time):
+
+    r2 = np.maximum(x * x + y * y, 1e-12)
+    a2 = radius * radius
+
+    u = 1 - a2 * (x * x - y * y) / (r2 * r2)
+    v = -2 * a2 * x * y / (r2 * r2)
+    w = np.zeros_like(x)
+
+    return u, v, w
+
+
+def sphere_flow(x, y, z, time):
+
+    r2 = np.maximum(x * x + y * y + z * z, 1e-12)
+    r5 = r2 * r2 * np.sqrt(r2)
+    a3 = radius ** 3
+
+    u = 1 + a3 / (2 * r2 * np.sqrt(r2)) - 1.5 * a3 * x * x / r5
+    v = -1.5 * a3 * x * y / r5
+    w = -1.5 * a3 * x * z / r5
+
+    return u, v, w
+
+
+def flow_fields(geometry, x, y, z, time):
+
+    # Velocity, pressure (Bernoulli of the potential flow) and vorticity
+    potential = cylinder_flow if geometry == "cylinder2D" else sphere_flow
+    u, v, w = potential(x, y, z, time)
+    pressure = 0.5 * (1 - (u * u + v * v + w * w))
+
+    vortex_u, vortex_v, omega = vortex(x, y, time)
+    outer = np.array([u + vortex_u, v + vortex_v, w])
+
+    # No-slip layer: curl(f w) = f curl(w) + f'(r) e_r x w
+    position = np.array([x, y, z if geometry == "sphere3D" else np.zeros_like(x)])
+    r = np.sqrt(np.sum(position * position, axis = 0))
+    decay = np.exp(-np.maximum(r - radius, 0) / layer)
+
+    vorticity = decay / layer * np.cross(position / r, outer, axis = 0)
+    vorticity[2] += (1 - decay) * omega
+
+    return {"U": (1 - decay) * outer[0], "V": (1 - decay) * outer[1], "W": (1 - decay) * outer[2],
+            "pressure": pressure,
+            "X vorticity": vorticity[0], "Y vorticity": vorticity[1], "Z vorticity": vorticity[2]}
+
+
+def stretched(start, end, first, num):
+
+    # num + 1 nodes from start to end, the spacing grows geometrically from
+    # "first" (the ratio is found by bisection)
+    low, high = 0.5, 1 + 20 / num
+    for i in range(200):
+        ratio = 0.5 * (low + high)
+        if first * (ratio ** num - 1) / (ratio - 1) < end - start:
+            low = ratio
+        else:
+            high = ratio
+
+    nodes = start + np.concatenate(([0.0], np.cumsum(first * ratio ** np.arange(num))))
+    nodes[-1] = end
+
+    return nodes
+
+
+def grid(geometry, num_cells):
+
+    # A structured O-grid around the body, clustered at the wall so that the
+    # no-slip layer is resolved: the fluid cells, the wall faces and the
+    # brick connectivity of the cells (zero-based, Tecplot node order)
+    log_ratio = np.log(outer_radius / radius)
+    r = None
+
+    if geometry == "cylinder2D":
+
+        # One cell across the span, as a 2D OpenFOAM case
+        num_theta = max(8, int(round(np.sqrt(num_cells * 2 * np.pi / log_ratio))))
+        num_r = max(2, num_cells // num_theta)
+        r = stretched(radius, outer_radius, 0.1 * layer, num_r)
+        theta = np.linspace(0, 2 * np.pi, num_theta + 1)
+
+        def node(k, i, j):
+            return (k * (num_r + 1) + i) * num_theta + j % num_theta
+
+        i, j = np.meshgrid(np.arange(num_r), np.arange(num_theta), indexing = "ij")
+        nodemap = np.stack([node(k, i + a, j + b) for k in (0, 1) for a, b in ((0, 0), (1, 0), (1, 1), (0, 1))],
+                           axis = -1).reshape(-1, 8)
+
+        rn, tn = np.meshgrid(r, theta[:-1], indexing = "ij")
+        nodes = np.concatenate([np.column_stack([(rn * np.cos(tn)).ravel(), (rn * np.sin(tn)).ravel(),
+                                                 np.full(rn.size, z)]) for z in (-0.5 * span, 0.5 * span)])
+
+        rc = 0.5 * (r[:-1] + r[1:])[i].ravel()
+        tc = 0.5 * (theta[:-1] + theta[1:])[j].ravel()
+        volume = (0.5 * (r[1:] ** 2 - r[:-1] ** 2) * 2 * np.pi / num_theta * span)[i].ravel()
+        fluid = pd.DataFrame({"X C": rc * np.cos(tc), "Y C": rc * np.sin(tc), "Z C": np.zeros(len(rc)),
+                              "Cell Volume": volume})
+
+        tf = 0.5 * (theta[:-1] + theta[1:])
+        boundary = pd.DataFrame({"X C": radius * np.cos(tf), "Y C": radius * np.sin(tf), "Z C": np.zeros(num_theta),
+                                 "Cell Volume": np.full(num_theta, 2 * np.pi * radius * span / num_theta)})
+
+    else:
+
+        # Polar and azimuthal angles, the cells at the poles are bricks with
+        # their pole nodes merged
+        num_polar = max(4, int(round((num_cells * np.pi / (2 * log_ratio)) ** (1 / 3))))
+        num_azimuth = 2 * num_polar
+        num_r = max(2, num_cells // (num_polar * num_azimuth))
+        r = stretched(radius, outer_radius, 0.1 * layer, num_r)
+        polar = np.linspace(0, np.pi, num_polar + 1)
+        azimuth = np.linspace(0, 2 * np.pi, num_azimuth + 1)
+
+        def node(i, j, k):
+            k = np.where((j == 0) | (j == num_polar), 0, k % num_azimuth)
+            return (i * (num_polar + 1) + j) * num_azimuth + k
+
+        i, j, k = np.meshgrid(np.arange(num_r), np.arange(num_polar), np.arange(num_azimuth), indexing = "ij")
+        nodemap = np.stack([node(i + c, j + a, k + b) for c in (0, 1) for a, b in ((0, 0), (1, 0), (1, 1), (0, 1))],
+                           axis = -1).reshape(-1, 8)
+
+        rn, pn, an = np.meshgrid(r, polar, azimuth[:-1], indexing = "ij")
+        nodes = np.column_stack([(rn * np.sin(pn) * np.cos(an)).ravel(), (rn * np.sin(pn) * np.sin(an)).ravel(),
+                                 (rn * np.cos(pn)).ravel()])
+
+        rc = 0.5 * (r[:-1] + r[1:])[i].ravel()
+        pc = 0.5 * (polar[:-1] + polar[1:])[j].ravel()
+        ac = 0.5 * (azimuth[:-1] + azimuth[1:])[k].ravel()
+        band = (np.cos(polar[:-1]) - np.cos(polar[1:])) * 2 * np.pi / num_azimuth
+        volume = ((r[1:] ** 3 - r[:-1] ** 3) / 3)[i].ravel() * band[j].ravel()
+        fluid = pd.DataFrame({"X C": rc * np.sin(pc) * np.cos(ac), "Y C": rc * np.sin(pc) * np.sin(ac),
+                              "Z C": rc * np.cos(pc), "Cell Volume": volume})
+
+        j, k = np.meshgrid(np.arange(num_polar), np.arange(num_azimuth), indexing = "ij")
+        pf = 0.5 * (polar[:-1] + polar[1:])[j].ravel()
+        af = 0.5 * (azimuth[:-1] + azimuth[1:])[k].ravel()
+        boundary = pd.DataFrame({"X C": radius * np.sin(pf) * np.cos(af), "Y C": radius * np.sin(pf) * np.sin(af),
+                                 "Z C": radius * np.cos(pf), "Cell Volume": radius * radius * band[j].ravel()})
+
+    return fluid, boundary, nodemap.astype(np.int32), nodes
+
+
+def write_table(filename, df, write_format):
+
+    if(write_format == "h5"):
+
+        df.to_hdf(filename + ".h5", key = "data", mode = "w")
+
+    elif(write_format == "csv"):
+
+        df.to_csv(filename + ".dat", index = False, encoding = "utf-8")
+
+    else:
+        quit("The format of the stored data is not supported")
+
+
+class StubCase:
+
+    # The OpenFOAM case as the stub Tecplot backend (VPP_TECPLOT=stub) loads
+    # it, see Package/tecplotio/stub.py. The arrays are written one by one,
+    # the case does not have to fit in memory
+    zone_names = ["fluid", "inlet", "outlet", "top", "bottom", "body"]
+
+    def __init__(self, path):
+
+        self.__zip = zipfile.ZipFile(path, "w", allowZip64 = True)
+
+    def write(self, key, array):
+
+        with self.__zip.open(key + ".npy", "w", force_zip64 = True) as f:
+            np.lib.format.write_array(f, np.asarray(array), allow_pickle = False)
+
+    def write_layout(self, variables, times, fluid, boundary, nodemap, nodes):
+
+        # Zones of each time (t = 0 first): the fluid, four empty outer
+        # boundaries and the body. The grid is stored once, the fluid zone
+        # with its nodes and brick connectivity
+        num_zones = len(StubCase.zone_names)
+        sizes = [len(fluid), 0, 0, 0, 0, len(boundary)]
+
+        self.write("variables", np.array(variables))
+        self.write("names", np.array(StubCase.zone_names * len(times)))
+        self.write("times", np.repeat(times, num_zones))
+        self.write("sizes", np.array(sizes * len(times)))
+        self.write("static", np.array(num_zones))
+        self.write("nodal", np.array(["X", "Y", "Z"]))
+        self.write("mesh/0/nodemap", nodemap)
+        for d, name in enumerate(("X", "Y", "Z")):
+            self.write("mesh/0/" + name, nodes[:, d])
+
+        for index, mesh in ((0, fluid), (num_zones - 1, boundary)):
+            for name in mesh.columns:
+                self.write("mesh/{}/{}".format(index, name), mesh[name].values)
+
+    def write_step(self, step, index, fields):
+
+        for name, values in fields.items():
+            self.write("zone/{}/{}".format(step * len(StubCase.zone_names) + index, name), values)
+
+    def close(self):
+
+        self.__zip.close()
+
+
+def control_files(geometry, case_path, write_path, write_format, workers, probes):
+
+    center = "[0.0, 0.0]" if geometry == "cylinder2D" else "[0.0, 0.0, 0.0]"
+
+    split = "\n".join([
+        "Path {",
+        "    case = \"{}\"".format(case_path),
+        "    write = \"{}\"".format(write_path),
+        "}",
+        "num_zones = 6",
+        "write_format = \"{}\"".format(write_format),
+        "boundary {",
+        "    internal { write = TRUE index = [5] name = [\"body\"] }",
+        "    external { write = FALSE }",
+        "}"])
+
+    model = ["model {",
+             "    geometry = \"{}\"".format(geometry),
+             "    motion = \"stationary\"",
+             "    virtualmotion = \"sourcePoint\"",
+             "    sourcePoint = [{}, 0.0, 0.0]".format(-1.5 * radius)]
+    if probes:
+        # Pressure taps around the body, just off its surface
+        angles = np.linspace(0, 2 * np.pi, probes, endpoint = False)
+        points = ", ".join("({:.6f}, {:.6f}, 0.0)".format(1.05 * radius * np.cos(a), 1.05 * radius * np.sin(a))
+                           for a in angles)
+        model.append("    probes = [{}]".format(points))
+    model.append("}")
+
+    theory = "\n".join(model + ["{} {{ radius = {} center = {} }}".format(geometry, radius, center)])
+
+    visualization = "\n".join([
+        "viscosity = {}".format(viscosity),
+        "workers = {}".format(workers),
+        "vorticity = \"auto\"",
+        "integration = \"native\""])
+
+    return {"splitControlDict": split, "theoryControlDict": theory, "visualizationControlDict": visualization}
+
+
+def generate(directory, geometry="cylinder2D", cells=100000, steps=10, write_format="h5",
+             workers=1, probes=0, tecplot_stub=False):
+
+    # A case folder: the control files in "input/" and the worksheets of the
+    # split stage, as Vpp1_SplitFluidData writes them for a static mesh. With
+    # tecplot_stub the case to split is written as well, for the stub backend
+    if geometry not in ("cylinder2D", "sphere3D"):
+        quit("No this model!!!")
+
+    directory = os.path.abspath(directory)
+    write_path = os.path.join(directory, "synthetic")
+    worksheet = write_path + "_DataDir/Worksheet/"
+    case_path = os.path.join(directory, "openfoam_stub.npz")
+
+    for folder in ("input", worksheet + "mesh", worksheet + "fluid", worksheet + "body"):
+        os.makedirs(os.path.join(directory, folder), exist_ok = True)
+
+    for name, text in control_files(geometry, case_path, write_path, write_format, workers, probes).items():
+        with open(os.path.join(directory, "input", name), "w") as f:
+            f.write(text + "\n")
+
+    fluid, boundary, nodemap, nodes = grid(geometry, cells)
+
+    write_table(worksheet + "mesh/fluid", fluid, write_format)
+    write_table(worksheet + "mesh/body", boundary, write_format)
+    np.savez(worksheet + "mesh/fluid_connectivity.npz", nodemap = nodemap, nodes = nodes)
+
+    fx, fy, fz = fluid[["X C", "Y C", "Z C"]].values.T
+    bx, by, bz = boundary[["X C", "Y C", "Z C"]].values.T
+
+    times = [0.1 * (step + 1) for step in range(steps)]
+    with open(worksheet + "time.dat", "w") as f:
+        for step, time in enumerate(times, start = 1):
+            f.writelines([str(step), "    ", str(time), "\n"])
+
+    stub_case = None
+    if tecplot_stub:
+        stub_case = StubCase(case_path)
+        variables = ["X", "Y", "Z"] + list(fluid.columns) + list(flow_fields(geometry, fx[:1], fy[:1], fz[:1], 0.0))
+        stub_case.write_layout(variables, [0.0] + times, fluid, boundary, nodemap, nodes)
+
+    for step, time in enumerate(times, start = 1):
+
+        fluid_fields = flow_fields(geometry, fx, fy, fz, time)
+        write_table(worksheet + "fluid/fluid_" + str(step), pd.DataFrame(fluid_fields), write_format)
+
+        fields = flow_fields(geometry, bx, by, bz, time)
+        write_table(worksheet + "body/body_" + str(step),
+                    pd.DataFrame({name: fields[name] for name in ("X vorticity", "Y vorticity", "Z vorticity")}),
+                    write_format)
+
+        if stub_case is not None:
+            stub_case.write_step(step, 0, fluid_fields)
+            stub_case.write_step(step, len(StubCase.zone_names) - 1, fields)
+
+    if stub_case is not None:
+        stub_case.close()
+
+    case = {"geometry": geometry, "cells": len(fluid), "faces": len(boundary), "steps": steps,
+            "format": write_format, "workers": workers, "probes": probes, "tecplot_stub": tecplot_stub}
+    with open(os.path.join(directory, "synthetic.json"), "w") as f:
+        json.dump(case, f, indent = 4)
+
+    return case
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Synthetic worksheets of a cylinder or sphere for benchmarks")
+    parser.add_argument("directory", help = "case folder, the stages are run in it")
+    parser.add_argument("--geometry", default = "cylinder2D", choices = ["cylinder2D", "sphere3D"])
+    parser.add_argument("--cells", type = int, default = 100000, help = "fluid cells (1e4 to 1e7)")
+    parser.add_argument("--steps", type = int, default = 10)
+    parser.add_argument("--format", default = "h5", choices = ["h5", "csv"])
+    parser.add_argument("--workers", type = int, default = 1, help = "workers of the Vpp3 native path")
+    parser.add_argument("--probes", type = int, default = 0, help = "pressure taps around the body")
+    parser.add_argument("--tecplot-stub", action = "store_true",
+                        help = "also write the case for Vpp1 and Vpp3 with VPP_TECPLOT=stub")
+    args = parser.parse_args()
+
+    case = generate(args.directory, args.geometry, args.cells, args.steps, args.format,
+                    args.workers, args.probes, args.tecplot_stub)
+    print("Synthetic case written to", os.path.abspath(args.directory), case)
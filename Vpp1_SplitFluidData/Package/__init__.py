@@ -1,7 +0,0 @@
-import sys
-
-path = sys.path[0] + "/Package/parser"
-sys.path.append(path)
-
-path = sys.path[0] + "/Package/solver"
-sys.path.append(path)
\ No newline at end of file
@@ -0,0 +1,326 @@
+import json
+import os
+import sys
+import threading
+import time as clock
+
+# Spans are recorded when VPP_TIMING names a directory: one JSON line per
+# span in <directory>/<script>.jsonl. VPP_PROFILE additionally dumps a
+# cProfile of the script to <directory>/<script>.<pid>.prof, VPP_MEMORY adds
+# the memory of each span and writes <directory>/<script>.<pid>.memory.txt.
+
+
+def data_size(data):
+
+    # Rows and bytes of tables, arrays and containers of them
+    if data is None:
+        return 0, 0
+
+    if hasattr(data, "memory_usage"):
+        usage = data.memory_usage(index = False)
+        return len(data), int(usage.sum() if hasattr(usage, "sum") else usage)
+
+    if hasattr(data, "nbytes"):
+        return (len(data) if getattr(data, "ndim", 1) else 1), int(data.nbytes)
+
+    # The columns of one table
+    if isinstance(data, dict):
+        sizes = [data_size(value) for value in data.values()]
+        return max([rows for rows, nbytes in sizes], default = 0), sum(nbytes for rows, nbytes in sizes)
+
+    if isinstance(data, (list, tuple)):
+        sizes = [data_size(item) for item in data]
+        return sum(rows for rows, nbytes in sizes), sum(nbytes for rows, nbytes in sizes)
+
+    return 0, 0
+
+
+class NullSpan:
+
+    # The span of a disabled timing, it does nothing
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exception):
+
+        return False
+
+    def count(self, data=None, rows=0, nbytes=0):
+
+        pass
+
+
+null_span = NullSpan()
+
+
+class Span:
+
+    def __init__(self, timing, phase, step, zone):
+
+        self.__timing = timing
+        self.__phase = phase
+        self.__step = step
+        self.__zone = zone
+        self.__rows = 0
+        self.__bytes = 0
+        self.__children = 0.0
+        self.__peak = 0
+
+    def __enter__(self):
+
+        self.__traced = self.__timing.push(self)
+        self.__wall = clock.time()
+        self.__start = clock.perf_counter()
+
+        return self
+
+    def __exit__(self, *exception):
+
+        seconds = clock.perf_counter() - self.__start
+        memory = self.__timing.pop(self, seconds)
+
+        # Traced bytes alive at the end, the peak during the span (its
+        # children included), the growth over the span and the resident size
+        if memory is not None:
+            current, peak, rss = memory
+            memory = {"traced": current, "peak": max(self.__peak, peak), "growth": current - self.__traced,
+                      "rss": rss}
+
+        # Nested spans are subtracted, the self times of the phases add up
+        # to the time of the run
+        self.__timing.record(self.__phase, self.__step, self.__zone, self.__wall, seconds,
+                             seconds - self.__children, self.__rows, self.__bytes, memory)
+        return False
+
+    def add_child(self, seconds):
+
+        self.__children += seconds
+
+    def note_peak(self, peak):
+
+        self.__peak = max(self.__peak, peak)
+
+    def count(self, data=None, rows=0, nbytes=0):
+
+        # Rows and bytes handled in the span, measured from the data or given
+        data_rows, data_bytes = data_size(data)
+        self.__rows += rows + data_rows
+        self.__bytes += nbytes + data_bytes
+
+
+class Timing:
+
+    def __init__(self, stage, directory=None, profile=False, memory=False):
+
+        self.__stage = stage
+        self.__directory = directory
+        self.__enabled = directory is not None
+        self.__local = threading.local()
+        self.__file = None
+        self.__profiler = None
+        self.__memory = None
+
+        if self.__enabled:
+
+            os.makedirs(directory, exist_ok = True)
+            self.__path = os.path.join(directory, stage + ".jsonl")
+            self.__file = open(self.__path, "a", buffering = 1)
+
+            # Worker processes and the stages started by this script inherit
+            # the run, the summary covers all of them
+            if "VPP_TIMING_RUN" not in os.environ:
+                os.environ["VPP_TIMING_RUN"] = "{}-{}".format(int(clock.time()), os.getpid())
+            self.__run = os.environ["VPP_TIMING_RUN"]
+
+            if memory:
+                from .memory import MemoryTracker
+                self.__memory = MemoryTracker()
+
+        if profile:
+            import cProfile
+            self.__profiler = cProfile.Profile()
+            self.__profiler.enable()
+
+    @staticmethod
+    def from_environment(stage):
+
+        profile = bool(os.environ.get("VPP_PROFILE"))
+        memory = bool(os.environ.get("VPP_MEMORY"))
+        directory = os.environ.get("VPP_TIMING")
+        if (profile or memory) and directory is None:
+            directory = "timing"
+
+        # The stages run in their own folders, they write next to each other
+        if directory is not None:
+            directory = os.path.abspath(directory)
+            os.environ["VPP_TIMING"] = directory
+
+        return Timing(stage, directory, profile, memory)
+
+    def whether_enabled(self):
+
+        return self.__enabled
+
+    def whether_memory(self):
+
+        return self.__memory is not None
+
+    def get_path(self):
+
+        return self.__path if self.__enabled else None
+
+    def set_step(self, step):
+
+        # Step of the spans of this thread which do not give one
+        self.__local.step = step
+
+    def span(self, phase, step=None, zone=None):
+
+        # phase: "read", "compute", "write" or "tecplot"
+        if not self.__enabled:
+            return null_span
+
+        if step is None:
+            step = getattr(self.__local, "step", None)
+
+        return Span(self, phase, step, zone)
+
+    def push(self, span):
+
+        # Returns the traced bytes at the start of the span, with VPP_MEMORY
+        if not hasattr(self.__local, "spans"):
+            self.__local.spans = []
+        spans = self.__local.spans
+
+        traced = None
+        if self.__memory is not None:
+            traced = self.__memory.begin(spans[-1] if spans else None)
+
+        spans.append(span)
+
+        return traced
+
+    def pop(self, span, seconds):
+
+        spans = self.__local.spans
+        spans.pop()
+        if spans:
+            spans[-1].add_child(seconds)
+
+        if self.__memory is not None:
+            return self.__memory.end()
+
+        return None
+
+    def record(self, phase, step, zone, start, seconds, own, rows, nbytes, memory=None):
+
+        entry = {"run": self.__run, "stage": self.__stage, "pid": os.getpid(), "phase": phase,
+                 "step": None if step is None else int(step), "zone": None if zone is None else str(zone),
+                 "start": start, "seconds": seconds, "self": own, "rows": rows, "bytes": nbytes}
+        if memory is not None:
+            entry.update(memory)
+
+        # One write per line, the processes of a run share the file
+        self.__file.write(json.dumps(entry) + "\n")
+
+    def read(self):
+
+        # Spans of this run, the worker processes included
+        entries = []
+        with open(self.__path, "r") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["run"] == self.__run:
+                    entries.append(entry)
+
+        return entries
+
+    def summary(self):
+
+        # Time, volume and throughput of each phase
+        import pandas as pd
+
+        columns = ["phase", "spans", "seconds", "rows", "MB", "rows/s", "MB/s"]
+        entries = self.read() if self.__enabled else []
+        if not entries:
+            return pd.DataFrame(columns = columns)
+
+        df = pd.DataFrame(entries)
+        summary = df.groupby("phase", sort = False).agg(spans = ("self", "count"), seconds = ("self", "sum"),
+                                                        rows = ("rows", "sum"), MB = ("bytes", "sum")).reset_index()
+        summary["MB"] = summary["MB"] / 1024 / 1024
+        summary["rows/s"] = summary["rows"] / summary["seconds"].where(summary["seconds"] > 0)
+        summary["MB/s"] = summary["MB"] / summary["seconds"].where(summary["seconds"] > 0)
+
+        # Largest traced peak and resident size of the spans of each phase
+        if "peak" in df:
+            memory = df.groupby("phase", sort = False).agg(peak = ("peak", "max"), rss = ("rss", "max"))
+            summary["peak MB"] = summary["phase"].map(memory["peak"]) / 1024 / 1024
+            summary["rss MB"] = summary["phase"].map(memory["rss"]) / 1024 / 1024
+            columns += ["peak MB", "rss MB"]
+
+        return summary[columns]
+
+    def memory_steps(self):
+
+        # (pid, step, rss, peak) per process and step: the resident size at
+        # the end of the last span of the step and the largest traced peak
+        entries = [entry for entry in self.read() if "peak" in entry and entry["step"] is not None]
+        entries.sort(key = lambda entry: (entry["pid"], entry["start"] + entry["seconds"]))
+
+        steps = {}
+        for entry in entries:
+            key = (entry["pid"], entry["step"])
+            rss, peak = steps.get(key, (None, 0))
+            steps[key] = (entry["rss"] if entry["rss"] is not None else rss, max(peak, entry["peak"]))
+
+        return [(pid, step, rss, peak) for (pid, step), (rss, peak) in steps.items()]
+
+    def close(self):
+
+        # Prints the summary and writes the profile, at the end of the script
+        if self.__profiler is not None:
+            self.__profiler.disable()
+            self.__profiler.dump_stats(os.path.join(self.__directory, "{}.{}.prof".format(self.__stage, os.getpid())))
+            self.__profiler = None
+
+        if self.__enabled and self.__file is not None:
+            self.__file.close()
+            self.__file = None
+            print("Timing of", self.__stage, "(", self.__path, ")")
+            print(self.summary().to_string(index = False, float_format = "%.4g"))
+
+            if self.__memory is not None:
+                self.__report_memory()
+
+    def __report_memory(self):
+
+        from .memory import growth
+
+        steps = self.memory_steps()
+        path = os.path.join(self.__directory, "{}.{}.memory.txt".format(self.__stage, os.getpid()))
+        self.__memory.report(path, steps)
+        print("Memory report:", path)
+
+        # Memory which grows with every step of a process would not be freed
+        # by a longer run either
+        for pid in sorted(set(pid for pid, step, rss, peak in steps)):
+            for name, index in (("resident", 2), ("traced peak", 3)):
+                values = [sample[index] for sample in steps if sample[0] == pid and sample[index] is not None]
+                if growth(values):
+                    print("Warning: the {} memory of pid {} grew in every step, from {:.1f} to {:.1f} MB".format(
+                        name, pid, values[1] / 1024 / 1024, values[-1] / 1024 / 1024))
+
+
+timing = None
+
+def get_timing():
+
+    # The timing of this process, configured from the environment once
+    global timing
+    if timing is None:
+        stage = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+        timing = Timing.from_environment(stage)
+
+    return timing
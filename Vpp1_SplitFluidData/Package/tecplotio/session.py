@@ -0,0 +1,58 @@
+import importlib
+import os
+
+
+class TecplotSession:
+
+    # Attributes which do not need a running Tecplot 360
+    offline = ("constant", "exception")
+
+    def __init__(self, port=7600, backend=None):
+
+        # Stands in for the tecplot module: PyTecplot is imported and the
+        # session connected on the first Tecplot-backed call, so the control
+        # files are checked and the data is prepared without it. The "stub"
+        # backend (VPP_TECPLOT=stub) runs on NumPy instead of Tecplot 360
+        self.__port = port
+        self.__backend = backend if backend is not None else os.environ.get("VPP_TECPLOT", "pytecplot")
+        self.__module = None
+        self.__connected = False
+
+        if self.__backend not in ("pytecplot", "stub"):
+            quit("The Tecplot backend is not supported")
+
+    def whether_connected(self):
+
+        return self.__connected
+
+    def get_backend(self):
+
+        return self.__backend
+
+    def module(self):
+
+        if self.__module is None:
+            if self.__backend == "stub":
+                from .stub import StubTecplot
+                self.__module = StubTecplot()
+            else:
+                self.__module = importlib.import_module("tecplot")
+
+        return self.__module
+
+    def connect(self):
+
+        module = self.module()
+
+        if not self.__connected:
+            module.session.connect(port=self.__port)
+            self.__connected = True
+
+        return module
+
+    def __getattr__(self, name):
+
+        if name in TecplotSession.offline:
+            return getattr(self.module(), name)
+
+        return getattr(self.connect(), name)
@@ -1,20 +1,42 @@
-import tecplot 
-from tecplot.exception import *
-from tecplot.constant import *
+# The startup profile times the imports below, it is installed first
+from Package.profiling.startupprofile import startup_profile
+startup = startup_profile()
 
-import Package
 from Package.solver.splitcontrol import SplitControl
+from Package.tecplotio.tecplotaccess import TecplotAccess
+from Package.tecplotio.session import TecplotSession
+from Package.profiling.timing import get_timing
 
 import numpy as np
-import pandas as pd
+import argparse
+import shutil
 import os
 
 
-tecplot.session.connect(port=7600)
+# Watch mode splits the newly completed time steps only
+parser = argparse.ArgumentParser(description = "Split the OpenFOAM case into the worksheet")
+parser.add_argument("--times", default = None,
+                    help = "comma separated solution times to split, the steps already split are kept")
+parser.add_argument("--startup-profile", action = "store_true",
+                    help = "print the import time of the packages once the control file is read")
+args = parser.parse_args()
+
+selected_times = None
+if args.times is not None:
+    selected_times = np.array([float(value) for value in args.times.split(",")])
+
+
+# PyTecplot is imported and connected on the first Tecplot call
+tecplot = TecplotSession(port=7600)
 
 # Read split control file
 solver_control = SplitControl("input/splitControlDict")
 
+startup.report()
+
+# Tecplot, write spans of each step and zone (VPP_TIMING)
+timing = get_timing()
+
 
 # Create folders
 # "_DataDir": store the whole virtual power analysis data
@@ -30,148 +52,250 @@ if not os.path.exists(worksheet_dir):
 
 
 # Read openfoam case (controlDcit file)
-dataset = tecplot.data.load_openfoam(
-    solver_control.get_case_path(),
-    frame=None,
-    append=False,
-    boundary_zone_construction=None,
-    assign_strand_ids=True,
-    add_zones_to_existing_strands=True,
-    initial_plot_type=PlotType.Automatic,
-    initial_plot_first_zone_only=False)
+with timing.span("tecplot", zone = "load_openfoam"):
+    dataset = tecplot.data.load_openfoam(
+        solver_control.get_case_path(),
+        frame=None,
+        append=False,
+        boundary_zone_construction=None,
+        assign_strand_ids=True,
+        add_zones_to_existing_strands=True,
+        initial_plot_type=tecplot.constant.PlotType.Automatic,
+        initial_plot_first_zone_only=False)
+
+# Zone values are fetched through the access layer, it keeps the zone
+# handles and counts the Tecplot calls
+access = TecplotAccess(tecplot, dataset)
+
+
+# Cell volumes of the fluid zone and face areas of the boundary zones, the
+# visualization step integrates with them instead of a CFDAnalyzer macro
+with timing.span("tecplot", zone = "CFDAnalyzer4"):
+    tecplot.macro.execute_extended_command('CFDAnalyzer4', '''
+        Calculate Function='CELLVOLUME'
+        Normalization='None'
+        ValueLocation='CellCentered'
+        CalculateOnDemand='F'
+        UseMorePointsForFEGradientCalculations='F'
+    ''')
+
+
+# Variables describing the grid. For a static mesh they are written once
+# to the "mesh" dataset, the remaining cell-centred variables are the
+# solution variables of each time step.
+mesh_variables = ["X", "Y", "Z", "X C", "Y C", "Z C", "Element UserID", "Cell Volume"]
+coordinates = ["X C", "Y C", "Z C"]
 
-
-# Split the Tecplot data of each time step
 num_zones = solver_control.get_num_zones()
-for step,time in enumerate(dataset.solution_times):
 
-    # Skip t = 0
-    if step == 0:
-        continue
-    
-    print("write tecplot data, time = ",time)
+# Zones written to the worksheet: the fluid zone and the boundaries
+zone_index = [0]
+zone_name = ["fluid"]
 
-    # Create a list to save each step time's zone data
-    zone_to_save = []
+if(solver_control.whether_write_internal_boundary()):
+    boundary_index, boundary_name = solver_control.get_internal_boundary()
+    zone_index += boundary_index
+    zone_name += boundary_name
 
-    for i in range(num_zones):
-        zone_to_save.append(dataset.zone(step * num_zones + i))
+if(solver_control.whether_write_external_boundary()):
+    boundary_index, boundary_name = solver_control.get_external_boundary()
+    zone_index += boundary_index
+    zone_name += boundary_name
 
 
-    # The flow field data of each time step is saved in the "plt" format
-    path = worksheet_dir + "fluid_plt/"
-    if not os.path.exists(path):
-        os.makedirs(path)
-    
-    # write name : e.g. fluid_0.plt
-    write_name = path + "fluid_" + str(step) + ".plt"
-    tecplot.data.save_tecplot_plt(
-        write_name, 
-        dataset=dataset,              
-        zones=zone_to_save)
-    
+def write_data(df, filename):
 
-# Write the boundary data and the grid data of each time step
-for step,time in enumerate(dataset.solution_times):
+    with timing.span("write", zone = os.path.basename(filename)) as span:
 
-    # Skip t = 0
-    if step == 0:
-        continue
-    
-    print("write fluid data, time = ", time)
+        if(solver_control.get_write_format() == "h5"):
 
-    fluid_x = dataset.zone(step * num_zones).values("X C").as_numpy_array()
-    fluid_y = dataset.zone(step * num_zones).values("Y C").as_numpy_array()
-    fluid_z = dataset.zone(step * num_zones).values("Z C").as_numpy_array()
+            df.to_hdf(filename + ".h5", key = "data", mode = "w")
 
-    df = pd.DataFrame(np.array([fluid_x, fluid_y, fluid_z]).T, columns = ["X C", "Y C", "Z C"])
+        elif(solver_control.get_write_format() == "csv"):
 
-    path =  worksheet_dir + "fluid/"
-    if not os.path.exists(path):
-        os.makedirs(path)
+            df.to_csv(filename + ".dat", index = False, encoding = "utf-8")
 
-    if(solver_control.get_write_format() == "h5"):
-        
-        filename = path + "fluid_" + str(step) + ".h5"
-        df.to_hdf(filename, key = "data", mode = "w")
+        else:
+            quit("The format of the stored data is not supported")
 
-    elif(solver_control.get_write_format() == "csv"):
+        span.count(df)
 
-        filename = path + "fluid_" + str(step) + ".dat"
-        df.to_csv(filename, index = False, encoding = "utf-8")
 
-    else:
-        quit("The format of the stored data is not supported")
+def is_static_mesh():
 
+    # The mesh is static if the cell centres of every written zone are
+    # identical to the ones of the first step
+    first = [access.fetch_frame(num_zones + i, coordinates).values for i in zone_index]
+
+    for step,time in enumerate(dataset.solution_times):
+
+        if step <= 1:
+            continue
+
+        for i, index in enumerate(zone_index):
+            current = access.fetch_frame(step * num_zones + index, coordinates).values
+            if not np.array_equal(current, first[i]):
+                return False
+
+    return True
+
+
+def solution_variables(zone):
+
+    # Cell-centred variables which are not part of the mesh
+    names = []
+    for variable in dataset.variables():
+        if variable.name in mesh_variables:
+            continue
+        if zone.values(variable.name).location == tecplot.constant.ValueLocation.CellCentered:
+            names.append(variable.name)
+
+    return names
+
+
+def is_selected(time):
+
+    if selected_times is None:
+        return True
+
+    return bool(np.any(np.isclose(selected_times, time, rtol = 1e-9, atol = 0)))
+
+
+mesh_dir = worksheet_dir + "mesh/"
+
+# Selected times extend an existing worksheet, they keep its grid layout
+extend = selected_times is not None and os.path.exists(worksheet_dir + "time.dat")
+
+if extend:
+
+    static_mesh = os.path.exists(mesh_dir)
+
+else:
+
+    static_mesh = is_static_mesh()
+
+    if os.path.exists(mesh_dir):
+        shutil.rmtree(mesh_dir)
+
+plt_dir = worksheet_dir + "fluid_plt/"
+if not os.path.exists(plt_dir):
+    os.makedirs(plt_dir)
+
+
+if static_mesh and not extend:
+
+    print("static mesh detected, write mesh data once")
+
+    os.makedirs(mesh_dir)
+
+    # Grid plt: the zones of the first step with the mesh variables only
+    names = [name for name in mesh_variables if name in dataset.variable_names]
+
+    with timing.span("tecplot", zone = "save_tecplot_plt"):
+        tecplot.data.save_tecplot_plt(
+            plt_dir + "mesh.plt",
+            dataset=dataset,
+            zones=[dataset.zone(num_zones + i) for i in range(num_zones)],
+            variables=[dataset.variable(name) for name in names])
+
+    # Mesh dataset: the cell centres of each written zone
+    for index, name in zip(zone_index, zone_name):
+        zone = access.zone(num_zones + index)
+        cell_names = [name for name in names if zone.values(name).location == tecplot.constant.ValueLocation.CellCentered]
+        write_data(access.fetch_frame(num_zones + index, cell_names), mesh_dir + name)
+
+    # Cell connectivity of the fluid zone, the visualization step builds its
+    # gradient operators and locates the probe cells with it (classic
+    # finite-element zones only)
+    connectivity = access.connectivity(num_zones)
+    if connectivity is not None:
+        np.savez(mesh_dir + "fluid_connectivity.npz", **connectivity)
+
+
+# Solution variables of each written zone
+variables = [solution_variables(access.zone(num_zones + index)) for index in zone_index]
+
+
+# Split the Tecplot data of each time step
+for step,time in enumerate(dataset.solution_times):
+
+    # Skip t = 0 and the times which are not selected
+    if step == 0 or not is_selected(time):
+        continue
     
-    
-    if(solver_control.whether_write_internal_boundary()):
-        
-        boundary_index, boundary_name = solver_control.get_internal_boundary()
+    timing.set_step(step)
 
-        for i in range(len(boundary_index)):
+    with access.step():
 
-            boundary_x = dataset.zone(step * num_zones + boundary_index[i]).values("X C").as_numpy_array()
-            boundary_y = dataset.zone(step * num_zones + boundary_index[i]).values("Y C").as_numpy_array()
-            boundary_z = dataset.zone(step * num_zones + boundary_index[i]).values("Z C").as_numpy_array()
+        print("write tecplot data, time = ",time)
 
-            df = pd.DataFrame(np.array([boundary_x, boundary_y, boundary_z]).T, columns = ["X C", "Y C", "Z C"])
+        if static_mesh:
 
-            path =  worksheet_dir + boundary_name[i] + "/"
-            if not os.path.exists(path):
-                os.makedirs(path)
+            # The grid is stored in "mesh", the step only holds its solution
+            for i, (index, name) in enumerate(zip(zone_index, zone_name)):
 
-            if(solver_control.get_write_format() == "h5"):
-        
-                filename = path + boundary_name[i] + "_" + str(step) + ".h5"
-                df.to_hdf(filename, key = "data", mode = "w")
+                path = worksheet_dir + name + "/"
+                if not os.path.exists(path):
+                    os.makedirs(path)
 
-            elif(solver_control.get_write_format() == "csv"):
+                df = access.fetch_frame(step * num_zones + index, variables[i])
+                write_data(df, path + name + "_" + str(step))
 
-                filename = path + boundary_name[i] + "_" + str(step) + ".dat"
-                df.to_csv(filename, index = False, encoding = "utf-8")
+            continue
 
-            else:
-                quit("The format of the stored data is not supported")
+        # Create a list to save each step time's zone data
+        zone_to_save = []
 
+        for i in range(num_zones):
+            zone_to_save.append(access.zone(step * num_zones + i))
 
-    if(solver_control.whether_write_external_boundary()):
-        
-        boundary_index, boundary_name = solver_control.get_external_boundary()
 
-        for i in range(len(boundary_index)):
+        # The flow field data of each time step is saved in the "plt" format
+        # write name : e.g. fluid_0.plt
+        write_name = plt_dir + "fluid_" + str(step) + ".plt"
+        with timing.span("tecplot", zone = "save_tecplot_plt"):
+            tecplot.data.save_tecplot_plt(
+                write_name, 
+                dataset=dataset,              
+                zones=zone_to_save)
+    
+
+        # Write the boundary data and the grid data of each time step
+        print("write fluid data, time = ", time)
 
-            boundary_x = dataset.zone(step * num_zones + boundary_index[i]).values("X C").as_numpy_array()
-            boundary_y = dataset.zone(step * num_zones + boundary_index[i]).values("Y C").as_numpy_array()
-            boundary_z = dataset.zone(step * num_zones + boundary_index[i]).values("Z C").as_numpy_array()
+        for i, (index, name) in enumerate(zip(zone_index, zone_name)):
 
-            df = pd.DataFrame(np.array([boundary_x, boundary_y, boundary_z]).T, columns = ["X C", "Y C", "Z C"])
+            df = access.fetch_frame(step * num_zones + index, coordinates + ["Cell Volume"] + variables[i])
 
-            path =  worksheet_dir + boundary_name[i] + "/"
+            path =  worksheet_dir + name + "/"
             if not os.path.exists(path):
                 os.makedirs(path)
 
-            if(solver_control.get_write_format() == "h5"):
-        
-                filename = path + boundary_name[i] + "_" + str(step) + ".h5"
-                df.to_hdf(filename, key = "data", mode = "w")
-
-            elif(solver_control.get_write_format() == "csv"):
+            write_data(df, path + name + "_" + str(step))
 
-                filename = path + boundary_name[i] + "_" + str(step) + ".dat"
-                df.to_csv(filename, index = False, encoding = "utf-8")
 
-            else:
-                quit("The format of the stored data is not supported")
 
+print("Tecplot calls: ", access.get_calls())
 
+timing.set_step(None)
 
-# Write the time list
+# Write the time list, the steps split by earlier runs are kept
 filename = worksheet_dir + "time.dat"
+
+time_list = {}
+if extend:
+    for step, time in np.loadtxt(filename, ndmin = 2):
+        time_list[int(step)] = time
+
+for step,time in enumerate(dataset.solution_times):
+    if time == 0 or not is_selected(time):
+        continue
+    time_list[step] = time
+
 with open(filename,'w') as f:
-    for step,time in enumerate(dataset.solution_times):
-        if time == 0:
-            continue
-        f.writelines([str(step), "    ", str(time), "\n"])
+    for step in sorted(time_list):
+        f.writelines([str(step), "    ", str(time_list[step]), "\n"])
         
+timing.close()
+
 print("Data split succeeded")
@@ -1,13 +0,0 @@
-import sys
-
-path = sys.path[0] + "/Package/parser"
-sys.path.append(path)
-
-path = sys.path[0] + "/Package/solvercontrol"
-sys.path.append(path)
-
-path = sys.path[0] + "/Package/geometry"
-sys.path.append(path)
-
-path = sys.path[0] + "/Package/induction"
-sys.path.append(path)
\ No newline at end of file
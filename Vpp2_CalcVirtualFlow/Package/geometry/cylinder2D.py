@@ -1,13 +1,15 @@
 from ..parser.inputdatabase import InputDatabase
 import numpy as np
-import Package.induction.induction2D as ind2D
+from ..induction import induction2D as ind2D
 # import Package.induction.induction_numpy as ind2D
 
 class Cylinder2D:
 
-    def __init__(self):
+    def __init__(self, input_db=None):
 
-        input_db = InputDatabase.from_file("input/theoryControlDict")
+        # The theory control database, read from the input folder if not given
+        if input_db is None:
+            input_db = InputDatabase.from_file("input/theoryControlDict")
         self.__input_db = input_db
 
         # The radius of the cylinder
@@ -34,9 +36,9 @@ class Cylinder2D:
 
 class MovingCylinder2D(Cylinder2D):
 
-    def __init__(self, time):
+    def __init__(self, time, input_db=None):
 
-        super(MovingCylinder2D, self).__init__()
+        super(MovingCylinder2D, self).__init__(input_db)
 
         # current time
         self.__time = time
@@ -109,9 +111,9 @@ class MovingCylinder2D(Cylinder2D):
 
 class VirtualMovingCylinder2D(MovingCylinder2D):
 
-    def __init__(self, time):
+    def __init__(self, time, input_db=None):
 
-        super(VirtualMovingCylinder2D, self).__init__(time)
+        super(VirtualMovingCylinder2D, self).__init__(time, input_db)
 
         # Virtual motion 
         input_db = self.get_input_db()
@@ -122,7 +124,7 @@ class VirtualMovingCylinder2D(MovingCylinder2D):
 
 
     # Calculate virtual velocity potential 
-    def get_virPhi(self, x0, y0, z0):
+    def get_virPhi(self, x0, y0, z0, source_point=None):
 
         x = x0 - self.get_current_center()[0]
         y = y0 - self.get_current_center()[1]
@@ -138,8 +140,12 @@ class VirtualMovingCylinder2D(MovingCylinder2D):
 
         elif (self.__virtualmotion == "sourcePoint"):
 
-            collocation_out_x = self.get_input_db()["model"]["sourcePoint"][0]
-            collocation_out_y = self.get_input_db()["model"]["sourcePoint"][1]
+            # The source point of the control file, or a given probe point
+            if source_point is None:
+                source_point = self.get_input_db()["model"]["sourcePoint"]
+
+            collocation_out_x = source_point[0]
+            collocation_out_y = source_point[1]
 
             collocation_out = np.array([collocation_out_x, collocation_out_y])
             collocation_center = self.get_current_center()
@@ -159,7 +165,7 @@ class VirtualMovingCylinder2D(MovingCylinder2D):
         return np.array([phi]).T
 
     # Calculate virtual velocity
-    def get_virU(self, x0, y0, z0):
+    def get_virU(self, x0, y0, z0, source_point=None):
 
         x = x0 - self.get_current_center()[0]
         y = y0 - self.get_current_center()[1]
@@ -178,8 +184,12 @@ class VirtualMovingCylinder2D(MovingCylinder2D):
 
         elif (self.__virtualmotion == "sourcePoint"):
 
-            collocation_out_x = self.get_input_db()["model"]["sourcePoint"][0]
-            collocation_out_y = self.get_input_db()["model"]["sourcePoint"][1]
+            # The source point of the control file, or a given probe point
+            if source_point is None:
+                source_point = self.get_input_db()["model"]["sourcePoint"]
+
+            collocation_out_x = source_point[0]
+            collocation_out_y = source_point[1]
 
             collocation_out = np.array([collocation_out_x, collocation_out_y])
             collocation_center = self.get_current_center()
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+fluid_columns = ["vir_U", "vir_V", "vir_W"]
+boundary_columns = ["acc_x", "acc_y", "acc_z",
+                    "Vb_x", "Vb_y", "Vb_z",
+                    "virU_x", "virU_y", "virU_z",
+                    "virPhi",
+                    "normal_x", "normal_y", "normal_z"]
+
+
+def build_model(geometry, time, input_db=None):
+
+    # Virtual flow of the geometric model at the given time
+    if(geometry == "cylinder2D"):
+
+        from .cylinder2D import VirtualMovingCylinder2D
+        return VirtualMovingCylinder2D(time, input_db)
+
+    elif(geometry == "sphere3D"):
+
+        from .sphere3D import VirtualMovingSphere3D
+        return VirtualMovingSphere3D(time, input_db)
+
+    elif(geometry == "multiBody"):
+
+        from .multibody import VirtualMovingMultiBody
+        return VirtualMovingMultiBody(time, input_db)
+
+    quit("No this model!!!")
+
+
+def fluid_frame(virtualflow, x, y, z):
+
+    return pd.DataFrame(virtualflow.get_virU(x, y, z), columns = fluid_columns)
+
+
+def boundary_frame(virtualflow, x, y, z):
+
+    df_array = np.concatenate((virtualflow.get_acc(x, y, z),
+                               virtualflow.get_Vb(x, y, z),
+                               virtualflow.get_virU(x, y, z),
+                               virtualflow.get_virPhi(x, y, z),
+                               virtualflow.get_normal_vector(x, y, z)), axis=1)
+
+    return pd.DataFrame(df_array, columns = boundary_columns)
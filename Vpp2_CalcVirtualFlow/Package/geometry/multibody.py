@@ -0,0 +1,301 @@
+from ..parser.inputdatabase import InputDatabase
+import numpy as np
+from ..induction import induction2D as ind2D
+from ..induction import induction3D as ind3D
+
+# Arrays of cylinders or spheres, e.g. tandem cylinders:
+#
+#   multiBody {
+#       shape = "cylinder2D"
+#       centers = [(0.0, 0.0), (2.0, 0.0)]
+#       radii = [0.5, 0.5]
+#   }
+#
+# centers and radii may also be included with load(). The virtual flow of
+# the array is the superposition of the flows of the single bodies, with the
+# source of the sourcePoint motion shared by all of them. It is evaluated
+# over (bodies x points) in tiles small enough to stay in the cache.
+
+class MultiBody:
+
+    # Elements of a (bodies x points) tile, 128 kB per float64 array
+    tile_elements = 16384
+
+    def __init__(self, input_db=None):
+
+        # The theory control database, read from the input folder if not given
+        if input_db is None:
+            input_db = InputDatabase.from_file("input/theoryControlDict")
+        self.__input_db = input_db
+
+        # Shape of the bodies, all of them the same
+        assert isinstance(input_db["multiBody"]["shape"], str)
+        self.__shape = input_db["multiBody"]["shape"]
+
+        if(self.__shape == "cylinder2D"):
+            self.__dimension = 2
+        elif(self.__shape == "sphere3D"):
+            self.__dimension = 3
+        else:
+            quit("No this model!!!")
+
+        # A list, or an array included with load()
+        centers = input_db["multiBody"]["centers"]
+        if hasattr(centers, "tolist"):
+            centers = centers.tolist()
+        assert isinstance(centers, list)
+
+        radii = input_db["multiBody"]["radii"]
+        if hasattr(radii, "tolist"):
+            radii = radii.tolist()
+        assert isinstance(radii, list)
+
+        # The central coordinates of the bodies, one row per body
+        self.__center = np.array(centers, dtype = np.float64, ndmin = 2)[:, :self.__dimension]
+        self.__radius = np.array(radii, dtype = np.float64).reshape(-1)
+
+        assert self.__center.shape == (len(self.__radius), self.__dimension)
+        assert len(self.__radius) > 0 and np.all(self.__radius > 0)
+
+
+    def get_shape(self):
+
+        return self.__shape
+
+    def get_dimension(self):
+
+        return self.__dimension
+
+    def get_num_bodies(self):
+
+        return len(self.__radius)
+
+    def get_radius(self):
+
+        return self.__radius
+
+    def get_initial_center(self):
+
+        return self.__center
+
+    def get_input_db(self):
+
+        return self.__input_db
+
+    def tiles(self, n):
+
+        # Row ranges of the points, so that a tile of all the bodies has about
+        # tile_elements elements
+        size = max(1, MultiBody.tile_elements // self.get_num_bodies())
+
+        for start in range(0, n, size):
+            yield slice(start, min(start + size, n))
+
+
+class MovingMultiBody(MultiBody):
+
+    def __init__(self, time, input_db=None):
+
+        super(MovingMultiBody, self).__init__(input_db)
+
+        # current time
+        self.__time = time
+
+        # Motion of the boundaries
+        input_db = self.get_input_db()
+
+        assert isinstance(input_db["model"]["motion"], str)
+        self.__motion = input_db["model"]["motion"]
+
+        if(self.__motion == "stationary"):
+            self.__current_center = self.get_initial_center()
+        else:
+            quit()
+
+
+    def get_current_time(self):
+
+        return self.__time
+
+    def get_motion(self):
+
+        return self.__motion
+
+    def get_current_center(self):
+
+        return self.__current_center
+
+    def points(self, x0, y0, z0, tile):
+
+        # Coordinates of a tile, shape (dimension, 1, points) to broadcast
+        # against the bodies
+        coordinates = (x0, y0, z0)[:self.get_dimension()]
+
+        return np.array([np.asarray(c, dtype = np.float64)[tile] for c in coordinates])[:, None, :]
+
+    # Normal vector of the nearest body surface
+    def get_normal_vector(self, x0, y0, z0):
+
+        n = len(x0)
+        center = self.__current_center.T[:, :, None]
+        R = self.get_radius()
+        re = np.zeros((n, 3))
+
+        for tile in self.tiles(n):
+
+            d = self.points(x0, y0, z0, tile) - center
+            r = np.sqrt(np.sum(d*d, axis = 0))
+
+            nearest = np.argmin(r - R[:, None], axis = 0)
+            columns = np.arange(d.shape[2])
+
+            re[tile, :self.get_dimension()] = (d[:, nearest, columns]/R[nearest]).T
+
+        return re
+
+    # Acceleration of wall motion
+    def get_acc(self, x0, y0, z0):
+
+        if(self.__motion == "stationary"):
+            acc = np.zeros((len(x0), 3))
+        else:
+            quit()
+
+        return acc
+
+    # Velocity of wall motion
+    def get_Vb(self, x0, y0, z0):
+
+        if(self.__motion == "stationary"):
+            Vb = np.zeros((len(x0), 3))
+        else:
+            quit("No this model!!!")
+
+        return Vb
+
+
+class VirtualMovingMultiBody(MovingMultiBody):
+
+    def __init__(self, time, input_db=None):
+
+        super(VirtualMovingMultiBody, self).__init__(time, input_db)
+
+        # Virtual motion, the same for all the bodies
+        input_db = self.get_input_db()
+
+        assert isinstance(input_db["model"]["virtualmotion"], str)
+        self.__virtualmotion = input_db["model"]["virtualmotion"]
+
+        directions = {"virX": 0, "virY": 1, "virZ": 2}
+        if self.__virtualmotion in directions:
+            self.__direction = directions[self.__virtualmotion]
+            if self.__direction >= self.get_dimension():
+                quit("No this model!!!")
+        elif self.__virtualmotion != "sourcePoint":
+            quit("No this model!!!")
+
+        self.__induction = ind2D if self.get_dimension() == 2 else ind3D
+
+
+    def __sources(self, source_point):
+
+        # The source point of the control file, or a given probe point. Each
+        # body adds the image of the source and a sink at its centre
+        if source_point is None:
+            source_point = self.get_input_db()["model"]["sourcePoint"]
+
+        collocation_out = np.array(source_point[:self.get_dimension()], dtype = np.float64)
+        collocation_center = self.get_current_center()
+        R = self.get_radius()
+
+        a = np.sqrt(np.sum((collocation_out - collocation_center)**2, axis = 1))
+        collocation_in = collocation_center + (collocation_out - collocation_center)*(R*R/a/a)[:, None]
+
+        collocation = np.concatenate((collocation_in, collocation_center)).T[:, :, None]
+        sigma = np.concatenate((np.ones(len(R)), - np.ones(len(R))))[:, None]
+
+        return collocation_out, collocation, sigma
+
+    def __velocity_point_sigma(self, collocation, sigma, point):
+
+        # velocity_point_sigma of the induction module summed over the
+        # sources, with the smoothing factor evaluated once per pair
+        PI = 3.1415926536
+        d = 0.001
+
+        delta = point - collocation
+        r2 = np.sum(delta*delta, axis = 0)
+        r = np.sqrt(r2)
+
+        # Only the 2D kernel regularises the sources at the points
+        if self.get_dimension() == 2:
+            close = r < 0.0001
+            r[close] = 1
+            r2[close] = 1
+
+        factor = sigma/(2*PI*r2)*(1-np.exp(-1.0*(r/d)**3))
+
+        return np.einsum("ij,kij->kj", factor, delta)
+
+    # Calculate virtual velocity potential
+    def get_virPhi(self, x0, y0, z0, source_point=None):
+
+        n = len(x0)
+        center = self.get_current_center().T[:, :, None]
+        R = self.get_radius()[:, None]
+        phi = np.zeros(n)
+
+        if (self.__virtualmotion == "sourcePoint"):
+            collocation_out, collocation, sigma = self.__sources(source_point)
+
+        for tile in self.tiles(n):
+
+            point = self.points(x0, y0, z0, tile)
+
+            if (self.__virtualmotion == "sourcePoint"):
+
+                phi[tile] = (self.__induction.phi_point_sigma(collocation_out, 1, point[:, 0, :])
+                             + np.sum(self.__induction.phi_point_sigma(collocation, sigma, point), axis = 0))
+
+            else:
+
+                d = point - center
+                r2 = np.sum(d*d, axis = 0)
+
+                phi[tile] = np.sum(- R*R*d[self.__direction]/r2, axis = 0)
+
+        return np.array([phi]).T
+
+    # Calculate virtual velocity
+    def get_virU(self, x0, y0, z0, source_point=None):
+
+        n = len(x0)
+        center = self.get_current_center().T[:, :, None]
+        R = self.get_radius()[:, None]
+        vel = np.zeros((n, 3))
+
+        if (self.__virtualmotion == "sourcePoint"):
+            collocation_out, collocation, sigma = self.__sources(source_point)
+
+        for tile in self.tiles(n):
+
+            point = self.points(x0, y0, z0, tile)
+
+            if (self.__virtualmotion == "sourcePoint"):
+
+                re_vel = (self.__induction.velocity_point_sigma(collocation_out, 1, point[:, 0, :])
+                          + self.__velocity_point_sigma(collocation, sigma, point))
+
+            else:
+
+                # Doublet of each body: R^2/r^2 (2 d_i d_j/r^2 - delta_ij)
+                d = point - center
+                r2 = np.sum(d*d, axis = 0)
+
+                factor = R*R/r2
+                re_vel = np.einsum("ij,kij->kj", 2*factor*d[self.__direction]/r2, d)
+                re_vel[self.__direction] -= np.sum(factor, axis = 0)
+
+            vel[tile, :self.get_dimension()] = re_vel.T
+
+        return vel
@@ -1,13 +1,15 @@
 from ..parser.inputdatabase import InputDatabase
 import numpy as np
-import Package.induction.induction3D as ind3D
+from ..induction import induction3D as ind3D
 # import Package.induction.induction_numpy as ind2D
 
 class Sphere3D:
 
-    def __init__(self):
+    def __init__(self, input_db=None):
 
-        input_db = InputDatabase.from_file("input/theoryControlDict")
+        # The theory control database, read from the input folder if not given
+        if input_db is None:
+            input_db = InputDatabase.from_file("input/theoryControlDict")
         self.__input_db = input_db
 
         # The radius of the cylinder
@@ -34,9 +36,9 @@ class Sphere3D:
 
 class MovingSphere3D(Sphere3D):
 
-    def __init__(self, time):
+    def __init__(self, time, input_db=None):
 
-        super(MovingSphere3D, self).__init__()
+        super(MovingSphere3D, self).__init__(input_db)
 
         # current time
         self.__time = time
@@ -110,9 +112,9 @@ class MovingSphere3D(Sphere3D):
 
 class VirtualMovingSphere3D(MovingSphere3D):
 
-    def __init__(self, time):
+    def __init__(self, time, input_db=None):
 
-        super(VirtualMovingSphere3D, self).__init__(time)
+        super(VirtualMovingSphere3D, self).__init__(time, input_db)
 
         # Virtual motion 
         input_db = self.get_input_db()
@@ -123,7 +125,7 @@ class VirtualMovingSphere3D(MovingSphere3D):
 
 
     # Calculate virtual velocity potential 
-    def get_virPhi(self, x0, y0, z0):
+    def get_virPhi(self, x0, y0, z0, source_point=None):
 
         x = x0 - self.get_current_center()[0]
         y = y0 - self.get_current_center()[1]
@@ -144,9 +146,13 @@ class VirtualMovingSphere3D(MovingSphere3D):
 
         elif (self.__virtualmotion == "sourcePoint"):
 
-            collocation_out_x = self.get_input_db()["model"]["sourcePoint"][0]
-            collocation_out_y = self.get_input_db()["model"]["sourcePoint"][1]
-            collocation_out_z = self.get_input_db()["model"]["sourcePoint"][2]
+            # The source point of the control file, or a given probe point
+            if source_point is None:
+                source_point = self.get_input_db()["model"]["sourcePoint"]
+
+            collocation_out_x = source_point[0]
+            collocation_out_y = source_point[1]
+            collocation_out_z = source_point[2]
 
             collocation_out = np.array([collocation_out_x, collocation_out_y, collocation_out_z])
             collocation_center = self.get_current_center()
@@ -166,7 +172,7 @@ class VirtualMovingSphere3D(MovingSphere3D):
         return np.array([phi]).T
 
     # Calculate virtual velocity
-    def get_virU(self, x0, y0, z0):
+    def get_virU(self, x0, y0, z0, source_point=None):
 
         x = x0 - self.get_current_center()[0]
         y = y0 - self.get_current_center()[1]
@@ -194,9 +200,13 @@ class VirtualMovingSphere3D(MovingSphere3D):
 
         elif (self.__virtualmotion == "sourcePoint"):
 
-            collocation_out_x = self.get_input_db()["model"]["sourcePoint"][0]
-            collocation_out_y = self.get_input_db()["model"]["sourcePoint"][1]
-            collocation_out_z = self.get_input_db()["model"]["sourcePoint"][2]
+            # The source point of the control file, or a given probe point
+            if source_point is None:
+                source_point = self.get_input_db()["model"]["sourcePoint"]
+
+            collocation_out_x = source_point[0]
+            collocation_out_y = source_point[1]
+            collocation_out_z = source_point[2]
 
             collocation_out = np.array([collocation_out_x, collocation_out_y, collocation_out_z])
             collocation_center = self.get_current_center()
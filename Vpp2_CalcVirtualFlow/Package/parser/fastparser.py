@@ -0,0 +1,344 @@
+"""Recursive-descent parser for input databases
+
+Parses the grammar of newparser/newlexer without PLY: the token rules are
+the same regular expressions in the same order, the grammar rules are
+written out by hand. Nothing is generated at import.
+
+In addition to the PLY grammar, a value can include a binary array file,
+e.g. probes = load("probes.npy") or load("mesh.npz", "outline"). The
+numbers are read by NumPy when the entry is first evaluated, they never pass
+through the tokenizer.
+"""
+
+import re
+from typing import Any, List, Tuple
+
+from .inputdatabase import InputDatabase, Expression, ArrayInclude
+
+# Token rules in the order of the PLY lexer: the function rules as defined,
+# then the string rules by decreasing length of their regular expression
+token_rules = (
+    ("BOOLEAN", r"(?<!\w)(TRUE|FALSE|true|false|True|False)(?!\w)"),
+    ("VARIABLE", r"[a-zA-Z_][\w\d_]*"),
+    ("STRING", r"\"[^\"]*\""),
+    ("INTEGER", r"[-+]?\d+(?!(\.|e|\d))"),
+    ("FLOAT", r"("
+              r"[-+]?(?P<leading>(\d+)?)\.(?(leading)\d*|\d+)(e(-)?\d+)?"
+              r"|"
+              r"[-+]?\d+e(-)?\d+"
+              r")"),
+    ("COMMENT", r"//.*"),
+    ("PLUS", r"\+"),
+    ("TIMES", r"\*"),
+    ("POWER", r"\^"),
+    ("OPEN_PARENTHESIS", r"\("),
+    ("CLOSE_PARENTHESIS", r"\)"),
+    ("OPEN_BRACKET", r"\["),
+    ("CLOSE_BRACKET", r"\]"),
+    ("OPEN_CURLY_BRACKET", r"\{"),
+    ("CLOSE_CURLY_BRACKET", r"\}"),
+    ("EQUALS", r"="),
+    ("MINUS", r"-"),
+    ("DIVIDE", r"/"),
+    ("COMMA", r","),
+    ("COLON", r":"),
+)
+
+# Ignored characters are matched as an unnamed alternative, every other
+# alternative is a named token
+master = re.compile("[ \t\r\n]+|" + "|".join("(?P<{}>{})".format(name, rule)
+                                              for name, rule in token_rules))
+
+# Binary operators: (precedence, operator of the expression), all of them
+# left associative. The unary minus binds tighter than all of them.
+binary_operators = {
+    "PLUS": (1, "+"),
+    "MINUS": (1, "-"),
+    "TIMES": (2, "*"),
+    "DIVIDE": (2, "/"),
+    "POWER": (3, "^"),
+}
+
+keys = ("STRING", "INTEGER", "FLOAT", "BOOLEAN")
+
+
+def tokenize(raw: str) -> List[Tuple[str, Any]]:
+    """Splits the contents of an input file into (type, value) tokens.
+
+    Args:
+        raw: The contents of the input file.
+
+    Raises:
+        TypeError: Invalid string: <rest of the input>.
+    """
+    tokens = []
+    position = 0
+
+    for match in master.finditer(raw):
+        if match.start() != position:
+            break
+        position = match.end()
+
+        kind = match.lastgroup
+        if kind is None:
+            continue
+
+        value = match.group(kind)
+        if kind == "BOOLEAN":
+            value = value.lower() == "true"
+        elif kind == "STRING":
+            value = value[1:-1]
+        elif kind == "INTEGER":
+            value = int(value)
+        elif kind == "FLOAT":
+            value = float(value)
+
+        tokens.append((kind, value))
+
+    if position != len(raw):
+        raise TypeError("Invalid string: {}".format(raw[position:]))
+
+    return tokens
+
+
+class Parser:
+    """Parser of a tokenized input file.
+
+    Attributes:
+        database: The root input database.
+    """
+
+    def __init__(self, tokens: List[Tuple[str, Any]]) -> None:
+        # Token types and values, the types end with an end marker
+        self.kinds = [kind for kind, value in tokens] + ["$end"]
+        self.values = [value for kind, value in tokens]
+        self.position = 0
+        self.database = InputDatabase()
+
+    def peek(self) -> str:
+        return self.kinds[self.position]
+
+    def next(self) -> Any:
+        self.position += 1
+        return self.values[self.position - 1]
+
+    def expect(self, kind: str) -> Any:
+        if self.peek() != kind:
+            self.error()
+        return self.next()
+
+    def error(self) -> None:
+        if self.position < len(self.values):
+            kind, value = self.kinds[self.position], self.values[self.position]
+            raise SyntaxError("Syntax error at {} token: {}".format(kind,
+                                                                    value))
+        raise SyntaxError("Syntax error at end of input")
+
+    def parse(self) -> InputDatabase:
+        """database : contents_root"""
+        for name, value in self.contents("$end"):
+            self.database.add(name, value)
+        return self.database
+
+    def contents(self, end: str) -> List[Tuple[str, Any]]:
+        """contents : contents assign | contents COMMENT | empty"""
+        entries = []
+        while self.peek() != end:
+            if self.peek() == "COMMENT":
+                self.next()
+            elif self.peek() == "VARIABLE":
+                entries.append(self.assign())
+            else:
+                self.error()
+        return entries
+
+    def assign(self) -> Tuple[str, Any]:
+        """assign : VARIABLE EQUALS value | VARIABLE block"""
+        name = self.next()
+
+        if self.peek() == "OPEN_CURLY_BRACKET":
+            return name, self.block()
+
+        self.expect("EQUALS")
+
+        if self.peek() == "OPEN_BRACKET":
+            return name, self.list()
+
+        value = self.item()
+
+        # A bare list: items separated by commas
+        if self.peek() == "COMMA":
+            return name, self.items(value)
+
+        return name, value
+
+    def block(self) -> InputDatabase:
+        """block : OPEN_CURLY_BRACKET contents CLOSE_CURLY_BRACKET"""
+        self.next()
+        value = InputDatabase(root=self.database)
+        for name, entry in self.contents("CLOSE_CURLY_BRACKET"):
+            value.add(name, entry)
+        self.next()
+        return value
+
+    def list(self) -> List[Any]:
+        """list : OPEN_BRACKET [item | items] CLOSE_BRACKET"""
+        self.next()
+
+        if self.peek() == "CLOSE_BRACKET":
+            self.next()
+            return []
+
+        first = self.item()
+        if self.peek() == "COMMA":
+            value = self.items(first)
+        else:
+            value = [first]
+
+        self.expect("CLOSE_BRACKET")
+        return value
+
+    def items(self, first: Any) -> List[Any]:
+        """items : item COMMA items | item COMMA item"""
+        value = [first]
+        while self.peek() == "COMMA":
+            self.next()
+            value.append(self.item())
+        return value
+
+    def item(self) -> Any:
+        """item : expr | tuple | dictionary | BOOLEAN | STRING"""
+        kind = self.peek()
+
+        if kind == "STRING" or kind == "BOOLEAN":
+            return self.next()
+
+        if kind == "OPEN_CURLY_BRACKET":
+            return self.dictionary()
+
+        # A variable is never followed by a parenthesis, except in a call
+        if kind == "VARIABLE" and \
+           self.kinds[self.position + 1] == "OPEN_PARENTHESIS":
+            return self.include()
+
+        if kind == "OPEN_PARENTHESIS":
+            # A tuple, or a parenthesised expression continued by operators
+            self.next()
+            first = self.item()
+
+            if self.peek() == "COMMA":
+                value = tuple(self.items(first))
+                self.expect("CLOSE_PARENTHESIS")
+                return value
+
+            if not self.is_expression(first):
+                self.error()
+
+            self.expect("CLOSE_PARENTHESIS")
+            return self.binary(first, 1)
+
+        return self.expression(1)
+
+    def include(self) -> ArrayInclude:
+        """include : load ( STRING ) | load ( STRING , STRING )"""
+        if self.values[self.position] != "load":
+            self.error()
+        self.next()
+        self.next()
+
+        file = self.expect("STRING")
+        key = None
+        if self.peek() == "COMMA":
+            self.next()
+            key = self.expect("STRING")
+
+        self.expect("CLOSE_PARENTHESIS")
+        return ArrayInclude(file, key)
+
+    @staticmethod
+    def is_expression(value: Any) -> bool:
+        return type(value) in (int, float, Expression)
+
+    def dictionary(self) -> dict:
+        """dictionary : OPEN_CURLY_BRACKET [dictionary_items] CLOSE_CURLY_BRACKET"""
+        self.next()
+        value = dict()
+
+        if self.peek() == "CLOSE_CURLY_BRACKET":
+            self.next()
+            return value
+
+        while True:
+            if self.peek() not in keys:
+                self.error()
+            key = self.next()
+            self.expect("COLON")
+            value[key] = self.item()
+
+            if self.peek() != "COMMA":
+                break
+            self.next()
+
+        self.expect("CLOSE_CURLY_BRACKET")
+        return value
+
+    def expression(self, precedence: int) -> Any:
+        """expr : expr operator expr | MINUS expr | ( expr ) | number | VARIABLE"""
+        return self.binary(self.unary(), precedence)
+
+    def binary(self, left: Any, precedence: int) -> Any:
+        # Precedence climbing, all operators are left associative
+        while self.peek() in binary_operators:
+            level, operator = binary_operators[self.peek()]
+            if level < precedence:
+                break
+            self.next()
+            right = self.expression(level + 1)
+            left = Expression(operator, left, right)
+        return left
+
+    def unary(self) -> Any:
+        kind = self.peek()
+
+        if kind == "MINUS":
+            self.next()
+            return Expression("--", self.unary())
+
+        if kind == "INTEGER" or kind == "FLOAT":
+            return self.next()
+
+        if kind == "VARIABLE":
+            return Expression("var", self.next())
+
+        if kind == "OPEN_PARENTHESIS":
+            self.next()
+            value = self.expression(1)
+            self.expect("CLOSE_PARENTHESIS")
+            return value
+
+        self.error()
+
+
+def parse_string(raw: str) -> InputDatabase:
+    """Parses the contents of an input file.
+
+    Args:
+        raw: The contents of the input file.
+
+    Returns:
+        An input database with the parsed contents.
+    """
+    return Parser(tokenize(raw)).parse()
+
+
+def parse(file) -> InputDatabase:
+    """Parses the input file.
+
+    Args:
+        file: The input file to parse.
+
+    Returns:
+        An input database with the parsed input file.
+    """
+    with open(file, "r") as f:
+        return parse_string(f.read())
@@ -0,0 +1,114 @@
+import os
+import tracemalloc
+
+# Resident and Python-allocated memory of the timing spans, enabled with
+# VPP_MEMORY. Tracing allocations slows the scripts down, it is meant for
+# sizing batch jobs and finding leaks, not for production runs.
+
+
+def rss_bytes():
+
+    # Resident set size of this process, None where /proc is missing
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def max_rss_bytes():
+
+    # High-water mark of the resident set size
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Kilobytes on Linux, bytes on macOS
+    return maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
+
+
+def growth(values, min_steps=5, min_bytes=1024 * 1024):
+
+    # A leak shows as memory which never goes back down from one step to the
+    # next, the first step (imports, caches) is left out
+    values = list(values)[1:]
+    if len(values) < min_steps:
+        return False
+
+    increasing = all(b >= a for a, b in zip(values, values[1:]))
+
+    return increasing and values[-1] - values[0] >= min_bytes
+
+
+class MemoryTracker:
+
+    # Frames kept per allocation, one is enough to name the site
+    frames = 1
+
+    def __init__(self):
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(MemoryTracker.frames)
+
+        # Allocations still alive at the end of the run are compared against
+        # this snapshot
+        self.__baseline = self.snapshot()
+
+    @staticmethod
+    def snapshot():
+
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>")])
+
+    def begin(self, parent=None):
+
+        # The peak of the enclosing span so far is kept before the peak is
+        # reset for the new span
+        current, peak = tracemalloc.get_traced_memory()
+        if parent is not None:
+            parent.note_peak(peak)
+        tracemalloc.reset_peak()
+
+        return current
+
+    def end(self):
+
+        # Traced bytes alive, traced peak since begin() and resident bytes
+        current, peak = tracemalloc.get_traced_memory()
+
+        return current, peak, rss_bytes()
+
+    def top_sites(self, top=20):
+
+        # Sites whose allocations grew the most since the tracker started
+        statistics = self.snapshot().compare_to(self.__baseline, "lineno")
+        statistics = [stat for stat in statistics if stat.size_diff > 0]
+
+        return statistics[:top]
+
+    def report(self, path, steps, top=20):
+
+        # Steps: (pid, step, rss, peak) of the run, in the order of the steps
+        lines = ["Memory of the steps [MB]", "{:>8}{:>8}{:>12}{:>12}".format("pid", "step", "rss", "peak")]
+        for pid, step, rss, peak in steps:
+            lines.append("{:>8}{:>8}{:>12.1f}{:>12.1f}".format(pid, str(step), (rss or 0) / 1024 / 1024,
+                                                             (peak or 0) / 1024 / 1024))
+
+        maxrss = max_rss_bytes()
+        if maxrss is not None:
+            lines += ["", "Peak resident set size of pid {}: {:.1f} MB".format(os.getpid(), maxrss / 1024 / 1024)]
+
+        lines += ["", "Allocation sites grown the most during the run (pid {})".format(os.getpid())]
+        for stat in self.top_sites(top):
+            frame = stat.traceback[0]
+            lines.append("{:>12.1f} kB {:>10} blocks  {}:{}".format(stat.size_diff / 1024, stat.count_diff,
+                                                                   frame.filename, frame.lineno))
+
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
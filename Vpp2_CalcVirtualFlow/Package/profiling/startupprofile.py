@@ -0,0 +1,122 @@
+import builtins
+import importlib.util
+import sys
+import time as clock
+
+# Only the standard library is imported here, the profile has to be installed
+# before the heavy packages are imported
+
+
+class StartupProfile:
+
+    def __init__(self, enabled=False):
+
+        # Times every import statement which loads a new module: "inclusive"
+        # with the modules it imports in turn, "self" without them
+        self.__enabled = enabled
+        self.__start = clock.perf_counter()
+        self.__num_loaded = len(sys.modules)
+        self.__modules = []
+        self.__children = []
+        self.__import = None
+
+        if self.__enabled:
+            self.__install()
+
+    def whether_enabled(self):
+
+        return self.__enabled
+
+    def get_modules(self):
+
+        # (module, inclusive seconds, self seconds) in the order of loading
+        return list(self.__modules)
+
+    def __install(self):
+
+        original = builtins.__import__
+        self.__import = original
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+
+            # Modules already loaded are returned without timing
+            if level == 0 and name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+
+            if level > 0:
+                package = (globals or {}).get("__package__") or ""
+                module = importlib.util.resolve_name("." * level + name, package)
+            else:
+                module = name
+
+            loaded = module in sys.modules
+
+            self.__children.append(0.0)
+            start = clock.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = clock.perf_counter() - start
+                children = self.__children.pop()
+                if not loaded:
+                    self.__modules.append((module, elapsed, elapsed - children))
+                    if self.__children:
+                        self.__children[-1] += elapsed
+                elif self.__children:
+                    # e.g. "from package import module": the modules loaded
+                    # below are timed, the rest stays with the importer
+                    self.__children[-1] += children
+
+        builtins.__import__ = timed_import
+
+    def __uninstall(self):
+
+        if self.__import is not None:
+            builtins.__import__ = self.__import
+            self.__import = None
+
+    def summary(self, top=12):
+
+        # Self time per top-level package, the largest first
+        packages = {}
+        for module, inclusive, own in self.__modules:
+            package = module.split(".")[0]
+            seconds, count = packages.get(package, (0.0, 0))
+            packages[package] = (seconds + own, count + 1)
+
+        rows = sorted(packages.items(), key=lambda item: item[1][0], reverse=True)
+
+        return rows[:top]
+
+    def report(self, label="ready"):
+
+        # Prints the import-time breakdown once, when enabled
+        if not self.__enabled:
+            return
+
+        self.__uninstall()
+        self.__enabled = False
+
+        elapsed = clock.perf_counter() - self.__start
+        imported = sum(own for module, inclusive, own in self.__modules)
+
+        print("Startup profile: {:.3f} s to {}, {:.3f} s importing {} modules "
+              "({} loaded before the profile)".format(elapsed, label, imported, len(self.__modules),
+                                                      self.__num_loaded))
+        print("  {:<24}{:>10}{:>10}".format("package", "self [s]", "modules"))
+        for package, (seconds, count) in self.summary():
+            print("  {:<24}{:>10.3f}{:>10}".format(package, seconds, count))
+
+        slowest = sorted(self.__modules, key=lambda item: item[1], reverse=True)[:8]
+        print("  {:<40}{:>10}".format("slowest imports", "incl. [s]"))
+        for module, inclusive, own in slowest:
+            print("  {:<40}{:>10.3f}".format(module, inclusive))
+
+
+def startup_profile(argv=None):
+
+    # Enabled by "--startup-profile" on the command line, the flag is read
+    # before argparse runs as the imports precede it
+    argv = sys.argv if argv is None else argv
+
+    return StartupProfile("--startup-profile" in argv)
@@ -51,8 +51,11 @@ class SplitControl:
     def get_internal_boundary(self):
 
         if(self.__write_in):
-            assert isinstance(self.__input_db["boundary"]["internal"]["index"], list)
+            # A list, or an array included with load()
             index = self.__input_db["boundary"]["internal"]["index"]
+            if hasattr(index, "tolist"):
+                index = index.tolist()
+            assert isinstance(index, list)
 
             assert isinstance(self.__input_db["boundary"]["internal"]["name"], list)
             name = self.__input_db["boundary"]["internal"]["name"]
@@ -67,8 +70,11 @@ class SplitControl:
     def get_external_boundary(self):
 
         if(self.__write_out):
-            assert isinstance(self.__input_db["boundary"]["external"]["index"], list)
+            # A list, or an array included with load()
             index = self.__input_db["boundary"]["external"]["index"]
+            if hasattr(index, "tolist"):
+                index = index.tolist()
+            assert isinstance(index, list)
 
             assert isinstance(self.__input_db["boundary"]["external"]["name"], list)
             name = self.__input_db["boundary"]["external"]["name"]
@@ -1,9 +1,15 @@
-import Package
+# The startup profile times the imports below, it is installed first
+from Package.profiling.startupprofile import startup_profile
+startup = startup_profile()
+
 from Package.solvercontrol.splitcontrol import SplitControl
 from Package.solvercontrol.theorycontrol import TheoryControl
+from Package.geometry.model import build_model, fluid_frame, boundary_frame, fluid_columns, boundary_columns
+from Package.profiling.timing import get_timing
 
 import numpy as np
 import pandas as pd
+import argparse
 import os
 
 def write_fluid_data():
@@ -13,61 +19,197 @@ def write_fluid_data():
         os.makedirs(file_dir)
     
 
-    df = pd.DataFrame(virtualflow.get_virU(fluid_x, fluid_y, fluid_z), columns = ["vir_U", "vir_V", "vir_W"])
+    with timing.span("compute", zone = "fluid") as span:
+        df = fluid_frame(virtualflow, fluid_x, fluid_y, fluid_z)
+        span.count(rows = len(df))
+
+    with timing.span("write", zone = "fluid") as span:
+
+        if(split_control.get_write_format() == "h5"):
+
+            filename = worksheet_dir + "fluid/fluid_" + str(int(step)) + ".h5"
+            df.to_hdf(filename, key = "data", mode = "w")
+
+        elif(split_control.get_write_format() == "csv"):
+
+            filename = worksheet_dir + "fluid/fluid_" + str(int(step)) + ".dat"
+            df.to_csv(filename, index = False, encoding = "utf-8")
+
+        else:
+            quit("The format of the stored data is not supported")
+
+        span.count(df)
+
+def write_boundary_data():
+
+    # The boundaries of all the bodies are evaluated in one pass over the
+    # model, each is then written to its own folder
+    with timing.span("compute", zone = boundary_zone) as span:
+        df = boundary_frame(virtualflow, boundary_x, boundary_y, boundary_z)
+        span.count(rows = len(df))
+
+    for boundary_name, start, stop in zip(boundary_names, boundary_offsets[:-1], boundary_offsets[1:]):
+
+        file_dir = worksheet_dir + boundary_name
+        if not os.path.exists(file_dir):
+            os.makedirs(file_dir)
+
+        with timing.span("write", zone = boundary_name) as span:
+
+            boundary_df = df.iloc[start:stop].reset_index(drop = True)
+
+            if(split_control.get_write_format() == "h5"):
+
+                filename = worksheet_dir + boundary_name + "/" + boundary_name + "_" + str(int(step)) + ".h5"
+                boundary_df.to_hdf(filename, key = "data", mode = "w")
+
+            elif(split_control.get_write_format() == "csv"):
+
+                filename = worksheet_dir + boundary_name + "/" + boundary_name + "_" + str(int(step)) + ".dat"
+                boundary_df.to_csv(filename, index = False, encoding = "utf-8")
+
+            else:
+                quit("The format of the stored data is not supported") 
+
+            span.count(boundary_df)
+
+
+def read_coordinates(filename):
+
+    with timing.span("read", zone = os.path.basename(filename)) as span:
+
+        if(split_control.get_write_format() == "h5"):
+
+            df = pd.read_hdf(filename + ".h5", key='data')
+
+        elif(split_control.get_write_format() == "csv"):
+
+            df = pd.read_csv(filename + ".dat")
+
+        else:
+            quit(("The format of the stored data is not supported"))
+
+        span.count(df)
+
+    return df['X C'].values, df['Y C'].values, df['Z C'].values
+
+
+def read_boundary_coordinates(filenames):
+
+    # Cell centres of the boundaries one after the other, with the row at
+    # which each boundary starts
+    coordinates = [read_coordinates(filename) for filename in filenames]
+    offsets = np.cumsum([0] + [len(x) for x, y, z in coordinates])
+
+    x, y, z = (np.concatenate(values) for values in zip(*coordinates))
+
+    return x, y, z, offsets
+
+
+def read_coordinate_chunks(filename, chunk_rows):
+
+    # Cell centres of a zone in row ranges of chunk_rows, the zone is never
+    # held in memory as a whole
     if(split_control.get_write_format() == "h5"):
 
-        filename = worksheet_dir + "fluid/fluid_" + str(int(step)) + ".h5"
-        df.to_hdf(filename, key = "data", mode = "w")
+        start = 0
+        while True:
+            with timing.span("read", zone = os.path.basename(filename)) as span:
+                df = pd.read_hdf(filename + ".h5", key = "data", start = start, stop = start + chunk_rows)
+                span.count(df)
+
+            if len(df) == 0:
+                return
+
+            yield df['X C'].values, df['Y C'].values, df['Z C'].values
+
+            if len(df) < chunk_rows:
+                return
+            start += chunk_rows
 
     elif(split_control.get_write_format() == "csv"):
 
-        filename = worksheet_dir + "fluid/fluid_" + str(int(step)) + ".dat"
-        df.to_csv(filename, index = False, encoding = "utf-8")
+        chunks = pd.read_csv(filename + ".dat", usecols = ['X C', 'Y C', 'Z C'], chunksize = chunk_rows)
+        while True:
+            with timing.span("read", zone = os.path.basename(filename)) as span:
+                df = next(chunks, None)
+                span.count(df)
 
-    else:
-        quit("The format of the stored data is not supported")
+            if df is None:
+                return
 
-def write_boundary_data():
+            yield df['X C'].values, df['Y C'].values, df['Z C'].values
 
-    file_dir = worksheet_dir + boundary_name
-    if not os.path.exists(file_dir):
-        os.makedirs(file_dir)
+    else:
+        quit(("The format of the stored data is not supported"))
 
-    df_array = np.concatenate((virtualflow.get_acc(boundary_x, boundary_y, boundary_z),
-                               virtualflow.get_Vb(boundary_x, boundary_y, boundary_z),
-                               virtualflow.get_virU(boundary_x, boundary_y, boundary_z),
-                               virtualflow.get_virPhi(boundary_x, boundary_y, boundary_z),
-                               virtualflow.get_normal_vector(boundary_x, boundary_y, boundary_z)), axis=1)
-    
-    df = pd.DataFrame(df_array, 
-                      columns = ["acc_x", "acc_y", "acc_z", 
-                                 "Vb_x", "Vb_y", "Vb_z",
-                                 "virU_x", "virU_y", "virU_z",
-                                 "virPhi",
-                                 "normal_x", "normal_y", "normal_z"])
 
+def append_data(df, filename, first):
 
+    # The first chunk creates the file, the others are appended in place. An
+    # h5 file is written as a table, as only tables can be appended to
     if(split_control.get_write_format() == "h5"):
 
-        filename = worksheet_dir + boundary_name + "/" + boundary_name + "_" + str(int(step)) + ".h5"
-        df.to_hdf(filename, key = "data", mode = "w")
+        df.to_hdf(filename + ".h5", key = "data", mode = "w" if first else "a", format = "table",
+                  append = not first)
 
     elif(split_control.get_write_format() == "csv"):
 
-        filename = worksheet_dir + boundary_name + "/" + boundary_name + "_" + str(int(step)) + ".dat"
-        df.to_csv(filename, index = False, encoding = "utf-8")
+        df.to_csv(filename + ".dat", mode = "w" if first else "a", header = first, index = False,
+                  encoding = "utf-8")
 
     else:
-        quit("The format of the stored data is not supported") 
+        quit("The format of the stored data is not supported")
+
+
+def stream_data(read_name, write_name, frame, columns, zone):
+
+    # Virtual flow of a zone chunk by chunk: the memory is bounded by the
+    # chunk size whatever the size of the mesh
+    directory = os.path.dirname(write_name)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    first = True
+    for x, y, z in read_coordinate_chunks(read_name, chunk_rows):
+
+        with timing.span("compute", zone = zone) as span:
+            df = frame(virtualflow, x, y, z)
+            span.count(rows = len(df))
+
+        with timing.span("write", zone = zone) as span:
+            append_data(df, write_name, first)
+            span.count(df)
+
+        first = False
+
+    # An empty zone still gets its (empty) table
+    if first:
+        append_data(pd.DataFrame(columns = columns, dtype = float), write_name, True)
 
 
 # The main function
 if __name__ == "__main__":
 
+    # Watch mode computes the newly split time steps only
+    parser = argparse.ArgumentParser(description = "Calculate the virtual flow of the split time steps")
+    parser.add_argument("--times", default = None,
+                        help = "comma separated solution times to calculate")
+    parser.add_argument("--startup-profile", action = "store_true",
+                        help = "print the import time of the packages once the control files are read")
+    parser.add_argument("--chunk-rows", type = int, default = None,
+                        help = "stream the mesh in chunks of this many rows (also 'chunk_rows' in theoryControlDict)")
+    args = parser.parse_args()
+
     # Read control file: split control, theory control
     split_control = SplitControl("input/splitControlDict")
     theory_control = TheoryControl("input/theoryControlDict")
 
+    startup.report()
+
+    # Read, compute and write spans of each step (VPP_TIMING)
+    timing = get_timing()
+
     # Create a folder named "Worksheet2", which is used to store virtual flow data
     worksheet_dir = split_control.get_write_path() + "_DataDir/Worksheet2/"
     if not os.path.exists(worksheet_dir):
@@ -79,63 +221,80 @@ if __name__ == "__main__":
     
 
     # Read the list of the time
-    solution_time = np.loadtxt(read_dir + "time.dat")
+    solution_time = np.loadtxt(read_dir + "time.dat", ndmin = 2)
 
     step_list = solution_time[:,0]
     time_list = solution_time[:,1]
 
-    for step, time in zip(step_list, time_list):
+    if args.times is not None:
+        selected_times = np.array([float(value) for value in args.times.split(",")])
+        selected = np.isclose(time_list[:, None], selected_times[None, :], rtol = 1e-9, atol = 0).any(axis = 1)
+        step_list = step_list[selected]
+        time_list = time_list[selected]
 
-        # Build geometric model
-        if(theory_control.get_geometry() == "cylinder2D"):
+    # Every internal boundary is a body of the multi-body geometry, the
+    # single-body geometries use the first one
+    boundary_names = split_control.get_internal_boundary()[1]
+    if theory_control.get_geometry() != "multiBody":
+        boundary_names = boundary_names[:1]
+    boundary_zone = boundary_names[0] if len(boundary_names) == 1 else "bodies"
 
-            from Package.geometry.cylinder2D import VirtualMovingCylinder2D
-            virtualflow = VirtualMovingCylinder2D(time)
+    # Meshes larger than the memory are streamed in row ranges
+    chunk_rows = args.chunk_rows if args.chunk_rows is not None else theory_control.get_chunk_rows()
 
-        elif(theory_control.get_geometry() == "sphere3D"):
+    # A static mesh is written once by the split step, read it only once
+    static_mesh = os.path.exists(read_dir + "mesh/")
 
-            from Package.geometry.sphere3D import *
-            virtualflow = VirtualMovingSphere3D()
+    if static_mesh and chunk_rows is None:
 
-        else:
-            quit()
+        fluid_x, fluid_y, fluid_z = read_coordinates(read_dir + "mesh/fluid")
+        boundary_x, boundary_y, boundary_z, boundary_offsets = read_boundary_coordinates(
+            [read_dir + "mesh/" + boundary_name for boundary_name in boundary_names])
 
-        # Read flow field coordinates
-        if(split_control.get_write_format() == "h5"):
+    for step, time in zip(step_list, time_list):
 
-            filename = read_dir + "fluid/fluid_" + str(int(step)) + ".h5"
-            df = pd.read_hdf(filename, key='data')
+        timing.set_step(step)
 
-        elif(split_control.get_write_format() == "csv"):
+        # Build geometric model
+        with timing.span("compute", zone = "model"):
+            virtualflow = build_model(theory_control.get_geometry(), time, theory_control.get_input_db())
 
-            filename = read_dir + "fluid/fluid_" + str(int(step)) + ".dat"
-            df = pd.read_csv(filename)
-        
-        fluid_x = df['X C'].values
-        fluid_y = df['Y C'].values
-        fluid_z = df['Z C'].values
-   
-        write_fluid_data()
+        if chunk_rows is not None:
 
-        boundary_name = split_control.get_internal_boundary()[1][0]
+            # The coordinates are read again for each step, chunk by chunk
+            if static_mesh:
+                fluid_source = read_dir + "mesh/fluid"
+            else:
+                fluid_source = read_dir + "fluid/fluid_" + str(int(step))
 
-        if(split_control.get_write_format() == "h5"):
+            stream_data(fluid_source, worksheet_dir + "fluid/fluid_" + str(int(step)),
+                        fluid_frame, fluid_columns, "fluid")
 
-            filename = read_dir + boundary_name + "/" + boundary_name + "_" + str(int(step)) + ".h5"
-            df = pd.read_hdf(filename, key='data')
+            for boundary_name in boundary_names:
 
-        elif(split_control.get_write_format() == "csv"):
+                if static_mesh:
+                    boundary_source = read_dir + "mesh/" + boundary_name
+                else:
+                    boundary_source = read_dir + boundary_name + "/" + boundary_name + "_" + str(int(step))
 
-            filename = read_dir + boundary_name + "/" + boundary_name + "_" + str(int(step)) + ".dat"
-            df = pd.read_csv(filename)
+                stream_data(boundary_source, worksheet_dir + boundary_name + "/" + boundary_name + "_" + str(int(step)),
+                            boundary_frame, boundary_columns, boundary_name)
+            continue
 
-        else:
-            quit(("The format of the stored data is not supported"))
+        # Read flow field coordinates
+        if not static_mesh:
 
-        boundary_x = df['X C'].values
-        boundary_y = df['Y C'].values
-        boundary_z = df['Z C'].values
+            fluid_x, fluid_y, fluid_z = read_coordinates(read_dir + "fluid/fluid_" + str(int(step)))
+   
+        write_fluid_data()
+
+        if not static_mesh:
+
+            boundary_x, boundary_y, boundary_z, boundary_offsets = read_boundary_coordinates(
+                [read_dir + boundary_name + "/" + boundary_name + "_" + str(int(step)) for boundary_name in boundary_names])
 
         write_boundary_data()
 
+    timing.close()
+
     print("Virtual flow solved successfully")
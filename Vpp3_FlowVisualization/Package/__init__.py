@@ -1,10 +0,0 @@
-import sys
-
-path = sys.path[0] + "/Package/parser"
-sys.path.append(path)
-
-path = sys.path[0] + "/Package/vector"
-sys.path.append(path)
-
-path = sys.path[0] + "/Package/solvercontrol"
-sys.path.append(path)
\ No newline at end of file
@@ -0,0 +1,34 @@
+import numpy as np
+
+class Integrator:
+
+    def __init__(self, weights):
+
+        # Cell volumes of a volume zone or face areas of a boundary zone
+        self.__weights = np.ascontiguousarray(weights, dtype=np.float64)
+
+    def get_weights(self):
+
+        return self.__weights
+
+    def get_measure(self):
+
+        return float(self.__weights.sum())
+
+    # Integral of a cell-centred variable as one weighted sum
+    def integrate(self, values):
+
+        return float(np.dot(self.__weights, values))
+
+    # Integrals of several variables, one per column of "values"
+    def integrate_all(self, values):
+
+        return np.dot(self.__weights, values)
+
+
+def relative_difference(native, reference):
+
+    if reference == 0:
+        return abs(native)
+
+    return abs(native - reference) / abs(reference)
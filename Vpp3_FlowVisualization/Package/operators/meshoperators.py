@@ -0,0 +1,250 @@
+from ..vector.vector import VectorField, TensorField, cross
+
+import numpy as np
+import os
+
+# scipy is imported by the functions using it, it is only needed when the
+# gradient operators are built or read
+
+class MeshOperators:
+
+    def __init__(self, gradient):
+
+        # Least-squares gradient of a cell-centred variable: one (3N, N) CSR
+        # matrix, rows [jN, (j+1)N) hold the derivative along x_j
+        import scipy.sparse as sp
+        self.__gradient = sp.csr_matrix(gradient)
+        self.__num_cells = self.__gradient.shape[1]
+
+    @staticmethod
+    def build(centres, indptr, indices):
+
+        # centres: (N, 3) cell centres, (indptr, indices): CSR list of the
+        # neighbouring cells of each cell
+        import scipy.sparse as sp
+        centres = np.asarray(centres, dtype=np.float64)
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        num_cells = len(centres)
+        degree = np.diff(indptr)
+        rows = np.repeat(np.arange(num_cells), degree)
+
+        # One entry per (cell, neighbour) pair, the memory grows with the
+        # number of pairs only
+        dx = centres[indices] - centres[rows]
+        distance2 = np.einsum("kd,kd->k", dx, dx)
+
+        weight = np.zeros_like(distance2)
+        mask = distance2 > 0
+        weight[mask] = 1.0 / distance2[mask]
+
+        # Weighted least squares: g_i = (D^T W D)^-1 D^T W (phi_j - phi_i),
+        # the 3x3 normal equations of all the cells in one batched solve
+        wdx = dx * weight[:, None]
+        normal_matrix = np.zeros((num_cells, 3, 3))
+        for d in range(3):
+            for e in range(d, 3):
+                normal_matrix[:, d, e] = np.bincount(rows, wdx[:, d] * dx[:, e], minlength=num_cells)
+                normal_matrix[:, e, d] = normal_matrix[:, d, e]
+
+        # A direction without any extent (planar 2D meshes, cells without
+        # neighbours) gets a zero derivative, as the pseudo-inverse gave
+        diagonal = np.einsum("ndd->nd", normal_matrix).copy()
+        scale = diagonal.max(axis=1, keepdims=True)
+        scale[scale <= 0] = 1.0
+        flat = diagonal <= 1e-12 * scale
+        regular_matrix = normal_matrix + np.where(flat, scale, 0.0)[:, :, None] * np.eye(3)
+
+        # The few cells whose neighbours still span less than three
+        # directions (e.g. a plane not aligned with the axes) keep the
+        # pseudo-inverse
+        diagonal = np.einsum("ndd->nd", regular_matrix)
+        singular = np.abs(np.linalg.det(regular_matrix)) <= 1e-10 * np.prod(diagonal, axis=1)
+
+        # Inverse of each normal matrix, solved for the identity in one
+        # batched call
+        inverse = np.empty_like(normal_matrix)
+        inverse[~singular] = np.linalg.solve(regular_matrix[~singular],
+                                             np.broadcast_to(np.eye(3), regular_matrix[~singular].shape))
+        inverse[~singular[:, None] & flat] = 0.0
+        inverse[singular] = np.linalg.pinv(normal_matrix[singular])
+
+        # Coefficients of the neighbours: (3, pairs)
+        coefficient = np.zeros((3, len(indices)))
+        for d in range(3):
+            for e in range(3):
+                coefficient[d] += inverse[:, d, e][rows] * wdx[:, e]
+
+        # CSR rows d * N + i: the cell itself first, then its neighbours
+        row_length = degree + 1
+        block_indptr = np.concatenate(([0], np.cumsum(row_length)))
+        block_nnz = block_indptr[-1]
+
+        diagonal_slots = block_indptr[:-1]
+        neighbour_slots = np.arange(len(indices)) + rows + 1
+
+        gradient_indptr = np.concatenate([d * block_nnz + block_indptr[:-1] for d in range(3)] + [[3 * block_nnz]])
+        gradient_indices = np.empty(3 * block_nnz, dtype=np.int64)
+        gradient_data = np.empty(3 * block_nnz)
+
+        for d in range(3):
+            offset = d * block_nnz
+            gradient_indices[offset + diagonal_slots] = np.arange(num_cells)
+            gradient_indices[offset + neighbour_slots] = indices
+            gradient_data[offset + diagonal_slots] = - np.bincount(rows, coefficient[d], minlength=num_cells)
+            gradient_data[offset + neighbour_slots] = coefficient[d]
+
+        gradient = sp.csr_matrix((gradient_data, gradient_indices, gradient_indptr),
+                                 shape=(3 * num_cells, num_cells))
+
+        return MeshOperators(gradient)
+
+    @staticmethod
+    def from_file(path):
+
+        import scipy.sparse as sp
+        return MeshOperators(sp.load_npz(path))
+
+    def to_file(self, path):
+
+        # Write to a temporary file first, see ProbeIndex.to_file
+        import scipy.sparse as sp
+        temp_path = path + "." + str(os.getpid()) + ".npz"
+        sp.save_npz(temp_path, self.__gradient)
+        os.replace(temp_path, path)
+
+    def get_num_cells(self):
+
+        return self.__num_cells
+
+    # The neighbours of each cell are the columns of its gradient rows
+    def get_adjacency(self):
+
+        indptr = self.__gradient.indptr[:self.__num_cells + 1]
+
+        return indptr, self.__gradient.indices[:indptr[-1]]
+
+    # Gradient of a scalar, shape (3, N)
+    def gradient(self, phi):
+
+        return (self.__gradient @ phi).reshape(3, self.__num_cells)
+
+    # Gradient of a vector field, data[i, j] = d(u_i)/d(x_j), one SpMM
+    def gradient_tensor(self, A):
+
+        product = self.__gradient @ A.data.T
+
+        return TensorField(product.reshape(3, self.__num_cells, 3).transpose(2, 0, 1))
+
+    def curl(self, A, out=None):
+
+        return self.gradient_tensor(A).curl(out)
+
+
+def adjacency_from_nodemap(nodemap):
+
+    # Cells sharing at least one node are neighbours
+    import scipy.sparse as sp
+    nodemap = np.asarray(nodemap, dtype=np.int64)
+    num_cells, nodes_per_cell = nodemap.shape
+
+    incidence = sp.csr_matrix((np.ones(nodemap.size), (np.repeat(np.arange(num_cells), nodes_per_cell),
+                                                       nodemap.ravel())))
+    adjacency = (incidence @ incidence.T).tocsr()
+    adjacency.setdiag(0)
+    adjacency.eliminate_zeros()
+    adjacency.sort_indices()
+
+    return adjacency.indptr, adjacency.indices
+
+
+class WallGradient:
+
+    def __init__(self, operators, centres, wall_centres, normals, rows):
+
+        # Derivative along the wall normal at the wall faces, one-sided: the
+        # quadratic in the wall distance through the wall value, the adjacent
+        # cell (rows) and its neighbour furthest along the normal,
+        #   du/dn = c0 u_wall + c1 u_1 + c2 u_2
+        centres = np.asarray(centres, dtype=np.float64)
+        wall_centres = np.asarray(wall_centres, dtype=np.float64)
+        normals = np.asarray(normals, dtype=np.float64)
+        rows = np.asarray(rows, dtype=np.int64)
+
+        indptr, indices = operators.get_adjacency()
+        degree = np.diff(indptr)[rows]
+        face = np.repeat(np.arange(len(rows)), degree)
+        start = np.repeat(indptr[rows] - np.cumsum(degree) + degree, degree)
+        candidate = indices[start + np.arange(len(face))].astype(np.int64)
+
+        # The neighbour whose direction is closest to the normal, the cell
+        # itself (first column) is left out
+        offset = centres[candidate] - centres[rows][face]
+        length = np.sqrt(np.einsum("kd,kd->k", offset, offset))
+        alignment = np.full(len(candidate), -np.inf)
+        mask = length > 0
+        alignment[mask] = np.einsum("kd,kd->k", offset[mask], normals[face][mask]) / length[mask]
+
+        order = np.lexsort((alignment, face))
+        last = np.append(face[order][1:] != face[order][:-1], True)
+        outer = rows.copy()
+        outer[face[order][last]] = candidate[order][last]
+
+        d1 = np.einsum("kd,kd->k", centres[rows] - wall_centres, normals)
+        d2 = np.einsum("kd,kd->k", centres[outer] - wall_centres, normals)
+
+        # A face without a neighbour further out falls back to the first
+        # order difference
+        quadratic = d2 > d1
+        self.__c1 = 1.0 / d1
+        self.__c2 = np.zeros(len(rows))
+        self.__c1[quadratic] = d2[quadratic] / (d1[quadratic] * (d2[quadratic] - d1[quadratic]))
+        self.__c2[quadratic] = - d1[quadratic] / (d2[quadratic] * (d2[quadratic] - d1[quadratic]))
+        self.__c0 = - (self.__c1 + self.__c2)
+
+        self.__rows = rows
+        self.__outer = outer
+        self.__normals = VectorField(normals.T)
+
+    # Normal derivative of a vector field, wall: its value at the faces
+    def normal_derivative(self, A, wall):
+
+        return VectorField(self.__c0 * wall.data + self.__c1 * A.data[:, self.__rows]
+                           + self.__c2 * A.data[:, self.__outer])
+
+    # Curl at the wall, where the velocity only varies along the normal
+    def curl(self, A, wall):
+
+        return cross(self.__normals, self.normal_derivative(A, wall))
+
+
+def load_connectivity(connectivity):
+
+    # connectivity: the nodemap ("nodemap") and node coordinates ("nodes") of
+    # the cells, or the .npz file holding them, None when it is not written
+    if isinstance(connectivity, str):
+        if not os.path.exists(connectivity):
+            return None
+        with np.load(connectivity) as data:
+            return {name: data[name] for name in data.files}
+
+    return connectivity
+
+
+def load_mesh_operators(path, centres, connectivity):
+
+    # Build the operators once per mesh and keep them next to the mesh data
+    if path is not None and os.path.exists(path):
+        return MeshOperators.from_file(path)
+
+    connectivity = load_connectivity(connectivity)
+    if connectivity is None:
+        quit("The native vorticity needs the cell connectivity of the fluid zone!!!")
+
+    indptr, indices = adjacency_from_nodemap(connectivity["nodemap"])
+    operators = MeshOperators.build(centres, indptr, indices)
+
+    if path is not None:
+        operators.to_file(path)
+
+    return operators
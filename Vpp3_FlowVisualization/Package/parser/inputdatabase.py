@@ -2,25 +2,149 @@
 
 January 2017, C.J. Voesenek
 """
+from array import array
 from collections import OrderedDict
-import copy
+from contextlib import contextmanager
+import gc
+import hashlib
+import os
+import pickle
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 __author__ = "C.J. Voesenek"
 __maintainer__ = "C.J. Voesenek"
 __email__ = "cees.voesenek@wur.nl"
 
+# Version of the parsed representation, part of the on-disk cache names
+CACHE_VERSION = 3
+
+# Parsed files by absolute path: (content hash, database)
+_parse_cache = {}  # type: Dict[str, Tuple[str, InputDatabase]]
+
+# Directory of the on-disk parse cache, None to keep it in process only
+_cache_dir = os.environ.get("VPP_PARSE_CACHE")  # type: Optional[str]
+
+
+def set_cache_dir(path: Optional[str]) -> None:
+    """Sets the directory of the on-disk parse cache.
+
+    Args:
+        path: Directory to store parsed databases in, or None to disable the
+            on-disk cache.
+    """
+    global _cache_dir
+    _cache_dir = path
+
+
+def clear_cache() -> None:
+    """Clears the in-process parse cache."""
+    _parse_cache.clear()
+
+
+@contextmanager
+def _gc_paused():
+    """Pauses the cyclic garbage collector while a large database is built.
+
+    The collector would otherwise traverse the growing database on every
+    full collection, which makes building it superlinear.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class NumericArray:
+    """A numeric list stored as a typed array
+
+    Lists of numbers, or of equal-length tuples of numbers, of a single type
+    are stored as an array of machine integers or doubles instead of boxed
+    Python objects. The database returns them as lists again.
+
+    Attributes:
+        data: The numbers, tuples are stored one after the other.
+        width: The length of the tuples, 0 for a list of numbers.
+    """
+
+    # Array type codes of the numeric types
+    typecodes = {int: "q", float: "d"}
+
+    def __init__(self, data: array, width: int = 0) -> None:
+        self.data = data  # type: array
+        self.width = width  # type: int
+
+    @staticmethod
+    def pack(value: Any) -> Optional["NumericArray"]:
+        """Packs a list into a numeric array.
+
+        Args:
+            value: The value to pack.
+
+        Returns:
+            The numeric array, or None if the value is not a non-empty list
+            of numbers or equal-length tuples of numbers of a single type.
+        """
+        if type(value) is not list or not value:
+            return None
+
+        if type(value[0]) is tuple:
+            width = len(value[0])
+            if width == 0 or any(type(item) is not tuple or len(item) != width
+                                 for item in value):
+                return None
+            numbers = [number for item in value for number in item]
+        else:
+            width = 0
+            numbers = value
+
+        kind = type(numbers[0])
+        if kind not in NumericArray.typecodes or \
+           any(type(number) is not kind for number in numbers):
+            return None
+
+        try:
+            return NumericArray(array(NumericArray.typecodes[kind], numbers),
+                                width)
+        except OverflowError:
+            # Integers beyond 64 bits stay a list
+            return None
+
+    def copy(self) -> "NumericArray":
+        """Returns a copy with its own array."""
+        return NumericArray(self.data[:], self.width)
+
+    def tolist(self) -> List[Any]:
+        """Returns the values as a list of numbers or tuples."""
+        values = self.data.tolist()
+        if self.width == 0:
+            return values
+        return list(zip(*[iter(values)] * self.width))
+
+    def __len__(self) -> int:
+        if self.width == 0:
+            return len(self.data)
+        return len(self.data) // self.width
+
+    def __repr__(self) -> str:
+        return "NumericArray({})".format(self.tolist())
+
 
 class InputDatabase:
     """An input database
 
     This class represents an input database with variables. The input
     database can be defined recursively, i.e., variables can have an
-    InputDatabase as a value.
+    InputDatabase as a value. Variables of nested databases can be accessed
+    with a dotted path, e.g. db["boundary.internal.index"].
 
     Attributes:
         root: the root input database, this is specified if the input
             database is nested in another input database
+        directory: the directory of the file the database was read from,
+            array includes are relative to it
     """
 
     def __init__(self, root=None) -> None:
@@ -34,11 +158,37 @@ class InputDatabase:
         if root is None:
             root = self
         self.root = root  # type: Optional[InputDatabase]
+        self.directory = None  # type: Optional[str]
+        self._reset_cache()
+
+    def _reset_cache(self) -> None:
+        """Empties the evaluation cache of this database."""
+        # Evaluated entries: name -> (value, whether it holds no containers)
+        self._cache = {}  # type: Dict[str, Tuple[Any, bool]]
+        # Entries whose evaluation read a name of this database (also names
+        # which were looked up here but not found)
+        self._dependents = {}  # type: Dict[str, set]
+        # Entries being evaluated, only used on the root database
+        self._evaluating = []  # type: List[Tuple[InputDatabase, str]]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Copies and pickles hold the contents, not the evaluation cache
+        state = self.__dict__.copy()
+        for name in ("_cache", "_dependents", "_evaluating"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset_cache()
 
     def clear(self) -> None:
         """Clears the input database."""
+        for name in list(self._contents) + list(self._dependents):
+            self._invalidate(name)
         self._contents = OrderedDict()
         self.root = self
+        self._reset_cache()
 
     def copy(self) -> "InputDatabase":
         """Creates a deep copy of the current input database.
@@ -46,10 +196,38 @@ class InputDatabase:
         This is a completely new instance of the database with identical
         contents.
         """
-        new = copy.deepcopy(self)
-        new.set_root(new)
+        with _gc_paused():
+            new = self._copy(None)
+        new.directory = self.root.directory
         return new
 
+    def _copy(self, root: Optional["InputDatabase"]) -> "InputDatabase":
+        """Copies this database and its sub-databases in one pass."""
+        new = InputDatabase(root=root)
+        for name, value in self._contents.items():
+            if type(value) is InputDatabase:
+                new._contents[name] = value._copy(new.root)
+            else:
+                new._contents[name] = InputDatabase._copy_value(value)
+        return new
+
+    @staticmethod
+    def _copy_value(value: Any) -> Any:
+        """Copies the containers of a value.
+
+        Expressions and array includes are never modified after parsing, they
+        are shared.
+        """
+        if type(value) is NumericArray:
+            return value.copy()
+        if type(value) is list or type(value) is tuple:
+            val = [InputDatabase._copy_value(item) for item in value]
+            return val if type(value) is list else tuple(val)
+        if type(value) is dict:
+            return {key: InputDatabase._copy_value(value[key])
+                    for key in value}
+        return value
+
     def add(self, name: str, value: Any) -> None:
         """Adds a variable to the database.
 
@@ -64,9 +242,9 @@ class InputDatabase:
             raise ValueError("Variable \"{}\" already "
                              "exists in this database.".format(name))
 
-        self._contents[name] = value
-        if type(value) is InputDatabase:
-            value.set_root(self.root)
+        # A new name can shadow the same name of the root database
+        self._invalidate(name)
+        self._store(name, value)
 
     def remove(self, name: str) -> None:
         """Removes a variable from the database.
@@ -78,25 +256,137 @@ class InputDatabase:
             ValueError: Variable "<name>" does not exist in this database.
         """
         if name not in self._contents:
-            raise ValueError("Variable \"{}\" does not exist "
-                             "in this database".format(name))
+            database, entry = self._resolve(name)
+            return database.remove(entry)
 
+        self._invalidate(name)
         del self._contents[name]
 
     def get(self, name: str) -> Any:
         """Retrieves a variable from the database.
 
+        The evaluated value is cached until the variable, or a variable its
+        expressions reference, is changed. Containers are returned as new
+        objects, so callers may modify them. Included arrays are read once
+        and returned read-only.
+
         Args:
-            name: Name of the variable to retrieve.
+            name: Name of the variable to retrieve, or a dotted path to a
+                variable of a nested database.
 
         Raises:
             ValueError: Variable "<name>" does not exist in this database.
+            ValueError: Circular reference: <name> -> ... -> <name>.
         """
         if name not in self._contents:
+            database, entry = self._resolve(name)
+            return database.get(entry)
+
+        if name in self._cache:
+            value, flat = self._cache[name]
+            return InputDatabase._fresh(value, flat)
+
+        evaluating = self.root._evaluating
+        for database, entry in evaluating:
+            if database is self and entry == name:
+                chain = [entry for database, entry in evaluating]
+                start = chain.index(name)
+                raise ValueError("Circular reference: {}".format(
+                    " -> ".join(chain[start:] + [name])))
+
+        evaluating.append((self, name))
+        try:
+            value = Expression.evaluate_all(self._contents[name], self)
+        finally:
+            evaluating.pop()
+
+        flat = InputDatabase._is_flat(value)
+        self._cache[name] = (value, flat)
+
+        return InputDatabase._fresh(value, flat)
+
+    def _resolve(self, path: str) -> Tuple["InputDatabase", str]:
+        """Finds the database holding the variable of a dotted path.
+
+        Raises:
+            ValueError: Variable "<path>" does not exist in this database.
+        """
+        found = self._find(path)
+        if found is None:
             raise ValueError("Variable \"{}\" does not exist "
-                             "in this database".format(name))
+                             "in this database".format(path))
+        return found
+
+    def _find(self, path: str) -> Optional[Tuple["InputDatabase", str]]:
+        """Returns the database and name of a dotted path, None if missing."""
+        if path in self._contents:
+            return self, path
+        if "." not in path:
+            return None
+
+        # Variable names contain no dots, the path is split unambiguously
+        database = self
+        *blocks, name = path.split(".")
+        for block in blocks:
+            database = database._contents.get(block)
+            if type(database) is not InputDatabase:
+                return None
+
+        if name not in database._contents:
+            return None
+        return database, name
+
+    def _reference(self, name: str) -> Any:
+        """Resolves a variable referenced by an expression in this database.
+
+        The name is looked up in this database, then in the root database.
+        The entry being evaluated is recorded as a dependent of both, a later
+        definition in this database shadows the root.
+        """
+        self._add_dependent(name)
+        if name in self._contents:
+            return self.get(name)
 
-        return Expression.evaluate_all(self._contents[name], self)
+        self.root._add_dependent(name)
+        return self.root.get(name)
+
+    def _add_dependent(self, name: str) -> None:
+        """Records the entry being evaluated as a dependent of name."""
+        evaluating = self.root._evaluating
+        if evaluating:
+            self._dependents.setdefault(name, set()).add(evaluating[-1])
+
+    def _invalidate(self, name: str) -> None:
+        """Drops the cached value of name and of all entries depending on it."""
+        self._cache.pop(name, None)
+        for database, entry in self._dependents.pop(name, ()):
+            database._invalidate(entry)
+
+    @staticmethod
+    def _is_flat(value: Any) -> bool:
+        """Whether a value holds no nested containers."""
+        if type(value) is list or type(value) is tuple:
+            return all(type(item) in (int, float, str, bool)
+                       for item in value)
+        return type(value) is not dict
+
+    @staticmethod
+    def _fresh(value: Any, flat: bool) -> Any:
+        """Returns a cached value with new containers."""
+        if type(value) is NumericArray:
+            return value.tolist()
+        if type(value) is list:
+            if flat:
+                return list(value)
+            return [InputDatabase._fresh(item, False) for item in value]
+        if type(value) is tuple:
+            if flat:
+                return value
+            return tuple(InputDatabase._fresh(item, False) for item in value)
+        if type(value) is dict:
+            return {key: InputDatabase._fresh(value[key], False)
+                    for key in value}
+        return value
 
     def set(self, name: str, value: Any) -> None:
         """Sets an existing variable from the database.
@@ -109,19 +399,28 @@ class InputDatabase:
             ValueError: Variable "<name>" does not exist in this database.
         """
         if name not in self._contents:
-            raise ValueError("Variable \"{}\" does not exist "
-                             "in this database".format(name))
+            database, entry = self._resolve(name)
+            return database.set(entry, value)
 
-        self._contents[name] = value
+        self._invalidate(name)
+        self._store(name, value)
+
+    def _store(self, name: str, value: Any) -> None:
+        """Stores a value, numeric lists are packed into arrays."""
         if type(value) is InputDatabase:
-            value.root.set_root(self.root)
+            value.set_root(self.root)
+        elif type(value) is list:
+            packed = NumericArray.pack(value)
+            if packed is not None:
+                value = packed
+        self._contents[name] = value
 
     def set_root(self, root: "InputDatabase") -> None:
         """Sets the roots of this database and all its sub-databases."""
 
         self.root = root
         for entry in self._contents:
-            if type(entry) is InputDatabase:
+            if type(self._contents[entry]) is InputDatabase:
                 # Recursively set the root database.
                 self._contents[entry].set_root(self.root)
 
@@ -142,44 +441,42 @@ class InputDatabase:
             evaluate_expressions: Whether to evaluate expressions, or return
                 them as strings.
         """
-        val = ""
-        for entry in self._contents:
-            for i in range(num_tab):
-                val += "\t"
-
-            if type(self._contents[entry]) is InputDatabase:
-                val += entry + " {\n"
-                val += self._contents[entry].to_string(num_tab=num_tab + 1,
-                                                       evaluate_expressions=
-                                                       evaluate_expressions)
-                for i in range(num_tab):
-                    val += "\t"
-                val += "}\n"
-            else:
-                if evaluate_expressions:
-                    cur = self.get(entry)
-                    if type(cur) is str:
-                        val += "{} = \"{}\"\n".format(entry, cur)
-                    elif type(cur) is bool:
-                        val += "{} = {}\n".format(entry, str(cur).upper())
-                    elif type(cur) is list:
-                        all_tuple = True
-                        for item in cur:
-                            if type(item) is not tuple:
-                                all_tuple = False
-                                break
-                        if all_tuple:
-                            val += "{} = [{}]\n".format(entry, str(cur)[1:-1])
-                        else:
-                            val += "{} = {}\n".format(entry, str(cur)[1:-1])
+        lines = []  # type: List[str]
+        self._to_lines(lines, num_tab, evaluate_expressions)
+        return "".join(lines)
+
+    def _to_lines(self, lines: List[str], num_tab: int,
+                  evaluate_expressions: bool) -> None:
+        """Appends the lines of this database and its sub-databases."""
+        tabs = "\t" * num_tab
+        for entry, value in self._contents.items():
+            if type(value) is InputDatabase:
+                lines.append(tabs + entry + " {\n")
+                value._to_lines(lines, num_tab + 1, evaluate_expressions)
+                lines.append(tabs + "}\n")
+            elif ArrayInclude.includes(value):
+                # Included arrays are not read to be written
+                lines.append("{}{} = {}\n".format(tabs, entry,
+                                                  self._get_string(entry)))
+            elif evaluate_expressions:
+                cur = self.get(entry)
+                if type(cur) is str:
+                    val = "\"{}\"".format(cur)
+                elif type(cur) is bool:
+                    val = str(cur).upper()
+                elif type(cur) is list:
+                    if all(type(item) is tuple for item in cur):
+                        val = "[{}]".format(str(cur)[1:-1])
                     else:
-                        # Anything else can just be cast to a string and
-                        # output immediately.
-                        val += "{} = {}\n".format(entry, cur)
+                        val = str(cur)[1:-1]
                 else:
-                    val += "{} = {}\n".format(entry, self._get_string(entry))
-
-        return val
+                    # Anything else can just be cast to a string and
+                    # output immediately.
+                    val = str(cur)
+                lines.append("{}{} = {}\n".format(tabs, entry, val))
+            else:
+                lines.append("{}{} = {}\n".format(tabs, entry,
+                                                  self._get_string(entry)))
 
     def to_file(self, file: str, evaluate_expressions=False) -> None:
         """Writes the input database to a file.
@@ -194,7 +491,7 @@ class InputDatabase:
             f.write(str_db)
 
     def __contains__(self, item: str) -> bool:
-        return item in self._contents
+        return self._find(item) is not None
 
     def __str__(self) -> str:
         return self.to_string()
@@ -224,20 +521,106 @@ class InputDatabase:
         return Expression.to_string_all(self._contents[name])
 
     @staticmethod
-    def from_file(file: str) -> "InputDatabase":
+    def from_file(file: str, cache: bool = True) -> "InputDatabase":
         """Reads an input database from a file.
 
+        Parsed files are cached by path and content hash, in process and, if
+        a cache directory is set, on disk. The file is read and hashed on
+        every call, a file rewritten within the resolution of its
+        modification time (or to the same size) is never taken for the
+        cached one. Each call returns a copy, so callers can modify it.
+
         Args:
             file: The file to read the input database from.
+            cache: Whether to use the parse cache.
 
         Returns:
             The input database described in the file.
         """
         # Import here to prevent recursive import problems - we also import
-        # this module in the parse module.
-        from .newparser import parse
+        # this module in the parse module. The recursive-descent parser
+        # builds no PLY tables, newparser is kept as its reference.
+        from .fastparser import parse, parse_string
+
+        if not cache:
+            with _gc_paused():
+                database = parse(file)
+            database.directory = os.path.dirname(os.path.abspath(file))
+            return database
+
+        path = os.path.abspath(file)
+
+        with open(path, "r") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+        # An unchanged file keeps its parsed database
+        entry = _parse_cache.get(path)
+        if entry is not None and entry[0] == digest:
+            database = entry[1]
+        else:
+            with _gc_paused():
+                database = InputDatabase._read_cache(digest)
+                if database is None:
+                    database = parse_string(raw)
+                    InputDatabase._write_cache(digest, database)
+
+        _parse_cache[path] = (digest, database)
+
+        return InputDatabase._located(database, path)
+
+    @staticmethod
+    def _located(database: "InputDatabase", path: str) -> "InputDatabase":
+        """Returns a copy of a cached database read from path.
+
+        Files with the same contents share a parsed database, the directory
+        of the file is set on the copy.
+        """
+        database = database.copy()
+        database.directory = os.path.dirname(path)
+        return database
+
+    @staticmethod
+    def _cache_file(digest: str) -> Optional[str]:
+        """Returns the on-disk cache file of a content hash, if enabled."""
+        if _cache_dir is None:
+            return None
 
-        return parse(file)
+        return os.path.join(_cache_dir,
+                            "{}.v{}.pkl".format(digest, CACHE_VERSION))
+
+    @staticmethod
+    def _read_cache(digest: str) -> Optional["InputDatabase"]:
+        """Reads a parsed database from the on-disk cache."""
+        filename = InputDatabase._cache_file(digest)
+        if filename is None or not os.path.exists(filename):
+            return None
+
+        try:
+            with open(filename, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # A damaged cache file is parsed again
+            return None
+
+    @staticmethod
+    def _write_cache(digest: str, database: "InputDatabase") -> None:
+        """Writes a parsed database to the on-disk cache."""
+        filename = InputDatabase._cache_file(digest)
+        if filename is None:
+            return
+
+        # Written under a temporary name, concurrent workers never read a
+        # partial file
+        try:
+            os.makedirs(_cache_dir, exist_ok=True)
+            tmp = "{}.{}.tmp".format(filename, os.getpid())
+            with open(tmp, "wb") as f:
+                pickle.dump(database, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, filename)
+        except OSError:
+            # The cache is an optimisation, a read-only directory is skipped
+            pass
 
 
 class Expression:
@@ -300,10 +683,7 @@ class Expression:
         elif self.operator == "--":
             return -a
         elif self.operator == "var":
-            if a in database:
-                return database.get(a)
-            else:
-                return database.root.get(a)
+            return database._reference(a)
 
     @staticmethod
     def evaluate_all(expr: Any, database: InputDatabase) -> Any:
@@ -326,6 +706,8 @@ class Expression:
         """
         if type(expr) is Expression:
             return expr.evaluate(database)
+        if type(expr) is ArrayInclude:
+            return expr.load(database.root.directory)
         if type(expr) is list or type(expr) is tuple:
             val = []
             for entry in expr:
@@ -351,30 +733,18 @@ class Expression:
         Returns:
             The numerical result of the expression.
         """
-        if type(expr) is Expression:
+        if type(expr) is Expression or type(expr) is ArrayInclude:
             return str(expr)
+        if type(expr) is NumericArray:
+            expr = expr.tolist()
         if type(expr) is list or type(expr) is tuple:
-            all_tuple = True
-            for item in expr:
-                if type(item) is not tuple:
-                    all_tuple = False
-                    break
-            val = ""
-            if all_tuple:
-                val += "["
-            elif type(expr) is tuple:
-                val += "("
-
-            for entry in expr:
-                val += str(Expression.to_string_all(entry)) + ", "
-            val = val[:-2]
-
-            if all_tuple:
-                val += "]"
-            elif type(expr) is tuple:
-                val += ")"
-
-            return val
+            # Lists keep their brackets, a list of one item is read back as
+            # a list
+            val = ", ".join([Expression.to_string_all(entry)
+                             for entry in expr])
+            if type(expr) is tuple:
+                return "(" + val + ")"
+            return "[" + val + "]"
         elif type(expr) is str:
             return "\"" + expr + "\""
         elif type(expr) is bool:
@@ -414,3 +784,112 @@ class Expression:
             return "-{}".format(str(self.a))
         else:
             return "{} {} {}".format(self.operator, str(self.a), str(self.b))
+
+
+class ArrayInclude:
+    """A numeric array included from a binary file
+
+    Written as load("file") in an input file. The supported files are .npy,
+    .npz and .h5 (PyTables arrays, or tables written by pandas). The array is
+    only read when the entry is evaluated, a large .npy file is memory-mapped.
+
+    Attributes:
+        file: Path of the array file, relative to the input file.
+        key: Name of the array in an .npz or .h5 file, optional for a single
+            array in an .npz file and "data" for an .h5 file by default.
+    """
+
+    # .npy files of at least this size are memory-mapped instead of read
+    mmap_bytes = 64 * 1024 * 1024
+
+    def __init__(self, file: str, key: Optional[str] = None) -> None:
+        """Initialises an array include.
+
+        Args:
+            file: Path of the array file, relative to the input file.
+            key: Name of the array in the file.
+        """
+        self.file = file  # type: str
+        self.key = key  # type: Optional[str]
+
+    @staticmethod
+    def includes(value: Any) -> bool:
+        """Whether a value, or an item of a list or tuple, is an include."""
+        if type(value) is list or type(value) is tuple:
+            return any(type(item) is ArrayInclude for item in value)
+        return type(value) is ArrayInclude
+
+    def path(self, directory: Optional[str]) -> str:
+        """Returns the path of the array file.
+
+        Args:
+            directory: Directory of the input file, None for the working
+                directory.
+        """
+        if directory is None or os.path.isabs(self.file):
+            return self.file
+        return os.path.join(directory, self.file)
+
+    def load(self, directory: Optional[str]) -> Any:
+        """Reads the array.
+
+        Args:
+            directory: Directory of the input file, None for the working
+                directory.
+
+        Returns:
+            The array as a read-only NumPy array.
+
+        Raises:
+            ValueError: Unsupported array file: <file>.
+            ValueError: Array file <file> holds several arrays, give a key.
+        """
+        # NumPy is only needed when an array is included
+        import numpy as np
+
+        path = self.path(directory)
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension == ".npy":
+            mmap_mode = None
+            if os.path.getsize(path) >= ArrayInclude.mmap_bytes:
+                mmap_mode = "r"
+            array = np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+        elif extension == ".npz":
+            with np.load(path, allow_pickle=False) as archive:
+                key = self.key
+                if key is None:
+                    if len(archive.files) != 1:
+                        raise ValueError("Array file {} holds several "
+                                         "arrays, give a key.".format(path))
+                    key = archive.files[0]
+                array = archive[key]
+        elif extension in (".h5", ".hdf5"):
+            array = ArrayInclude._read_hdf(path, self.key or "data")
+        else:
+            raise ValueError("Unsupported array file: {}".format(path))
+
+        # The array is cached by the database and shared by its readers
+        array.flags.writeable = False
+        return array
+
+    @staticmethod
+    def _read_hdf(path: str, key: str) -> Any:
+        """Reads an array, or a table written by pandas, from an HDF5 file."""
+        import tables
+
+        with tables.open_file(path, "r") as f:
+            node = f.get_node("/" + key)
+            if isinstance(node, tables.Array):
+                return node.read()
+
+        import pandas as pd
+        return pd.read_hdf(path, key=key).to_numpy()
+
+    def __str__(self) -> str:
+        if self.key is None:
+            return "load(\"{}\")".format(self.file)
+        return "load(\"{}\", \"{}\")".format(self.file, self.key)
+
+    def __repr__(self) -> str:
+        return str(self)
@@ -5,7 +5,7 @@ January 2017, C.J. Voesenek
 
 import ply.yacc as yacc
 
-import newlexer 
+from . import newlexer
 from .inputdatabase import InputDatabase, Expression
 
 __author__ = "C.J. Voesenek"
@@ -224,10 +224,21 @@ def parse(file) -> InputDatabase:
     Returns:
         An input database with the parsed input file.
     """
+    with open(file, "r") as f:
+        return parse_string(f.read())
+
+
+def parse_string(raw: str) -> InputDatabase:
+    """Parses the contents of an input file.
+
+    Args:
+        raw: The contents of the input file.
+
+    Returns:
+        An input database with the parsed contents.
+    """
     global database
     database = InputDatabase()
-    with open(file, "r") as f:
-        raw = f.read()
-        result = parser.parse(raw)
-        parser.restart()
-        return result
+    result = parser.parse(raw)
+    parser.restart()
+    return result
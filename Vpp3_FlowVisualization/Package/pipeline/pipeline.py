@@ -0,0 +1,206 @@
+from ..virtualpower.virtualpower import VirtualPower, write_data
+from ..virtualflow.virtualflow import load_stage_package, stage_dir, stage_name
+from ..tecplotio.tecplotaccess import TecplotAccess
+from ..profiling.timing import get_timing
+
+import importlib
+import numpy as np
+import pandas as pd
+import os
+import threading
+
+# Variables describing the grid, the other cell-centred variables are the
+# solution of the step (as in the split step)
+mesh_variables = ["X", "Y", "Z", "X C", "Y C", "Z C", "Element UserID", "Cell Volume"]
+coordinates = ["X C", "Y C", "Z C"]
+
+
+class Pipeline:
+
+    def __init__(self, input_dir="input/", checkpoint=None):
+
+        # The control files are read once, the mesh is handed over in memory
+        self.__virtual_power = VirtualPower(input_dir, read_mesh=False)
+
+        self.__split_control = self.__virtual_power.get_split_control()
+        self.__theory_control = self.__virtual_power.get_theory_control()
+        self.__visualization_control = self.__virtual_power.get_visualization_control()
+
+        self.__checkpoint = checkpoint
+        if self.__checkpoint is None:
+            self.__checkpoint = self.__visualization_control.whether_checkpoint()
+
+        self.__num_zones = self.__split_control.get_num_zones()
+        index, name = self.__split_control.get_internal_boundary()
+        self.__boundary_index = index[0]
+        self.__boundary_name = name[0]
+
+        # Geometric models of the virtual flow step
+        load_stage_package(stage_dir, stage_name)
+        self.__model = importlib.import_module(stage_name + ".geometry.model")
+
+        self.__write_dir = self.__split_control.get_write_path() + "_DataDir/"
+        self.__access = None
+        self.__mesh_centres = None
+
+        # The integrate stage may run in several threads: the mesh is only
+        # swapped while no step integrates on the current one
+        self.__mesh_condition = threading.Condition()
+        self.__integrating = 0
+        self.__fluid_variables = None
+        self.__boundary_variables = None
+        self.__connectivity = None
+        self.__source_id = None
+
+    def get_virtual_power(self):
+
+        return self.__virtual_power
+
+    def whether_checkpoint(self):
+
+        return self.__checkpoint
+
+    def load_case(self, tecplot):
+
+        # Read openfoam case (controlDcit file) and its cell volumes
+        with get_timing().span("tecplot", zone = "load_openfoam"):
+            dataset = tecplot.data.load_openfoam(
+                self.__split_control.get_case_path(),
+                frame=None,
+                append=False,
+                boundary_zone_construction=None,
+                assign_strand_ids=True,
+                add_zones_to_existing_strands=True,
+                initial_plot_type=tecplot.constant.PlotType.Automatic,
+                initial_plot_first_zone_only=False)
+
+        with get_timing().span("tecplot", zone = "CFDAnalyzer4"):
+            tecplot.macro.execute_extended_command('CFDAnalyzer4', '''
+                Calculate Function='CELLVOLUME'
+                Normalization='None'
+                ValueLocation='CellCentered'
+                CalculateOnDemand='F'
+                UseMorePointsForFEGradientCalculations='F'
+            ''')
+
+        self.__access = TecplotAccess(tecplot, dataset)
+
+        # Steps and times of the solution, t = 0 is skipped
+        return [(step, time) for step, time in enumerate(dataset.solution_times) if step > 0]
+
+    def get_access(self):
+
+        return self.__access
+
+    def __solution_variables(self, index):
+
+        # Cell-centred variables which are not part of the mesh
+        zone = self.__access.zone(self.__num_zones + index)
+        location = zone.values(coordinates[0]).location
+
+        names = []
+        for variable in self.__access.get_dataset().variables():
+            if variable.name in mesh_variables:
+                continue
+            if zone.values(variable.name).location == location:
+                names.append(variable.name)
+
+        return coordinates + ["Cell Volume"] + names
+
+    def split(self, step):
+
+        # Flow tables of the fluid zone and the internal boundary
+        if self.__fluid_variables is None:
+            self.__fluid_variables = self.__solution_variables(0)
+            self.__boundary_variables = self.__solution_variables(self.__boundary_index)
+
+            # The connectivity of the cells does not change with the step: it
+            # locates the source point, and gives the operators of the native
+            # vorticity. The Tecplot probe of the source point is taken here,
+            # in the scheduling thread, in case no candidate cell contains it
+            self.__connectivity = self.__access.connectivity(step * self.__num_zones)
+
+            cell = self.__access.probe(step * self.__num_zones, self.__theory_control.get_source_point())
+            if cell is not None:
+                self.__source_id = cell + 1
+
+        fluid_data = self.__access.fetch_frame(step * self.__num_zones, self.__fluid_variables)
+        boundary_data = self.__access.fetch_frame(step * self.__num_zones + self.__boundary_index,
+                                                  self.__boundary_variables)
+
+        return fluid_data, boundary_data
+
+    def virtual_flow(self, time, fluid_data, boundary_data):
+
+        with get_timing().span("compute", zone = "virtualflow") as span:
+
+            virtualflow = self.__model.build_model(self.__theory_control.get_geometry(), time,
+                                                   self.__theory_control.get_input_db())
+
+            fluid_virtual = self.__model.fluid_frame(virtualflow, *fluid_data[coordinates].values.T)
+            boundary_virtual = self.__model.boundary_frame(virtualflow, *boundary_data[coordinates].values.T)
+
+            span.count(rows = len(fluid_virtual) + len(boundary_virtual))
+
+        return fluid_virtual, boundary_virtual
+
+    def integrate(self, step, time, fluid_data, boundary_data, fluid_virtual, boundary_virtual):
+
+        # The mesh (integration weights, probe index) is only rebuilt when
+        # the cell centres change
+        centres = fluid_data[coordinates].values
+        with self.__mesh_condition:
+            while self.__mesh_centres is None or not np.array_equal(centres, self.__mesh_centres):
+                if self.__integrating == 0:
+                    self.__virtual_power.set_mesh(fluid_data, boundary_data, connectivity = self.__connectivity,
+                                                  source_id = self.__source_id)
+                    self.__mesh_centres = centres
+                else:
+                    self.__mesh_condition.wait()
+            self.__integrating += 1
+
+        try:
+
+            if self.__checkpoint:
+                self.write_checkpoint(step, fluid_data, boundary_data, fluid_virtual, boundary_virtual)
+
+            return self.__virtual_power.evaluate_data(time, fluid_data, boundary_data,
+                                                      fluid_virtual, boundary_virtual)
+
+        finally:
+
+            with self.__mesh_condition:
+                self.__integrating -= 1
+                self.__mesh_condition.notify_all()
+
+    def run(self, step, time):
+
+        fluid_data, boundary_data = self.split(step)
+        fluid_virtual, boundary_virtual = self.virtual_flow(time, fluid_data, boundary_data)
+
+        return self.integrate(step, time, fluid_data, boundary_data, fluid_virtual, boundary_virtual)
+
+    def write_checkpoint(self, step, fluid_data, boundary_data, fluid_virtual, boundary_virtual):
+
+        # The worksheets of the separate stages, the stages can be rerun on them
+        write_format = self.__split_control.get_write_format()
+        step_name = "_" + str(int(step))
+
+        tables = [("Worksheet/fluid/fluid", fluid_data),
+                  ("Worksheet/" + self.__boundary_name + "/" + self.__boundary_name, boundary_data),
+                  ("Worksheet2/fluid/fluid", fluid_virtual),
+                  ("Worksheet2/" + self.__boundary_name + "/" + self.__boundary_name, boundary_virtual)]
+
+        for name, df in tables:
+            filename = self.__write_dir + name + step_name
+            directory = os.path.dirname(filename)
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            write_data(filename, df, write_format)
+
+    def write_time_list(self, steps):
+
+        filename = self.__write_dir + "Worksheet/time.dat"
+        with open(filename, 'w') as f:
+            for step, time in steps:
+                f.writelines([str(step), "    ", str(time), "\n"])
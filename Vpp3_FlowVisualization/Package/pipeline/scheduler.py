@@ -0,0 +1,226 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+import numpy as np
+import pandas as pd
+import json
+import time as clock
+
+
+def payload_bytes(payload):
+
+    # Memory held by the tables and arrays of a step
+    if isinstance(payload, pd.DataFrame):
+        return int(payload.memory_usage(index = False).sum())
+
+    if isinstance(payload, (pd.Series, np.ndarray)):
+        return int(payload.nbytes)
+
+    if isinstance(payload, (tuple, list)):
+        return sum(payload_bytes(item) for item in payload)
+
+    return 0
+
+
+class Stage:
+
+    def __init__(self, name, function, limit=1, inline=False):
+
+        # function(item, payload) -> payload of the next stage. An inline
+        # stage runs in the scheduling thread (e.g. the Tecplot session),
+        # the others in a pool of "limit" threads.
+        self.__name = name
+        self.__function = function
+        self.__limit = max(1, limit)
+        self.__inline = inline
+
+    def get_name(self):
+
+        return self.__name
+
+    def get_function(self):
+
+        return self.__function
+
+    def get_limit(self):
+
+        return 1 if self.__inline else self.__limit
+
+    def whether_inline(self):
+
+        return self.__inline
+
+
+class StepScheduler:
+
+    def __init__(self, stages, memory_limit=None, log_path=None, ordered=True):
+
+        # The steps flow through the stages one task per (stage, step): step
+        # k can be integrated while step k+1 is in a later stage. New steps
+        # only enter while the payloads in flight plus the largest payload
+        # seen so far fit in "memory_limit" bytes.
+        self.__stages = list(stages)
+        self.__memory_limit = memory_limit
+        self.__log_path = log_path
+        self.__ordered = ordered
+
+        self.__log = []
+        self.__held = 0
+        self.__peak = 0
+
+        if self.__log_path is not None:
+            open(self.__log_path, "w").close()
+
+    def get_log(self):
+
+        return self.__log
+
+    def get_peak_bytes(self):
+
+        return self.__peak
+
+    def __record(self, stage, item, start, end, size):
+
+        entry = {"stage": stage.get_name(), "step": int(item[0]), "time": float(item[1]),
+                 "start": start - self.__start, "end": end - self.__start,
+                 "seconds": end - start, "bytes": size, "held": self.__held}
+        self.__log.append(entry)
+
+        if self.__log_path is not None:
+            with open(self.__log_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def __admit(self, in_flight, estimate):
+
+        # Backpressure: a step always enters an empty pipeline
+        if self.__memory_limit is None or in_flight == 0:
+            return True
+
+        return self.__held + estimate <= self.__memory_limit
+
+    def run(self, items):
+
+        # Yields (item, result of the last stage), in the order of the items
+        # when "ordered"
+        self.__start = clock.perf_counter()
+
+        stages = self.__stages
+        last = len(stages) - 1
+
+        pending = deque(enumerate(items))
+        ready = [deque() for stage in stages]
+        running = [0 for stage in stages]
+        sizes = {}
+        estimate = 0
+
+        executors = [None if stage.whether_inline() else ThreadPoolExecutor(max_workers = stage.get_limit())
+                     for stage in stages]
+        futures = {}
+
+        finished = {}
+        next_index = 0
+
+        def complete(i, index, item, payload, start):
+
+            nonlocal estimate
+
+            end = clock.perf_counter()
+
+            # The payload replaces the one of the previous stage
+            size = payload_bytes(payload) if i < last else 0
+            self.__held += size - sizes.get(index, 0)
+            self.__peak = max(self.__peak, self.__held)
+            sizes[index] = size
+
+            # Largest payload of a step so far, the admission estimate
+            estimate = max(estimate, size)
+
+            self.__record(stages[i], item, start, end, size)
+
+            if i < last:
+                ready[i + 1].append((index, item, payload))
+            else:
+                del sizes[index]
+                finished[index] = (item, payload)
+
+        try:
+
+            def collect(done):
+
+                for future in done:
+                    i, index, item, start = futures.pop(future)
+                    running[i] -= 1
+                    complete(i, index, item, future.result(), start)
+
+            def results():
+
+                # Results of the last stage
+                nonlocal next_index
+
+                if self.__ordered:
+                    while next_index in finished:
+                        yield finished.pop(next_index)
+                        next_index += 1
+                else:
+                    for index in list(finished):
+                        yield finished.pop(index)
+
+            while pending or futures or any(ready):
+
+                # Finished tasks are handed on as soon as they are seen, not
+                # only once no new step can enter
+                if futures:
+                    done, not_done = wait(list(futures), timeout = 0)
+                    collect(done)
+                    yield from results()
+
+                # Later stages first, they release memory and give results
+                for i in range(last, 0, -1):
+                    while ready[i] and running[i] < stages[i].get_limit():
+                        index, item, payload = ready[i].popleft()
+                        if stages[i].whether_inline():
+                            start = clock.perf_counter()
+                            complete(i, index, item, stages[i].get_function()(item, payload), start)
+                        else:
+                            running[i] += 1
+                            future = executors[i].submit(stages[i].get_function(), item, payload)
+                            futures[future] = (i, index, item, clock.perf_counter())
+
+                # A new step enters the first stage
+                if pending and running[0] < stages[0].get_limit() and self.__admit(len(sizes), estimate):
+
+                    index, item = pending.popleft()
+                    sizes[index] = 0
+
+                    if stages[0].whether_inline():
+                        start = clock.perf_counter()
+                        complete(0, index, item, stages[0].get_function()(item, None), start)
+                    else:
+                        running[0] += 1
+                        future = executors[0].submit(stages[0].get_function(), item, None)
+                        futures[future] = (0, index, item, clock.perf_counter())
+
+                elif futures:
+
+                    # Nothing can start, wait for a task to finish
+                    done, not_done = wait(list(futures), return_when = FIRST_COMPLETED)
+                    collect(done)
+
+                yield from results()
+
+        finally:
+
+            for executor in executors:
+                if executor is not None:
+                    executor.shutdown(wait = True, cancel_futures = True)
+
+    def summary(self):
+
+        # Number of tasks and busy time of each stage
+        if not self.__log:
+            return pd.DataFrame(columns = ["stage", "tasks", "seconds", "mean"])
+
+        df = pd.DataFrame(self.__log)
+        summary = df.groupby("stage", sort = False)["seconds"].agg(["count", "sum", "mean"]).reset_index()
+        summary.columns = ["stage", "tasks", "seconds", "mean"]
+
+        return summary
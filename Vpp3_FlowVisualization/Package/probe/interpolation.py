@@ -0,0 +1,41 @@
+import numpy as np
+
+class ProbeInterpolation:
+
+    def __init__(self, probe_index, points, num_neighbours=8, power=2):
+
+        # Inverse distance weights of the neighbouring cells of each probe,
+        # computed once per mesh
+        self.__points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+
+        num_neighbours = min(num_neighbours, probe_index.get_num_cells())
+        distance, rows = probe_index.neighbours(self.__points, num_neighbours)
+
+        weights = np.empty_like(distance)
+        exact = distance[:, 0] == 0.0
+
+        weights[~exact] = 1.0 / distance[~exact] ** power
+        weights[exact] = 0.0
+        weights[exact, 0] = 1.0
+        weights /= weights.sum(axis=1, keepdims=True)
+
+        self.__rows = rows
+        self.__weights = weights
+
+    def get_points(self):
+
+        return self.__points
+
+    def get_num_probes(self):
+
+        return len(self.__points)
+
+    # Values of one variable at all probes, shape (num_probes,)
+    def interpolate(self, values):
+
+        return np.einsum("pk,pk->p", self.__weights, np.asarray(values)[self.__rows])
+
+    # Values of several variables, one per column, shape (num_probes, m)
+    def interpolate_all(self, values):
+
+        return np.einsum("pk,pkm->pm", self.__weights, np.asarray(values)[self.__rows])
@@ -0,0 +1,189 @@
+from ..operators.meshoperators import load_connectivity
+
+import numpy as np
+import pickle
+import os
+
+# Tetrahedra filling a cell, by the number of nodes of the cell: a tetrahedron
+# and a brick split around its diagonal 0-6 (Tecplot node order). Degenerate
+# bricks (prisms, pyramids, tetrahedra) repeat nodes, their flat tetrahedra
+# are skipped
+cell_tetrahedra = {4: [(0, 1, 2, 3)],
+                   8: [(0, 1, 2, 6), (0, 2, 3, 6), (0, 3, 7, 6), (0, 7, 4, 6), (0, 4, 5, 6), (0, 5, 1, 6)]}
+
+class ProbeIndex:
+
+    # Members missing from an index pickled by an earlier version
+    __rows = None
+    __nodemap = None
+    __nodes = None
+
+    def __init__(self, centres, cell_id=None, nodemap=None, nodes=None):
+
+        # KD-tree of the cell centres, the candidate cells of a probe are the
+        # ones with the nearest centres. scipy is imported here, a pickled
+        # index imports it when it is read
+        from scipy.spatial import cKDTree
+        self.__centres = np.ascontiguousarray(centres, dtype=np.float64)
+        self.__tree = cKDTree(self.__centres)
+
+        # Direct map from the cell id (Element UserID) to the row of the cell
+        # in the zone arrays
+        if cell_id is None:
+            cell_id = np.arange(1, len(self.__centres) + 1)
+
+        cell_id = np.asarray(cell_id).astype(np.int64)
+        self.__rows = np.full(cell_id.max() + 1, -1, dtype=np.int64)
+        self.__rows[cell_id] = np.arange(len(cell_id))
+
+        # Nodes of each cell (zero-based, in the row order) and the node
+        # coordinates, the containing cell is tested with them
+        if nodemap is not None and nodes is not None:
+            self.__nodemap = np.asarray(nodemap, dtype=np.int64)
+            self.__nodes = np.ascontiguousarray(nodes, dtype=np.float64)
+
+    @staticmethod
+    def from_data(df, connectivity=None):
+
+        # connectivity: the nodemap and node coordinates of the cells, or
+        # the .npz file holding them
+        centres = df[["X C", "Y C", "Z C"]].values
+
+        cell_id = None
+        if "Element UserID" in df:
+            cell_id = df["Element UserID"].values
+
+        connectivity = load_connectivity(connectivity)
+        if connectivity is None or "nodes" not in connectivity:
+            return ProbeIndex(centres, cell_id)
+
+        return ProbeIndex(centres, cell_id, connectivity["nodemap"], connectivity["nodes"])
+
+    @staticmethod
+    def from_file(path):
+
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def to_file(self, path):
+
+        # Write to a temporary file first, concurrent workers building the
+        # same index never see a partial file
+        temp_path = path + "." + str(os.getpid())
+        with open(temp_path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def get_centres(self):
+
+        return self.__centres
+
+    def get_num_cells(self):
+
+        return len(self.__centres)
+
+    def whether_ids(self):
+
+        return self.__rows is not None
+
+    def whether_cells(self):
+
+        return self.__nodemap is not None
+
+    # Rows of the cells containing the points, shape (num_points,). Each
+    # point is tested against the cells with the nearest centres, -1 when
+    # none of them contains it (or the cells are not known): the caller
+    # falls back to the Tecplot probe
+    def locate(self, points, num_candidates=8):
+
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        rows = np.full(len(points), -1, dtype=np.int64)
+
+        if self.__nodemap is None:
+            return rows
+
+        k = min(num_candidates, len(self.__centres))
+        distance, candidates = self.__tree.query(points, k=k)
+        candidates = candidates.reshape(len(points), k)
+
+        inside = self.contains(np.repeat(points, k, axis=0), candidates.ravel()).reshape(len(points), k)
+
+        # The nearest of the containing cells
+        found = inside.any(axis=1)
+        rows[found] = candidates[found, inside[found].argmax(axis=1)]
+
+        return rows
+
+    # Whether each cell contains its point, shape (num_points,): the bounding
+    # box of the cell first, then its tetrahedra
+    def contains(self, points, cells):
+
+        corners = self.__nodes[self.__nodemap[cells]]
+        lower = corners.min(axis=1)
+        upper = corners.max(axis=1)
+        size = np.max(upper - lower, axis=1)
+
+        tolerance = 1e-9 * size[:, None]
+        inside = np.all((points >= lower - tolerance) & (points <= upper + tolerance), axis=1)
+
+        # Other cell shapes are only tested by their bounding box
+        tetrahedra = cell_tetrahedra.get(self.__nodemap.shape[1])
+        if tetrahedra is None:
+            return inside
+
+        boxed = np.flatnonzero(inside)
+        vertices = corners[boxed][:, tetrahedra]
+        matrix = (vertices[:, :, 1:] - vertices[:, :, :1]).transpose(0, 1, 3, 2)
+        offset = points[boxed][:, None, :] - vertices[:, :, 0]
+
+        # Barycentric coordinates of the point in each tetrahedron
+        solid = np.abs(np.linalg.det(matrix)) > 1e-12 * size[boxed, None] ** 3
+        matrix[~solid] = np.eye(3)
+        weights = np.linalg.solve(matrix, offset[..., None])[..., 0]
+        barycentric = np.concatenate([1 - weights.sum(axis=-1, keepdims=True), weights], axis=-1)
+
+        inside[boxed] = np.any(solid & np.all(barycentric >= -1e-9, axis=-1), axis=1)
+
+        return inside
+
+    # Rows of the cells with the nearest centre, e.g. the cell next to a wall
+    # face, shape (num_points,)
+    def nearest(self, points):
+
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        distance, rows = self.__tree.query(points)
+
+        return rows
+
+    # The k nearest cells of each point, shape (num_points, k)
+    def neighbours(self, points, k):
+
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        distance, rows = self.__tree.query(points, k=k)
+
+        return distance.reshape(len(points), k), rows.reshape(len(points), k)
+
+    def get_row(self, cell_id):
+
+        return self.__rows[np.asarray(cell_id).astype(np.int64)]
+
+
+def load_probe_index(path, df, connectivity=None):
+
+    # Build the index once per mesh and keep it next to the mesh data. An
+    # index pickled by an earlier version, without the cell ids, or without
+    # the cells while they are now known, is rebuilt
+    probe_index = None
+    if os.path.exists(path):
+        probe_index = ProbeIndex.from_file(path)
+        if probe_index.whether_ids() and probe_index.whether_cells():
+            return probe_index
+
+    connectivity = load_connectivity(connectivity)
+    if probe_index is not None and probe_index.whether_ids() and (connectivity is None or "nodes" not in connectivity):
+        return probe_index
+
+    probe_index = ProbeIndex.from_data(df, connectivity)
+    probe_index.to_file(path)
+
+    return probe_index
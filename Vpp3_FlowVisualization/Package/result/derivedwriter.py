@@ -0,0 +1,44 @@
+from ..profiling.timing import get_timing
+
+import pandas as pd
+import os
+
+def write_derived(filename, df, write_format):
+
+    # Only the derived variables of a zone, the rows follow the cells of the
+    # referenced step data
+    with get_timing().span("write", zone = os.path.basename(filename)) as span:
+
+        if(write_format == "h5"):
+
+            df.to_hdf(filename + ".h5", key = "data", mode = "w")
+
+        elif(write_format == "csv"):
+
+            df.to_csv(filename + ".dat", index = False, encoding = "utf-8")
+
+        else:
+            quit("The format of the stored data is not supported")
+
+        span.count(df)
+
+
+class DerivedIndex:
+
+    def __init__(self, path):
+
+        # One line per step: the step, its time and the step data the
+        # derived variables belong to
+        self.__path = path
+
+        if os.path.exists(self.__path):
+            os.remove(self.__path)
+
+    def get_path(self):
+
+        return self.__path
+
+    def append(self, step, time, sources):
+
+        with open(self.__path, "a") as f:
+            f.writelines([str(int(step)), "    ", str(time), "    ", "    ".join(sources), "\n"])
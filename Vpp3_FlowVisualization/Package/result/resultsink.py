@@ -0,0 +1,163 @@
+from ..profiling.timing import get_timing
+
+import numpy as np
+import pandas as pd
+import glob
+import os
+
+
+def part_paths(path):
+
+    # Part files of a parquet result, "pressure.part000.parquet", ... for
+    # "pressure.parquet", in the order they were written
+    parts = glob.glob(glob.escape(os.path.splitext(path)[0]) + ".part[0-9][0-9][0-9]*.parquet")
+
+    return sorted(parts, key = lambda part: int(part[:-len(".parquet")].rsplit(".part", 1)[1]))
+
+
+def read_result(path, format="csv"):
+
+    # A result file, or the flushed part files of a parquet result whose run
+    # was stopped before the sink was closed. Empty before the first flush
+    if os.path.exists(path):
+        return pd.read_csv(path) if format == "csv" else pd.read_parquet(path)
+
+    parts = part_paths(path) if format == "parquet" else []
+    if len(parts) == 0:
+        return pd.DataFrame()
+
+    return pd.concat([pd.read_parquet(part) for part in parts], ignore_index = True)
+
+
+class ResultSink:
+
+    def __init__(self, path, columns, format="csv", capacity=64, flush_every=1, append=False):
+
+        # Rows are collected in a preallocated array and appended to the file
+        # every "flush_every" rows, a long run keeps its partial results (in
+        # part files for parquet, see read_result)
+        self.__path = path
+        self.__columns = list(columns)
+        self.__format = format
+
+        self.__data = np.empty((max(capacity, flush_every), len(self.__columns)))
+
+        # Each parquet flush is a file of its own: a part is only written for
+        # a full array, "capacity" rows, or on close
+        self.__flush_every = flush_every
+        if self.__format == "parquet":
+            self.__flush_every = len(self.__data)
+        self.__size = 0
+        self.__num_rows = 0
+        self.__num_parts = 0
+
+        if self.__format not in ("csv", "parquet"):
+            quit("The format of the stored data is not supported")
+
+        # A csv file can be continued by a later run (e.g. watch mode), a
+        # parquet file is written in one go
+        if append and self.__format != "csv":
+            quit("Only a csv result file can be appended")
+
+        if os.path.exists(self.__path) and not append:
+            os.remove(self.__path)
+
+        if self.__format == "parquet":
+            for part in part_paths(self.__path):
+                os.remove(part)
+
+    def get_path(self):
+
+        return self.__path
+
+    def get_columns(self):
+
+        return self.__columns
+
+    def get_num_rows(self):
+
+        return self.__num_rows
+
+    def append(self, row):
+
+        if self.__size == len(self.__data):
+            self.flush()
+
+        self.__data[self.__size] = row
+        self.__size += 1
+        self.__num_rows += 1
+
+        if self.__size >= self.__flush_every:
+            self.flush()
+
+    def flush(self):
+
+        if self.__size == 0:
+            return
+
+        df = pd.DataFrame(self.__data[:self.__size], columns = self.__columns)
+
+        with get_timing().span("write", zone = os.path.basename(self.__path)) as span:
+
+            if(self.__format == "csv"):
+
+                header = not os.path.exists(self.__path)
+                df.to_csv(self.__path, mode = "a", header = header, index = False, encoding = "utf-8")
+
+            elif(self.__format == "parquet"):
+
+                # A parquet file is only readable once its footer is written:
+                # each flush is a complete part file, combined on close
+                df.to_parquet(self.__part_path(self.__num_parts), index = False)
+                self.__num_parts += 1
+
+            span.count(df)
+
+        self.__size = 0
+
+    def __part_path(self, index):
+
+        return os.path.splitext(self.__path)[0] + ".part{:03d}.parquet".format(index)
+
+    def close(self):
+
+        self.flush()
+
+        # A single part is the whole file
+        if self.__num_parts == 1:
+            os.replace(self.__part_path(0), self.__path)
+
+        elif self.__num_parts > 1:
+
+            parts = [self.__part_path(index) for index in range(self.__num_parts)]
+
+            with get_timing().span("write", zone = os.path.basename(self.__path)):
+                pd.concat([pd.read_parquet(part) for part in parts],
+                          ignore_index = True).to_parquet(self.__path, index = False)
+
+            for part in parts:
+                os.remove(part)
+
+        self.__num_parts = 0
+
+    # Final conversions, they close the sink
+    def to_dataframe(self):
+
+        self.close()
+
+        if self.__num_rows == 0:
+            return pd.DataFrame(columns = self.__columns)
+
+        return read_result(self.__path, self.__format)
+
+    def to_excel(self, path):
+
+        self.to_dataframe().to_excel(path, index = False)
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
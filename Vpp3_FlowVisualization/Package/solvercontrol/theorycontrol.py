@@ -5,6 +5,7 @@ class TheoryControl:
     def __init__(self, path: str):
         
         input_db = InputDatabase.from_file(path)
+        self.__input_db = input_db
         # print(input_db)
 
         # geometric model
@@ -21,6 +22,21 @@ class TheoryControl:
 
         if (self.__virtualflow == "sourcePoint"):
             self.__source_point = input_db["model"]["sourcePoint"]
+
+        # Probe points (pressure taps), the source point if not given. A list
+        # of points or an (N, 3) array included with load()
+        self.__probe_points = None
+        if "probes" in input_db["model"]:
+            probes = input_db["model"]["probes"]
+            assert isinstance(probes, list) or hasattr(probes, "shape")
+            self.__probe_points = probes
+
+        # Rows of the mesh streamed at a time by the virtual flow step, the
+        # whole zone at once if not given
+        self.__chunk_rows = None
+        if "chunk_rows" in input_db:
+            assert isinstance(input_db["chunk_rows"], int) and input_db["chunk_rows"] > 0
+            self.__chunk_rows = input_db["chunk_rows"]
         
 
     def get_geometry(self):
@@ -39,4 +55,21 @@ class TheoryControl:
 
         return self.__source_point
 
+    def whether_probes(self):
+
+        return self.__probe_points is not None
+
+    def get_probe_points(self):
+
+        if self.__probe_points is None:
+            return [self.__source_point]
+
+        return self.__probe_points
+
+    def get_chunk_rows(self):
+
+        return self.__chunk_rows
+
+    def get_input_db(self):
 
+        return self.__input_db
@@ -0,0 +1,176 @@
+from ..parser.inputdatabase import InputDatabase
+import os
+
+class VisualizationControl:
+
+    def __init__(self, path: str):
+
+        # The control file is optional, every entry has a default value
+        if os.path.exists(path):
+            input_db = InputDatabase.from_file(path)
+        else:
+            input_db = InputDatabase()
+        self.__input_db = input_db
+
+        # Viscosity coefficient
+        self.__viscosity = 1.0/150
+        if "viscosity" in input_db:
+            assert isinstance(input_db["viscosity"], float)
+            self.__viscosity = input_db["viscosity"]
+
+        # Number of processes evaluating time steps in the Tecplot-free path
+        self.__num_workers = os.cpu_count()
+        if "workers" in input_db:
+            assert isinstance(input_db["workers"], int)
+            self.__num_workers = input_db["workers"]
+
+        # Number of neighbouring cells interpolated at each probe point
+        self.__probe_neighbours = 8
+        if "probe_neighbours" in input_db:
+            assert isinstance(input_db["probe_neighbours"], int)
+            self.__probe_neighbours = input_db["probe_neighbours"]
+
+        # Vorticity of the force computation: "auto" takes the exported Tecplot
+        # variables when present, "native" always derives it from the
+        # velocity with the mesh operators (cell connectivity needed)
+        self.__vorticity = "auto"
+        if "vorticity" in input_db:
+            assert isinstance(input_db["vorticity"], str)
+            self.__vorticity = input_db["vorticity"]
+
+        if self.__vorticity not in ("auto", "native"):
+            quit("No this vorticity method!!!")
+
+        # Integration of the weighted variables: "native" uses the exported
+        # cell volumes, "tecplot" the CFDAnalyzer macro and "check" both
+        self.__integration = "native"
+        if "integration" in input_db:
+            assert isinstance(input_db["integration"], str)
+            self.__integration = input_db["integration"]
+
+        if self.__integration not in ("native", "tecplot", "check"):
+            quit("No this integration method!!!")
+
+        # Format of the result time series (csv or parquet), the Excel file
+        # is an optional conversion at the end of the run
+        self.__result_format = "csv"
+        if "result_format" in input_db:
+            assert isinstance(input_db["result_format"], str)
+            self.__result_format = input_db["result_format"]
+
+        self.__write_excel = False
+        if "excel" in input_db:
+            assert isinstance(input_db["excel"], bool)
+            self.__write_excel = input_db["excel"]
+
+        # Output of each step: the derived variables only (vir_U/V/W,
+        # vir_lamb, vir_friction) and, opt-in, the full Tecplot dataset
+        self.__write_derived = True
+        if "write_derived" in input_db:
+            assert isinstance(input_db["write_derived"], bool)
+            self.__write_derived = input_db["write_derived"]
+
+        self.__write_full = False
+        if "full_dataset" in input_db:
+            assert isinstance(input_db["full_dataset"], bool)
+            self.__write_full = input_db["full_dataset"]
+
+        # The in-memory pipeline writes the worksheets of each step only
+        # when checkpointing is enabled
+        self.__checkpoint = False
+        if "checkpoint" in input_db:
+            assert isinstance(input_db["checkpoint"], bool)
+            self.__checkpoint = input_db["checkpoint"]
+
+        # Scheduling of the pipeline steps: threads of the virtual flow and
+        # integration stages (threads integrating on different meshes wait
+        # for each other), and the memory (MB) of the steps in flight
+        self.__schedule = {"virtualflow": 2, "integrate": 1, "memory": 4096}
+        if "schedule" in input_db:
+            for name in self.__schedule:
+                if name in input_db["schedule"]:
+                    assert isinstance(input_db["schedule"][name], int)
+                    self.__schedule[name] = input_db["schedule"][name]
+
+        # Watch mode: seconds between two polls of the case, seconds after
+        # which the last time directory counts as complete, and the number
+        # of steps processed at once (the newest first when behind)
+        self.__watch_interval = 5.0
+        if "watch_interval" in input_db:
+            assert isinstance(input_db["watch_interval"], (int, float))
+            self.__watch_interval = float(input_db["watch_interval"])
+
+        self.__watch_settle = 10.0
+        if "watch_settle" in input_db:
+            assert isinstance(input_db["watch_settle"], (int, float))
+            self.__watch_settle = float(input_db["watch_settle"])
+
+        self.__watch_batch = 4
+        if "watch_batch" in input_db:
+            assert isinstance(input_db["watch_batch"], int)
+            self.__watch_batch = input_db["watch_batch"]
+
+
+    def get_viscosity(self):
+
+        return self.__viscosity
+
+    def get_num_workers(self):
+
+        return self.__num_workers
+
+    def get_probe_neighbours(self):
+
+        return self.__probe_neighbours
+
+    def get_vorticity(self):
+
+        return self.__vorticity
+
+    def get_integration(self):
+
+        return self.__integration
+
+    def get_result_format(self):
+
+        return self.__result_format
+
+    def whether_write_excel(self):
+
+        return self.__write_excel
+
+    def whether_write_derived(self):
+
+        return self.__write_derived
+
+    def whether_write_full_dataset(self):
+
+        return self.__write_full
+
+    def whether_checkpoint(self):
+
+        return self.__checkpoint
+
+    def get_stage_limit(self, stage):
+
+        return self.__schedule[stage]
+
+    def get_memory_limit(self):
+
+        return self.__schedule["memory"] * 1024 * 1024
+
+    def get_watch_interval(self):
+
+        return self.__watch_interval
+
+    def get_watch_settle(self):
+
+        return self.__watch_settle
+
+    def get_watch_batch(self):
+
+        return self.__watch_batch
+
+    def get_input_db(self):
+
+        return self.__input_db
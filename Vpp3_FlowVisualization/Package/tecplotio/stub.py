@@ -0,0 +1,443 @@
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+import atexit
+import json
+import os
+import re
+
+import numpy as np
+
+# A NumPy stand-in for the part of PyTecplot used by the scripts, selected
+# with VPP_TECPLOT=stub. The scripts then run without Tecplot 360, e.g. to
+# benchmark their orchestration and count their Tecplot calls.
+#
+# Datasets are .npz files (also when named .plt), save_tecplot_plt writes
+# the same layout:
+#   "variables"         names of the variables, in the order of their index
+#   "names", "times"    name, solution time and number of cells of each
+#   "sizes"             zone
+#   "zone/<i>/<name>"   cell-centred values of zone i
+#   "static"            optional: zones per time step. Values missing from a
+#                       zone are taken from "mesh/<i % static>/<name>", a
+#                       static grid is stored once
+#   "nodal", ".../nodemap"
+#                       optional: the nodal variables (X, Y, Z) and the
+#                       zero-based brick connectivity of a zone, the zone is
+#                       then FEBrick instead of FEPolyhedron
+# load_openfoam reads the case path itself if it is such a file, otherwise
+# "openfoam_stub.npz" next to it.
+
+stub_case = "openfoam_stub.npz"
+
+
+class Namespace:
+
+    def __init__(self, **members):
+
+        self.__dict__.update(members)
+
+
+class Enumeration:
+
+    # Members compare by identity, as the PyTecplot enumerations
+    def __init__(self, name, members):
+
+        for member in members:
+            setattr(self, member, name + "." + member)
+
+
+constant = Namespace(
+    PlotType = Enumeration("PlotType", ["Automatic", "Cartesian2D", "Cartesian3D", "Sketch"]),
+    ReadDataOption = Enumeration("ReadDataOption", ["Append", "ReplaceInActiveFrame", "ReplaceAll"]),
+    ValueLocation = Enumeration("ValueLocation", ["CellCentered", "Nodal"]),
+    ZoneType = Enumeration("ZoneType", ["Ordered", "FETriangle", "FEQuad", "FETetra", "FEBrick",
+                                        "FEPolygon", "FEPolyhedron", "FELineSeg"]))
+
+
+class TecplotLogicError(Exception):
+
+    pass
+
+
+exception = Namespace(TecplotError = TecplotLogicError, TecplotLogicError = TecplotLogicError)
+
+ProbeAtPositionResult = namedtuple("ProbeAtPositionResult", ["data", "cell", "zone"])
+
+
+class Variable:
+
+    def __init__(self, name, index):
+
+        self.name = name
+        self.index = index
+
+
+class Values:
+
+    def __init__(self, load, location):
+
+        # The values are read from the file when first used
+        self.__load = load
+        self.__array = None
+        self.location = location
+
+    def array(self):
+
+        if self.__array is None:
+            self.__array = np.array(self.__load(), dtype = np.float64)
+            self.__load = None
+
+        return self.__array
+
+    def as_numpy_array(self):
+
+        # A copy, as the values fetched from Tecplot
+        return self.array().copy()
+
+    def __len__(self):
+
+        return len(self.array())
+
+    @property
+    def shape(self):
+
+        return self.array().shape
+
+    def __getitem__(self, index):
+
+        return self.array()[index]
+
+    def __setitem__(self, index, value):
+
+        self.array()[index] = value
+
+
+class Nodemap:
+
+    def __init__(self, array):
+
+        self.array = array.ravel()
+        self.shape = array.shape
+
+
+class Zone:
+
+    def __init__(self, dataset, index, name, solution_time, size, load, nodal=(), nodemap=None):
+
+        self.dataset = dataset
+        self.index = index
+        self.name = name
+        self.solution_time = solution_time
+        self.zone_type = constant.ZoneType.FEPolyhedron
+        self.num_elements = size
+        self.__load = load
+        self.__nodal = set(nodal)
+        self.__values = {}
+
+        if nodemap is not None:
+            self.zone_type = constant.ZoneType.FEBrick
+            self.nodemap = Nodemap(nodemap)
+
+    def values(self, name):
+
+        variable = self.dataset.variable(name)
+        if variable.name not in self.__values:
+            location = (constant.ValueLocation.Nodal if variable.name in self.__nodal
+                        else constant.ValueLocation.CellCentered)
+            self.__values[variable.name] = Values(lambda: self.__load(variable.name), location)
+
+        return self.__values[variable.name]
+
+
+class Dataset:
+
+    def __init__(self):
+
+        self.__variables = []
+        self.__zones = []
+
+    @staticmethod
+    def from_file(path):
+
+        dataset = Dataset()
+        dataset.append_file(path)
+
+        return dataset
+
+    def append_file(self, path):
+
+        data = np.load(path, allow_pickle = False)
+        keys = set(data.files)
+        static = int(data["static"]) if "static" in keys else None
+        nodal = [str(name) for name in data["nodal"]] if "nodal" in keys else []
+
+        for name in data["variables"]:
+            self.add_variable(str(name))
+
+        offset = len(self.__zones)
+        for i, (name, time, size) in enumerate(zip(data["names"], data["times"], data["sizes"])):
+
+            def load(variable, i=i):
+                for key in ("zone/{}/{}".format(i, variable),
+                            None if static is None else "mesh/{}/{}".format(i % static, variable)):
+                    if key in keys:
+                        return data[key]
+                return np.zeros(0 if variable in nodal else self.__zones[offset + i].num_elements)
+
+            nodemap = None
+            for key in ("zone/{}/nodemap".format(i), None if static is None else "mesh/{}/nodemap".format(i % static)):
+                if key in keys:
+                    nodemap = data[key]
+
+            self.__zones.append(Zone(self, offset + i, str(name), float(time), int(size), load, nodal, nodemap))
+
+    def add_variable(self, name):
+
+        if name not in self.variable_names:
+            self.__variables.append(Variable(name, len(self.__variables)))
+
+        return self.variable(name)
+
+    def variable(self, name):
+
+        # A variable handle, its index or its name, as in PyTecplot
+        if isinstance(name, Variable):
+            return self.__variables[name.index]
+
+        if isinstance(name, int):
+            return self.__variables[name]
+
+        for variable in self.__variables:
+            if variable.name == name:
+                return variable
+
+        raise TecplotLogicError("No variable " + str(name))
+
+    def variables(self):
+
+        return iter(self.__variables)
+
+    @property
+    def variable_names(self):
+
+        return [variable.name for variable in self.__variables]
+
+    def zone(self, index):
+
+        if isinstance(index, str):
+            for zone in self.__zones:
+                if zone.name == index:
+                    return zone
+            raise TecplotLogicError("No zone " + index)
+
+        return self.__zones[index]
+
+    def zones(self):
+
+        return iter(self.__zones)
+
+    @property
+    def num_zones(self):
+
+        return len(self.__zones)
+
+    @property
+    def num_variables(self):
+
+        return len(self.__variables)
+
+    @property
+    def solution_times(self):
+
+        return sorted(set(zone.solution_time for zone in self.__zones))
+
+
+class Frame:
+
+    def __init__(self):
+
+        self.dataset = Dataset()
+        self.aux_data = {}
+
+
+class StubTecplot:
+
+    # The module-level calls of PyTecplot, each call is counted
+    constant = constant
+    exception = exception
+
+    def __init__(self, report=True):
+
+        self.__frame = Frame()
+        self.__calls = Counter()
+
+        self.data = Namespace(load_openfoam = self.__counted(self.load_openfoam),
+                              load_tecplot = self.__counted(self.load_tecplot),
+                              save_tecplot_plt = self.__counted(self.save_tecplot_plt),
+                              operate = Namespace(execute_equation = self.__counted(self.execute_equation)),
+                              query = Namespace(probe_at_position = self.__counted(self.probe_at_position)))
+        self.macro = Namespace(execute_extended_command = self.__counted(self.execute_extended_command))
+        self.session = Namespace(connect = self.__counted(self.connect), suspend = self.suspend)
+
+        # The counts are printed when the script ends, the benchmark reads them
+        if report:
+            atexit.register(self.report)
+
+    def __counted(self, function):
+
+        def call(*args, **kwargs):
+            self.__calls[function.__name__] += 1
+            return function(*args, **kwargs)
+
+        call.__name__ = function.__name__
+
+        return call
+
+    def get_calls(self):
+
+        return dict(self.__calls)
+
+    def report(self):
+
+        print("Stub Tecplot calls:", json.dumps(self.get_calls()))
+
+    def connect(self, port=7600, **kwargs):
+
+        pass
+
+    @contextmanager
+    def suspend(self):
+
+        self.__calls["suspend"] += 1
+        yield
+
+    def new_layout(self):
+
+        self.__calls["new_layout"] += 1
+        self.__frame = Frame()
+
+    def active_frame(self):
+
+        self.__calls["active_frame"] += 1
+        return self.__frame
+
+    def load_openfoam(self, filename, **kwargs):
+
+        path = filename
+        if not (os.path.isfile(path) and path.endswith(".npz")):
+            directory = path if os.path.isdir(path) else os.path.dirname(path)
+            path = os.path.join(directory, stub_case)
+
+        self.__frame = Frame()
+        self.__frame.dataset.append_file(path)
+
+        return self.__frame.dataset
+
+    def load_tecplot(self, filenames, **kwargs):
+
+        # Appended to the dataset of the active frame
+        if isinstance(filenames, str):
+            filenames = [filenames]
+
+        for filename in filenames:
+            self.__frame.dataset.append_file(filename)
+
+        return self.__frame.dataset
+
+    def save_tecplot_plt(self, filename, dataset=None, zones=None, variables=None, **kwargs):
+
+        dataset = self.__frame.dataset if dataset is None else dataset
+        zones = list(dataset.zones()) if zones is None else [self.__zone(dataset, zone) for zone in zones]
+        variables = list(dataset.variables()) if variables is None else [
+            dataset.variable(variable) if isinstance(variable, (str, int)) else variable for variable in variables]
+
+        arrays = {"variables": np.array([variable.name for variable in variables]),
+                  "names": np.array([zone.name for zone in zones]),
+                  "times": np.array([zone.solution_time for zone in zones]),
+                  "sizes": np.array([zone.num_elements for zone in zones])}
+        arrays["nodal"] = np.array([variable.name for variable in variables
+                                    if any(zone.values(variable.name).location == constant.ValueLocation.Nodal
+                                           for zone in zones)])
+        for i, zone in enumerate(zones):
+            for variable in variables:
+                arrays["zone/{}/{}".format(i, variable.name)] = zone.values(variable.name).array()
+            if zone.zone_type == constant.ZoneType.FEBrick:
+                arrays["zone/{}/nodemap".format(i)] = zone.nodemap.array.reshape(zone.nodemap.shape)
+
+        # The name is kept, np.savez would append ".npz"
+        with open(filename, "wb") as f:
+            np.savez(f, **arrays)
+
+    def __zone(self, dataset, zone):
+
+        return zone if isinstance(zone, Zone) else dataset.zone(zone)
+
+    def execute_equation(self, equation, zones=None, value_location=None, **kwargs):
+
+        # Lines "{name} = expression" of the variables in braces, evaluated
+        # with NumPy on each zone
+        dataset = self.__frame.dataset
+        zones = list(dataset.zones()) if zones is None else [self.__zone(dataset, zone) for zone in zones]
+
+        for line in equation.splitlines():
+
+            if not line.strip():
+                continue
+
+            target, expression = line.split("=", 1)
+            name = target.strip().strip("{}")
+            dataset.add_variable(name)
+
+            names = re.findall(r"\{([^}]*)\}", expression)
+            code = re.sub(r"\{([^}]*)\}", lambda match: "values[{!r}]".format(match.group(1)), expression)
+
+            for zone in zones:
+                values = {variable: zone.values(variable).array() for variable in names}
+                result = eval(code, {"np": np, "__builtins__": {}}, {"values": values})
+                zone.values(name)[:] = np.broadcast_to(result, (zone.num_elements,))
+
+    def probe_at_position(self, x, y, z=None, zones=None, **kwargs):
+
+        # The values of the cell whose centre is nearest to the point
+        dataset = self.__frame.dataset
+        zones = list(dataset.zones()) if zones is None else [self.__zone(dataset, zone) for zone in zones]
+
+        point = np.array([x, y, 0.0 if z is None else z])
+        best = None
+        for zone in zones:
+            if zone.num_elements == 0:
+                continue
+            centres = np.column_stack([zone.values(name).array() for name in ("X C", "Y C", "Z C")])
+            distance = np.einsum("ij,ij->i", centres - point, centres - point)
+            cell = int(np.argmin(distance))
+            if best is None or distance[cell] < best[0]:
+                best = (distance[cell], zone, cell)
+
+        if best is None:
+            return None
+
+        distance, zone, cell = best
+        data = [zone.values(variable.name)[cell] for variable in dataset.variables()]
+
+        # Finite-element zones report the cell as the second index
+        return ProbeAtPositionResult(data, (0, cell, 0), zone)
+
+    def execute_extended_command(self, addon, command, **kwargs):
+
+        # CFDAnalyzer4: cell volumes are part of the stub datasets, the
+        # integral of a scalar sets CFDA.INTEGRATION_TOTAL of the frame
+        if addon != "CFDAnalyzer4":
+            return
+
+        dataset = self.__frame.dataset
+
+        if "CELLVOLUME" in command:
+            dataset.add_variable("Cell Volume")
+
+        integrate = re.search(r"Integrate\s*\[(\d+)\]", command)
+        if integrate:
+            zone = dataset.zone(int(integrate.group(1)) - 1)
+            scalar = int(re.search(r"ScalarVar\s*=\s*(\d+)", command).group(1)) - 1
+            values = zone.values(dataset.variable(scalar).name).array()
+            volume = zone.values("Cell Volume").array()
+            self.__frame.aux_data["CFDA.INTEGRATION_TOTAL"] = repr(float(np.dot(values, volume)))
@@ -0,0 +1,160 @@
+from ..profiling.timing import get_timing
+
+from collections import Counter
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+class TecplotAccess:
+
+    def __init__(self, tecplot_module, dataset=None, timing=None):
+
+        # The PyTecplot module, or any object offering the same calls (e.g.
+        # a stub session which counts them)
+        self.__tecplot = tecplot_module
+        self.__dataset = dataset
+        self.__zones = {}
+        self.__variables = {}
+
+        # The calls are recorded as "tecplot" spans when timing is enabled
+        self.__timing = timing if timing is not None else get_timing()
+
+        # Number of Tecplot calls made through this layer, per operation
+        self.__calls = Counter()
+
+    def set_dataset(self, dataset):
+
+        self.__dataset = dataset
+        self.__zones = {}
+        self.__variables = {}
+
+    def get_dataset(self):
+
+        return self.__dataset
+
+    def get_calls(self):
+
+        return dict(self.__calls)
+
+    def get_num_calls(self):
+
+        return sum(self.__calls.values())
+
+    def zone(self, index):
+
+        # Zone handles are looked up once per dataset
+        if index not in self.__zones:
+            self.__calls["zone"] += 1
+            self.__zones[index] = self.__dataset.zone(index)
+
+        return self.__zones[index]
+
+    def variable(self, name):
+
+        # Variable handles are looked up once per dataset as well. PyTecplot
+        # has no call moving several variables at once: each fetch or push
+        # is still one transfer per variable, but no longer a search by name
+        if name not in self.__variables:
+            self.__calls["variable"] += 1
+            self.__variables[name] = self.__dataset.variable(name)
+
+        return self.__variables[name]
+
+    def nodemap(self, index):
+
+        # Cell connectivity of a classic finite-element zone, one row of
+        # zero-based node indices per cell, None for the other zone types
+        zone = self.zone(index)
+        zone_type = self.__tecplot.constant.ZoneType
+        if zone.zone_type not in (zone_type.FETriangle, zone_type.FEQuad, zone_type.FETetra, zone_type.FEBrick):
+            return None
+
+        self.__calls["nodemap"] += 1
+        with self.__timing.span("tecplot", zone=index) as span:
+            nodemap = np.array(zone.nodemap.array[:]).reshape(zone.nodemap.shape)
+            span.count(nodemap)
+
+        return nodemap
+
+    def connectivity(self, index):
+
+        # Nodemap and node coordinates of a classic finite-element zone, None
+        # for the other zone types
+        nodemap = self.nodemap(index)
+        if nodemap is None:
+            return None
+
+        values = self.fetch(index, ["X", "Y", "Z"])
+
+        return {"nodemap": nodemap, "nodes": np.column_stack([values["X"], values["Y"], values["Z"]])}
+
+    def probe(self, index, point):
+
+        # Zero-based index of the cell of a zone containing a point (the
+        # Element UserID less one), None when the point is outside the zone.
+        # A finite-element zone reports the cell as the second index
+        self.__calls["probe_at_position"] += 1
+        with self.__timing.span("tecplot", zone="probe_at_position"):
+            result = self.__tecplot.data.query.probe_at_position(point[0], point[1], point[2],
+                                                                 zones=[self.zone(index)])
+
+        if result is None:
+            return None
+
+        data, cell, zone = result
+
+        return cell[1]
+
+    def create_variables(self, names, zones=None):
+
+        # All variables are created (and zeroed) by a single equation
+        equation = "\n".join("{" + name + "} = 0" for name in names)
+
+        self.__calls["execute_equation"] += 1
+        with self.__timing.span("tecplot", zone="execute_equation"):
+            self.__tecplot.data.operate.execute_equation(
+                equation,
+                zones=zones,
+                value_location=self.__tecplot.constant.ValueLocation.CellCentered)
+
+    def fetch(self, index, names):
+
+        with self.__timing.span("tecplot", zone=index) as span:
+
+            zone = self.zone(index)
+
+            values = {}
+            for name in names:
+                self.__calls["fetch"] += 1
+                values[name] = zone.values(self.variable(name)).as_numpy_array()
+
+            span.count(values)
+
+        return values
+
+    def fetch_frame(self, index, names):
+
+        values = self.fetch(index, names)
+
+        return pd.DataFrame({name: values[name] for name in names}, columns = names)
+
+    def push(self, index, values):
+
+        # The arrays are sent as they are, Tecplot copies them anyway
+        with self.__timing.span("tecplot", zone=index) as span:
+
+            zone = self.zone(index)
+
+            for name in values:
+                self.__calls["push"] += 1
+                zone.values(self.variable(name))[:] = np.ascontiguousarray(values[name], dtype=np.float64)
+
+            span.count(values)
+
+    @contextmanager
+    def step(self):
+
+        # Suspend redraws and state updates for the calls of a whole step
+        self.__calls["suspend"] += 1
+        with self.__tecplot.session.suspend():
+            yield self
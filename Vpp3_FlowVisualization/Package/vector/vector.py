@@ -38,4 +38,218 @@ class Vector:
 
     def write(self):
 
-        print("Vector = (", self.x(), ",", self.y(), ",", self.z(), ")")
\ No newline at end of file
+        print("Vector = (", self.x(), ",", self.y(), ",", self.z(), ")")
+
+# Number of cells processed at once by the fused kernels, the temporaries
+# of one block stay in the cache
+block_size = 8192
+
+
+class VectorField:
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+
+        # One contiguous (3, N) buffer, each component is a contiguous row
+        self.data = np.ascontiguousarray(data, dtype=np.float64)
+        assert self.data.ndim == 2 and self.data.shape[0] == 3
+
+    @staticmethod
+    def empty(n):
+
+        return VectorField(np.empty((3, n)))
+
+    @staticmethod
+    def from_components(x, y, z, out=None):
+
+        if out is None:
+            out = VectorField.empty(len(x))
+
+        out.data[0] = x
+        out.data[1] = y
+        out.data[2] = z
+
+        return out
+
+    def __len__(self):
+
+        return self.data.shape[1]
+
+    def x(self):
+
+        return self.data[0]
+
+    def y(self):
+
+        return self.data[1]
+
+    def z(self):
+
+        return self.data[2]
+
+    def dot(self, A, out=None):
+
+        return dot(self, A, out)
+
+    def times(self, A, out=None):
+
+        return cross(self, A, out)
+
+    # (self x A) . B without full-size temporaries
+    def triple(self, A, B, out=None):
+
+        return triple_product(self, A, B, out)
+
+    def write(self):
+
+        print("VectorField = (", self.x(), ",", self.y(), ",", self.z(), ")")
+
+
+class TensorField:
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+
+        # One contiguous (3, 3, N) buffer, data[i, j] = d(u_i)/d(x_j) for a
+        # velocity gradient
+        self.data = np.ascontiguousarray(data, dtype=np.float64)
+        assert self.data.ndim == 3 and self.data.shape[:2] == (3, 3)
+
+    @staticmethod
+    def empty(n):
+
+        return TensorField(np.empty((3, 3, n)))
+
+    def __len__(self):
+
+        return self.data.shape[2]
+
+    def component(self, i, j):
+
+        return self.data[i, j]
+
+    def trace(self, out=None):
+
+        if out is None:
+            out = np.empty(len(self))
+
+        np.add(self.data[0, 0], self.data[1, 1], out=out)
+        out += self.data[2, 2]
+
+        return out
+
+    # Tensor-vector product (T . A)_i = T_ij A_j
+    def dot(self, A, out=None):
+
+        if out is None:
+            out = VectorField.empty(len(self))
+
+        work = np.empty(len(self))
+        for i in range(3):
+            np.multiply(self.data[i, 0], A.data[0], out=out.data[i])
+            for j in (1, 2):
+                np.multiply(self.data[i, j], A.data[j], out=work)
+                out.data[i] += work
+
+        return out
+
+    # Curl of the field whose gradient this is, e.g. the vorticity
+    def curl(self, out=None):
+
+        if out is None:
+            out = VectorField.empty(len(self))
+
+        np.subtract(self.data[2, 1], self.data[1, 2], out=out.data[0])
+        np.subtract(self.data[0, 2], self.data[2, 0], out=out.data[1])
+        np.subtract(self.data[1, 0], self.data[0, 1], out=out.data[2])
+
+        return out
+
+
+def dot(A, B, out=None):
+
+    if out is None:
+        out = np.empty(len(A))
+
+    work = np.empty(min(block_size, len(A)))
+    for start in range(0, len(A), block_size):
+        stop = min(start + block_size, len(A))
+        o = out[start:stop]
+        w = work[:stop - start]
+        a = A.data[:, start:stop]
+        b = B.data[:, start:stop]
+
+        np.multiply(a[0], b[0], out=o)
+        np.multiply(a[1], b[1], out=w)
+        o += w
+        np.multiply(a[2], b[2], out=w)
+        o += w
+
+    return out
+
+
+def cross(A, B, out=None):
+
+    if out is None:
+        out = VectorField.empty(len(A))
+
+    work = np.empty(min(block_size, len(A)))
+    for start in range(0, len(A), block_size):
+        stop = min(start + block_size, len(A))
+        o = out.data[:, start:stop]
+        w = work[:stop - start]
+        a = A.data[:, start:stop]
+        b = B.data[:, start:stop]
+
+        np.multiply(a[1], b[2], out=o[0])
+        np.multiply(a[2], b[1], out=w)
+        o[0] -= w
+
+        np.multiply(a[2], b[0], out=o[1])
+        np.multiply(a[0], b[2], out=w)
+        o[1] -= w
+
+        np.multiply(a[0], b[1], out=o[2])
+        np.multiply(a[1], b[0], out=w)
+        o[2] -= w
+
+    return out
+
+
+# Fused scalar triple product (A x B) . C, e.g. the weighted lamb vector
+# (vorticity x velocity) . virU or the friction (normal x vorticity) . virU
+def triple_product(A, B, C, out=None):
+
+    if out is None:
+        out = np.empty(len(A))
+
+    work = np.empty((2, min(block_size, len(A))))
+    for start in range(0, len(A), block_size):
+        stop = min(start + block_size, len(A))
+        o = out[start:stop]
+        w = work[0, :stop - start]
+        v = work[1, :stop - start]
+        a = A.data[:, start:stop]
+        b = B.data[:, start:stop]
+        c = C.data[:, start:stop]
+
+        np.multiply(a[1], b[2], out=o)
+        np.multiply(a[2], b[1], out=w)
+        o -= w
+        o *= c[0]
+
+        np.multiply(a[2], b[0], out=v)
+        np.multiply(a[0], b[2], out=w)
+        v -= w
+        v *= c[1]
+        o += v
+
+        np.multiply(a[0], b[1], out=v)
+        np.multiply(a[1], b[0], out=w)
+        v -= w
+        v *= c[2]
+        o += v
+
+    return out
@@ -0,0 +1,60 @@
+import importlib
+import importlib.util
+import numpy as np
+import os
+import sys
+
+# The geometric models are the ones of the virtual flow step, they are
+# loaded from its package under a name of their own
+stage_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "..", "..", "..", "Vpp2_CalcVirtualFlow")
+stage_name = "vpp2_package"
+
+
+def load_stage_package(path, name):
+
+    if name in sys.modules:
+        return sys.modules[name]
+
+    init = os.path.join(path, "Package", "__init__.py")
+    spec = importlib.util.spec_from_file_location(
+        name, init, submodule_search_locations=[os.path.dirname(init)])
+
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+
+    return module
+
+
+class ProbeVirtualFlow:
+
+    def __init__(self, geometry, time):
+
+        load_stage_package(stage_dir, stage_name)
+
+        if(geometry == "cylinder2D"):
+
+            module = importlib.import_module(stage_name + ".geometry.cylinder2D")
+            self.__virtualflow = module.VirtualMovingCylinder2D(time)
+
+        elif(geometry == "sphere3D"):
+
+            module = importlib.import_module(stage_name + ".geometry.sphere3D")
+            self.__virtualflow = module.VirtualMovingSphere3D(time)
+
+        elif(geometry == "multiBody"):
+
+            module = importlib.import_module(stage_name + ".geometry.multibody")
+            self.__virtualflow = module.VirtualMovingMultiBody(time)
+
+        else:
+            quit("No this model!!!")
+
+        if(self.__virtualflow.get_input_db()["model"]["virtualmotion"] != "sourcePoint"):
+            quit("Probes need the sourcePoint virtual motion")
+
+    # Virtual velocity of the source placed at "point", shape (3, N)
+    def get_virU(self, x, y, z, point):
+
+        return np.ascontiguousarray(self.__virtualflow.get_virU(x, y, z, source_point=point).T)
@@ -0,0 +1,331 @@
+from ..solvercontrol.splitcontrol import SplitControl
+from ..solvercontrol.theorycontrol import TheoryControl
+from ..solvercontrol.visualizationcontrol import VisualizationControl
+from ..integration.integration import Integrator
+from ..probe.probeindex import ProbeIndex, load_probe_index
+from ..probe.interpolation import ProbeInterpolation
+from ..virtualflow.virtualflow import ProbeVirtualFlow
+from ..operators.meshoperators import WallGradient, load_mesh_operators
+from ..vector.vector import VectorField, cross, dot, triple_product
+from ..profiling.timing import get_timing
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import os
+
+columns = ['time','Pressure','dU_Square','vir_lamb','vir_friction','Pressure_prediction']
+probe_columns = ['time','probe','x','y','z','Pressure','dU_Square','vir_lamb','vir_friction','Pressure_prediction']
+
+
+def read_data(filename, write_format):
+
+    with get_timing().span("read", zone = os.path.basename(filename)) as span:
+
+        if(write_format == "h5"):
+
+            df = pd.read_hdf(filename + ".h5", key = "data")
+
+        elif(write_format == "csv"):
+
+            df = pd.read_csv(filename + ".dat")
+
+        else:
+            quit("The format of the stored data is not supported")
+
+        span.count(df)
+
+    return df
+
+
+def write_data(filename, df, write_format):
+
+    with get_timing().span("write", zone = os.path.basename(filename)) as span:
+
+        if(write_format == "h5"):
+
+            df.to_hdf(filename + ".h5", key = "data", mode = "w")
+
+        elif(write_format == "csv"):
+
+            df.to_csv(filename + ".dat", index = False, encoding = "utf-8")
+
+        else:
+            quit("The format of the stored data is not supported")
+
+        span.count(df)
+
+
+class VirtualPower:
+
+    def __init__(self, input_dir="input/", read_mesh=True):
+
+        # Read control file
+        self.__split_control = SplitControl(input_dir + "splitControlDict")
+        self.__theory_control = TheoryControl(input_dir + "theoryControlDict")
+        self.__visualization_control = VisualizationControl(input_dir + "visualizationControlDict")
+
+        # Path to read the data output from the previous steps
+        self.__read_dir = self.__split_control.get_write_path() + "_DataDir/"
+
+        self.__boundary_name = self.__split_control.get_internal_boundary()[1][0]
+        self.__mu = self.__visualization_control.get_viscosity()
+
+        # A static mesh is read once, its integration weights and probe
+        # cell are reused by every step
+        self.__static_mesh = os.path.exists(self.__read_dir + "Worksheet/mesh/")
+
+        self.__mesh_dir = None
+
+        # The in-memory pipeline sets the mesh itself (read_mesh = False)
+        if self.__static_mesh and read_mesh:
+            self.__mesh_dir = self.__read_dir + "Worksheet/mesh/"
+            self.set_mesh(self.read(self.__mesh_dir + "fluid"),
+                          self.read(self.__mesh_dir + self.__boundary_name),
+                          self.__mesh_dir + "probe_index.pkl",
+                          self.__mesh_dir + "fluid_connectivity.npz")
+
+    def set_mesh(self, fluid_mesh, boundary_mesh, index_path=None, connectivity=None, source_id=None):
+
+        # connectivity: the nodemap and node coordinates of the fluid cells
+        # or the file holding them. source_id: the cell id the Tecplot probe
+        # finds at the source point, when Tecplot is at hand
+        self.__fluid_mesh = fluid_mesh
+        self.__boundary_mesh = boundary_mesh
+        self.__connectivity = connectivity
+        self.__operators = None
+        self.__wall_gradient = None
+
+        self.__fluid_integrator = Integrator(fluid_mesh["Cell Volume"].values)
+        self.__boundary_integrator = Integrator(boundary_mesh["Cell Volume"].values)
+
+        if index_path is None:
+            probe_index = ProbeIndex.from_data(fluid_mesh, connectivity)
+        else:
+            probe_index = load_probe_index(index_path, fluid_mesh, connectivity)
+        self.__probe_index = probe_index
+
+        # The cell containing the source point. When none of its candidate
+        # cells does, the cell of the Tecplot probe, else (without Tecplot)
+        # the cell with the nearest centre
+        source_point = self.__theory_control.get_source_point()
+        self.__position_index = probe_index.locate(source_point)
+        if self.__position_index[0] < 0:
+            if source_id is not None:
+                self.__position_index = probe_index.get_row([source_id])
+            else:
+                print("The source point is in none of the candidate cells, the cell with the nearest centre is taken")
+                self.__position_index = probe_index.nearest(source_point)
+
+        # Probe points: interpolation weights and the cell coordinates at
+        # which their virtual flows are evaluated
+        if self.__theory_control.whether_probes():
+            self.__probe_interpolation = ProbeInterpolation(probe_index,
+                                                            self.__theory_control.get_probe_points(),
+                                                            self.__visualization_control.get_probe_neighbours())
+            self.__fluid_coordinates = fluid_mesh[["X C", "Y C", "Z C"]].values.T
+            self.__boundary_coordinates = boundary_mesh[["X C", "Y C", "Z C"]].values.T
+
+    def __get_operators(self, normal):
+
+        # Gradient operators of the cells and the one-sided normal gradient
+        # at the boundary faces, built when the vorticity is first derived
+        # on this mesh
+        if self.__operators is None:
+
+            operators_path = None
+            if self.__mesh_dir is not None:
+                operators_path = self.__mesh_dir + "fluid_operators.npz"
+
+            centres = self.__fluid_mesh[["X C", "Y C", "Z C"]].values
+            self.__operators = load_mesh_operators(operators_path, centres, self.__connectivity)
+
+            # The cell next to a face has the nearest centre
+            wall_centres = self.__boundary_mesh[["X C", "Y C", "Z C"]].values
+            self.__wall_gradient = WallGradient(self.__operators, centres, wall_centres, normal.data.T,
+                                                self.__probe_index.nearest(wall_centres))
+
+        return self.__operators, self.__wall_gradient
+
+    def vorticity(self, fluid_data, boundary_data, velocity, boundary_virtual):
+
+        if(self.__visualization_control.get_vorticity() == "auto" and "X vorticity" in fluid_data):
+
+            fluid_vorticity = VectorField(fluid_data[["X vorticity", "Y vorticity", "Z vorticity"]].values.T)
+            boundary_vorticity = VectorField(boundary_data[["X vorticity", "Y vorticity", "Z vorticity"]].values.T)
+
+        else:
+
+            # Curl of the velocity, at the wall from its derivative along the
+            # normal with the no-slip value (the velocity of the wall)
+            normal = VectorField(boundary_virtual[["normal_x", "normal_y", "normal_z"]].values.T)
+            wall_velocity = VectorField(boundary_virtual[["Vb_x", "Vb_y", "Vb_z"]].values.T)
+
+            operators, wall_gradient = self.__get_operators(normal)
+            fluid_vorticity = operators.curl(velocity)
+            boundary_vorticity = wall_gradient.curl(velocity, wall_velocity)
+
+        return fluid_vorticity, boundary_vorticity
+
+    def get_split_control(self):
+
+        return self.__split_control
+
+    def get_theory_control(self):
+
+        return self.__theory_control
+
+    def get_visualization_control(self):
+
+        return self.__visualization_control
+
+    def read(self, filename):
+
+        return read_data(filename, self.__split_control.get_write_format())
+
+    def get_time_list(self):
+
+        solution_time = np.loadtxt(self.__read_dir + "Worksheet/time.dat", ndmin = 2)
+
+        return solution_time[:,0], solution_time[:,1]
+
+    def evaluate(self, step, time):
+
+        get_timing().set_step(step)
+
+        step_name = "_" + str(int(step))
+
+        fluid_data = self.read(self.__read_dir + "Worksheet/fluid/fluid" + step_name)
+        boundary_data = self.read(self.__read_dir + "Worksheet/" + self.__boundary_name + "/" + self.__boundary_name + step_name)
+
+        # A moving mesh is stored with the solution of each step
+        if not self.__static_mesh:
+            self.set_mesh(fluid_data, boundary_data)
+
+        fluid_virtual = self.read(self.__read_dir + "Worksheet2/fluid/fluid" + step_name)
+        boundary_virtual = self.read(self.__read_dir + "Worksheet2/" + self.__boundary_name + "/" + self.__boundary_name + step_name)
+
+        return self.evaluate_data(time, fluid_data, boundary_data, fluid_virtual, boundary_virtual)
+
+    def evaluate_data(self, time, fluid_data, boundary_data, fluid_virtual, boundary_virtual):
+
+        # Flow and virtual flow tables of one step, either read from the
+        # worksheets or handed over in memory
+        with get_timing().span("compute", zone = "virtualpower") as span:
+            span.count(rows = len(fluid_data) + len(boundary_data))
+            return self.__evaluate_data(time, fluid_data, boundary_data, fluid_virtual, boundary_virtual)
+
+    def __evaluate_data(self, time, fluid_data, boundary_data, fluid_virtual, boundary_virtual):
+
+        # Pressure data
+        position_index = self.__position_index
+        pressure_CFD = fluid_data["pressure"].values[position_index][0]
+
+        U_CFD = fluid_data["U"].values[position_index][0]
+        V_CFD = fluid_data["V"].values[position_index][0]
+        W_CFD = fluid_data["W"].values[position_index][0]
+
+        dU_Square = 0.5 - (U_CFD * U_CFD + V_CFD * V_CFD + W_CFD * W_CFD) / 2
+
+        # Weighted lamb vector
+        virU = VectorField(fluid_virtual[["vir_U", "vir_V", "vir_W"]].values.T)
+
+        velocity = VectorField(fluid_data[["U", "V", "W"]].values.T)
+        fluid_vorticity, boundary_vorticity = self.vorticity(fluid_data, boundary_data, velocity, boundary_virtual)
+
+        vir_lamb = triple_product(fluid_vorticity, velocity, virU)
+        vir_lamb_integral = self.__fluid_integrator.integrate(vir_lamb)
+
+        # Weighted friction
+        normal = VectorField(boundary_virtual[["normal_x", "normal_y", "normal_z"]].values.T)
+        virU = VectorField(boundary_virtual[["virU_x", "virU_y", "virU_z"]].values.T)
+
+        vir_friction = triple_product(normal, boundary_vorticity, virU)
+        vir_friction *= self.__mu * (-1)
+        vir_friction_integral = self.__boundary_integrator.integrate(vir_friction)
+
+        Pressure_prediction = vir_lamb_integral + vir_friction_integral + dU_Square
+
+        row = [time, pressure_CFD, dU_Square, vir_lamb_integral, vir_friction_integral, Pressure_prediction]
+
+        probe_rows = None
+        if self.__theory_control.whether_probes():
+            probe_rows = self.evaluate_probes(time, fluid_data, velocity, fluid_vorticity,
+                                              boundary_vorticity, normal)
+
+        return row, probe_rows
+
+    def evaluate_probes(self, time, fluid_data, velocity, fluid_vorticity, boundary_vorticity, normal):
+
+        interpolation = self.__probe_interpolation
+        points = interpolation.get_points()
+        num_probes = interpolation.get_num_probes()
+
+        # Interpolated CFD values of all probes in one pass
+        values = interpolation.interpolate_all(fluid_data[["pressure", "U", "V", "W"]].values)
+        pressure_CFD = values[:, 0]
+        dU_Square = 0.5 - (values[:, 1] ** 2 + values[:, 2] ** 2 + values[:, 3] ** 2) / 2
+
+        # The lamb vector and the friction direction do not depend on the
+        # probe, only the virtual flow of its source point does
+        lamb = cross(fluid_vorticity, velocity)
+        friction = cross(normal, boundary_vorticity)
+
+        virtualflow = ProbeVirtualFlow(self.__theory_control.get_geometry(), time)
+
+        vir_lamb_integral = np.empty(num_probes)
+        vir_friction_integral = np.empty(num_probes)
+        work = np.empty(len(lamb))
+        boundary_work = np.empty(len(friction))
+
+        x, y, z = self.__fluid_coordinates
+        bx, by, bz = self.__boundary_coordinates
+
+        for i, point in enumerate(points):
+
+            virU = VectorField(virtualflow.get_virU(x, y, z, point))
+            vir_lamb_integral[i] = self.__fluid_integrator.integrate(dot(lamb, virU, out=work))
+
+            virU = VectorField(virtualflow.get_virU(bx, by, bz, point))
+            vir_friction_integral[i] = self.__boundary_integrator.integrate(dot(friction, virU, out=boundary_work))
+
+        vir_friction_integral *= self.__mu * (-1)
+
+        Pressure_prediction = vir_lamb_integral + vir_friction_integral + dU_Square
+
+        return np.column_stack([np.full(num_probes, time), np.arange(num_probes), points,
+                                pressure_CFD, dU_Square, vir_lamb_integral, vir_friction_integral,
+                                Pressure_prediction])
+
+
+# Each worker process reads the control files and the mesh once
+worker = None
+
+def init_worker(input_dir):
+
+    global worker
+    worker = VirtualPower(input_dir)
+
+def evaluate_worker(args):
+
+    return worker.evaluate(*args)
+
+
+def evaluate_steps(step_list, time_list, num_workers, input_dir="input/"):
+
+    # Rows are yielded in the order of the steps
+    args = list(zip(step_list, time_list))
+
+    if num_workers <= 1:
+        init_worker(input_dir)
+        for arg in args:
+            yield evaluate_worker(arg)
+        return
+
+    chunksize = max(1, len(args) // (4 * num_workers))
+
+    with ProcessPoolExecutor(max_workers = num_workers,
+                             initializer = init_worker,
+                             initargs = (input_dir,)) as executor:
+        for row in executor.map(evaluate_worker, args, chunksize = chunksize):
+            yield row
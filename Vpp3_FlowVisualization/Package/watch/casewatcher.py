@@ -0,0 +1,91 @@
+import numpy as np
+import os
+import time as clock
+
+
+def case_directory(case_path):
+
+    # The case is given either by its folder or by its system/controlDict
+    if os.path.isfile(case_path):
+        return os.path.dirname(os.path.dirname(os.path.abspath(case_path)))
+
+    return case_path
+
+
+class CaseWatcher:
+
+    def __init__(self, case_path, settle=10.0):
+
+        # Time directories of a running OpenFOAM case, a directory is complete
+        # once a later one exists or it has not changed for "settle" seconds
+        self.__case_dir = case_directory(case_path)
+        self.__settle = settle
+        self.__processed = np.empty(0)
+
+    def get_case_dir(self):
+
+        return self.__case_dir
+
+    def time_directories(self):
+
+        # Numeric folders of the case sorted by time: (time, name)
+        times = []
+        for entry in os.scandir(self.__case_dir):
+            if not entry.is_dir():
+                continue
+            try:
+                times.append((float(entry.name), entry.name))
+            except ValueError:
+                continue
+
+        return sorted(times)
+
+    def __modified(self, name):
+
+        # Latest modification of the directory and the files it holds
+        path = os.path.join(self.__case_dir, name)
+
+        latest = os.path.getmtime(path)
+        for entry in os.scandir(path):
+            latest = max(latest, entry.stat().st_mtime)
+
+        return latest
+
+    def completed_times(self):
+
+        times = self.time_directories()
+        now = clock.time()
+
+        completed = []
+        for i, (time, name) in enumerate(times):
+
+            # The initial condition is not a solution step
+            if time == 0:
+                continue
+
+            if i < len(times) - 1 or now - self.__modified(name) >= self.__settle:
+                completed.append(time)
+
+        return completed
+
+    def is_processed(self, time):
+
+        return bool(np.any(np.isclose(self.__processed, time, rtol = 1e-9, atol = 0)))
+
+    def mark_processed(self, times):
+
+        self.__processed = np.concatenate([self.__processed, np.asarray(times, dtype = float)])
+
+    def get_num_processed(self):
+
+        return len(self.__processed)
+
+    def pending(self, batch):
+
+        # Completed times which are not processed yet, the newest first: a
+        # watcher which falls behind reports the current state before
+        # catching up on the history
+        pending = [time for time in self.completed_times() if not self.is_processed(time)]
+        pending.sort(reverse = True)
+
+        return pending[:batch]
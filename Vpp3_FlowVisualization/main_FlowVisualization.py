@@ -1,20 +1,36 @@
-from Package.vector.vector import Vector
-import tecplot 
-from tecplot.exception import *
-from tecplot.constant import *
+# The startup profile times the imports below, it is installed first
+from Package.profiling.startupprofile import startup_profile
+startup = startup_profile()
 
+from Package.vector.vector import VectorField, triple_product
 from Package.solvercontrol.splitcontrol import SplitControl
 from Package.solvercontrol.theorycontrol import TheoryControl
-
+from Package.solvercontrol.visualizationcontrol import VisualizationControl
+from Package.integration.integration import Integrator, relative_difference
+from Package.probe.probeindex import ProbeIndex, load_probe_index
+from Package.result.resultsink import ResultSink
+from Package.result.derivedwriter import DerivedIndex, write_derived
+from Package.tecplotio.tecplotaccess import TecplotAccess
+from Package.tecplotio.session import TecplotSession
+from Package.profiling.timing import get_timing
+
+from contextlib import nullcontext
 import numpy as np
 import pandas as pd
 import os
 
-tecplot.session.connect(port=7600)
+# PyTecplot is imported and connected on the first Tecplot call
+tecplot = TecplotSession(port=7600)
 
 # Read control file
 split_control = SplitControl("input/splitControlDict")
 theory_control = TheoryControl("input/theoryControlDict")
+visualization_control = VisualizationControl("input/visualizationControlDict")
+
+startup.report()
+
+# Read, compute, write and Tecplot spans of each step (VPP_TIMING)
+timing = get_timing()
 
 # Create a folder named "result", which is used to store flow visualization data
 result_dir = split_control.get_write_path() + "_DataDir/Result/"
@@ -32,216 +48,316 @@ time_list = solution_time[:,1]
 # Split the Tecplot data of each time step
 num_zones = split_control.get_num_zones()
 
+# Zone and worksheet name of the body
+boundary_index = split_control.get_internal_boundary()[0][0]
+boundary_name = split_control.get_internal_boundary()[1][0]
+
 # Viscosity coefficient
-mu = 1.0/150
+mu = visualization_control.get_viscosity()
 print("The Reynolds number is ", 1/mu)
 
-Pressure_data =pd.DataFrame(columns=['time','Pressure','dU_Square','vir_lamb','vir_friction','Pressure_prediction'])
+# The pressure time series is appended to the result file step by step
+result_sink = ResultSink(result_dir + "pressure." + visualization_control.get_result_format(),
+                         ['time','Pressure','dU_Square','vir_lamb','vir_friction','Pressure_prediction'],
+                         format=visualization_control.get_result_format())
 
+write_dir = result_dir + "fluid_vir/"
+if not os.path.exists(write_dir):
+    os.makedirs(write_dir)
 
-for step, time in zip(step_list, time_list):
+derived_index = DerivedIndex(write_dir + "fluid_vir.dat")
+
+
+def read_data(filename):
+
+    with timing.span("read", zone = os.path.basename(filename)) as span:
+
+        if(split_control.get_write_format() == "h5"):
+
+            df = pd.read_hdf(filename + ".h5", key = "data")
+
+        elif(split_control.get_write_format() == "csv"):
+
+            df = pd.read_csv(filename + ".dat")
+
+        else:
+            quit("The format of the stored data is not supported")
+
+        span.count(df)
+
+    return df
+
+
+def load_data(path):
+
+    with timing.span("tecplot", zone = "load_tecplot"):
+
+        tecplot.new_layout()
+
+        dataset = tecplot.data.load_tecplot(
+            path,
+            frame=None,
+            read_data_option=tecplot.constant.ReadDataOption.Append,
+            reset_style=None,
+            initial_plot_first_zone_only=None,
+            initial_plot_type=None,
+            zones=None,
+            variables=None,
+            collapse=None,
+            skip=None,
+            assign_strand_ids=True,
+            add_zones_to_existing_strands=None,
+            include_text=None,
+            include_geom=None,
+            include_custom_labels=None,
+            include_data=None)
+
+    return dataset
+
+
+def probe_position(probe_index, fluid_plt):
+
+    # The cell containing the source point among the nearest cells of the
+    # index, else the cell of the Tecplot probe, mapped to its row by the
+    # cell id
+    point = theory_control.get_source_point()
+    position_index = probe_index.locate(point)
+
+    if position_index[0] < 0:
+
+        if access.get_dataset() is None:
+            access.set_dataset(load_data(fluid_plt))
+
+        cell = access.probe(0, point)
+        if cell is None:
+            quit("The source point is outside the fluid zone!!!")
+
+        position_index = probe_index.get_row([cell + 1])
+
+    return position_index
+
+
+def tecplot_integral(variable, index):
+
+    with timing.span("tecplot", zone = index):
+
+        tecplot.macro.execute_extended_command('CFDAnalyzer4', '''
+            Integrate [{index}]
+            VariableOption='Scalar'
+            XOrigin=0 YOrigin=0 ZOrigin=0
+            ScalarVar={scalar_var}
+            Absolute='F' 
+            ExcludeBlanked='F'
+            XVariable=1 YVariable=2 ZVariable=3
+            IntegrateOver='Cells'
+            IntegrateBy='Zones'
+            PlotResults='F'
+            PlotAs='Result'
+        '''.format(scalar_var=dataset.variable(variable).index + 1, index = index + 1))
+
+        frame = tecplot.active_frame()
+
+        return float(frame.aux_data['CFDA.INTEGRATION_TOTAL'])
+
+
+def integrate(integrator, values, variable, index):
+
+    # Integrate a cell-centred variable of the zone "index"
+    if(visualization_control.get_integration() == "tecplot"):
+        return tecplot_integral(variable, index)
+
+    integral = integrator.integrate(values)
+
+    # Compare the weighted sum against the CFDAnalyzer result
+    if(visualization_control.get_integration() == "check"):
+        reference = tecplot_integral(variable, index)
+        print(variable, ": native = ", integral, ", tecplot = ", reference,
+              ", relative difference = ", relative_difference(integral, reference))
+
+    return integral
+
+
+# A static mesh is written once by the split step: the grid is loaded a
+# single time and each step only reads its solution variables
+static_mesh = os.path.exists(read_dir + "Worksheet/mesh/")
+
+# Variables created in the Tecplot dataset. They are only pushed when
+# Tecplot integrates them or the full dataset is written
+derived_variables = ["vir_U", "vir_V", "vir_W", "vir_lamb", "vir_friction"]
+push_derived = visualization_control.get_integration() != "native" or visualization_control.whether_write_full_dataset()
+
+# Native integration of a static mesh runs on the worksheets alone, without
+# connecting to Tecplot
+use_tecplot = push_derived or not static_mesh
+
+access = TecplotAccess(tecplot)
+
+if static_mesh:
 
-    tecplot.new_layout()
+    if push_derived:
+        dataset = load_data(read_dir + "Worksheet/fluid_plt/mesh.plt")
+        access.set_dataset(dataset)
+
+    mesh_data = read_data(read_dir + "Worksheet/mesh/fluid")
+
+    # The probe cell is located once with the persisted spatial index
+    probe_index = load_probe_index(read_dir + "Worksheet/mesh/probe_index.pkl", mesh_data,
+                                   read_dir + "Worksheet/mesh/fluid_connectivity.npz")
+    position_index = probe_position(probe_index, read_dir + "Worksheet/fluid_plt/mesh.plt")
+
+    fluid_integrator = Integrator(mesh_data["Cell Volume"].values)
+    boundary_integrator = Integrator(read_data(read_dir + "Worksheet/mesh/" + boundary_name)["Cell Volume"].values)
+
+
+if static_mesh and push_derived:
+    access.create_variables(derived_variables)
+
+
+for step, time in zip(step_list, time_list):
 
     print("time = ", time)
 
-    path = read_dir + "Worksheet/fluid_plt/fluid_" + str(int(step)) + ".plt"
-
-    dataset = tecplot.data.load_tecplot(
-        path,
-        frame=None,
-        read_data_option=ReadDataOption.Append,
-        reset_style=None,
-        initial_plot_first_zone_only=None,
-        initial_plot_type=None,
-        zones=None,
-        variables=None,
-        collapse=None,
-        skip=None,
-        assign_strand_ids=True,
-        add_zones_to_existing_strands=None,
-        include_text=None,
-        include_geom=None,
-        include_custom_labels=None,
-        include_data=None)
-
-
-    # Pressure data
-    point =  theory_control.get_source_point()
-    result = tecplot.data.query.probe_at_position(point[0], point[1], point[2])
-    if result is None:
-        print('probe failed.')
+    timing.set_step(step)
+
+    if static_mesh:
+
+        fluid_data = read_data(read_dir + "Worksheet/fluid/fluid_" + str(int(step)))
+        boundary_data = read_data(read_dir + "Worksheet/" + boundary_name + "/" + boundary_name + "_" + str(int(step)))
+
     else:
-        data, cell, zone = result
-
-    Element_ID = dataset.zone(0).values('Element UserID')[:]
-    position_index = np.where(Element_ID == cell[1] + 1)
-
-    pressure_CFD = dataset.zone(0).values('pressure')[position_index[0]]
-    print('Pressure_CFD = ', pressure_CFD)
-
-    U_CFD = dataset.zone(0).values('U')[position_index[0]]
-    V_CFD = dataset.zone(0).values('V')[position_index[0]]
-    W_CFD = dataset.zone(0).values('W')[position_index[0]]
-
-    dU_Square = 0.5 - (U_CFD * U_CFD + V_CFD * V_CFD + W_CFD * W_CFD) / 2
-    # dU_Square = 0.0266141 + 0.516767 - (U_CFD * U_CFD + V_CFD * V_CFD + W_CFD * W_CFD) / 2
-
-    print(U_CFD, V_CFD, W_CFD)
-    print((U_CFD * U_CFD + V_CFD * V_CFD + W_CFD * W_CFD) / 2)
-    print("index = ", position_index[0])
-
-    # Draw virtual flow field
-    tecplot.data.operate.execute_equation(
-        "{vir_U} = 0 \n {vir_V} = 0 \n {vir_W} = 0", 
-        zones=None, 
-        i_range=None, 
-        j_range=None,
-        k_range=None, 
-        value_location=ValueLocation.CellCentered, 
-        variable_data_type=None,
-        ignore_divide_by_zero=None)
-
-    if(split_control.get_write_format() == "h5"):
-
-        filename =  read_dir + "Worksheet2/fluid/fluid_" + str(int(step)) + ".h5"
-        df = pd.read_hdf(filename, key = "data")
-
-    elif(split_control.get_write_format() == "csv"):
-
-        filename =  read_dir + "Worksheet2/fluid/fluid_" + str(int(step)) + ".dat"
-        df = pd.read_csv(filename)
-
- 
-    vir_U, vir_V, vir_W = df["vir_U"].values, df["vir_V"].values, df["vir_W"].values
-    virU = Vector(vir_U, vir_V, vir_W)
-
-    dataset.zone(0).values("vir_U")[:] = np.copy(vir_U)
-    dataset.zone(0).values("vir_V")[:] = np.copy(vir_V)
-    dataset.zone(0).values("vir_W")[:] = np.copy(vir_W)
-
-    # Calculate weighted lamb vector
-    tecplot.data.operate.execute_equation(
-        "{vir_lamb} = 0", 
-        zones=None, 
-        i_range=None, 
-        j_range=None,
-        k_range=None, 
-        value_location=ValueLocation.CellCentered, 
-        variable_data_type=None,
-        ignore_divide_by_zero=None)
-
-    velocity_x = dataset.zone(0).values("U").as_numpy_array()
-    velocity_y = dataset.zone(0).values("V").as_numpy_array()
-    velocity_z = dataset.zone(0).values("W").as_numpy_array()
-    velocity = Vector(velocity_x, velocity_y, velocity_z)
-
-    vorticity_x = dataset.zone(0).values("X vorticity").as_numpy_array()
-    vorticity_y = dataset.zone(0).values("Y vorticity").as_numpy_array()
-    vorticity_z = dataset.zone(0).values("Z vorticity").as_numpy_array()
-    vorticity = Vector(vorticity_x, vorticity_y, vorticity_z)
-
-    lamb = vorticity.times(velocity)
-    vir_lamb = lamb.dot(virU)
-
-    dataset.zone(0).values("vir_lamb")[:] = np.copy(vir_lamb)
-
-    tecplot.macro.execute_extended_command('CFDAnalyzer4', '''
-        Integrate [{index}]
-        VariableOption='Scalar'
-        XOrigin=0 YOrigin=0 ZOrigin=0
-        ScalarVar={scalar_var}
-        Absolute='F' 
-        ExcludeBlanked='F'
-        XVariable=1 YVariable=2 ZVariable=3
-        IntegrateOver='Cells'
-        IntegrateBy='Zones'
-        PlotResults='F'
-        PlotAs='Result'
-    '''.format(scalar_var=dataset.variable("vir_lamb").index + 1, index = 0 + 1))
-
-    frame = tecplot.active_frame()
-    vir_lamb_integral = float(frame.aux_data['CFDA.INTEGRATION_TOTAL'])
-    print("vir_lamb_integral = ", vir_lamb_integral)
-
-    # Calculate weighted friction
-    tecplot.data.operate.execute_equation(
-        "{vir_friction} = 0", 
-        zones=None, 
-        i_range=None, 
-        j_range=None,
-        k_range=None, 
-        value_location=ValueLocation.CellCentered, 
-        variable_data_type=None,
-        ignore_divide_by_zero=None)
-
-    if(split_control.get_write_format() == "h5"):
-        
-        filename =  read_dir + "Worksheet2/cylinder/cylinder_" + str(int(step)) + ".h5"
-        df = pd.read_hdf(filename, key = "data")
-
-    elif(split_control.get_write_format() == "csv"):
-        
-        filename =  read_dir + "Worksheet2/cylinder/cylinder_" + str(int(step)) + ".dat"
-        df = pd.read_csv(filename)
-
-    normal_x, normal_y, normal_z = df["normal_x"].values, df["normal_y"].values, df["normal_z"].values
-    normal = Vector(normal_x, normal_y, normal_z)
-
-    vorticity_x = dataset.zone(5).values("X vorticity").as_numpy_array()
-    vorticity_y = dataset.zone(5).values("Y vorticity").as_numpy_array()
-    vorticity_z = dataset.zone(5).values("Z vorticity").as_numpy_array()
-    vorticity = Vector(vorticity_x, vorticity_y, vorticity_z)
-
-    vir_U, vir_V, vir_W = df["virU_x"].values, df["virU_y"].values, df["virU_z"].values
-    virU = Vector(vir_U, vir_V, vir_W)
-
-    friction = normal.times(vorticity)
-    vir_friction = friction.dot(virU) * mu * (-1)
-
-    ### 修正奇点
-
-    ###
-
-    dataset.zone(5).values("vir_friction")[:] = np.copy(vir_friction)
-
-    tecplot.macro.execute_extended_command('CFDAnalyzer4', '''
-        Integrate [{index}]
-        VariableOption='Scalar'
-        XOrigin=0 YOrigin=0 ZOrigin=0
-        ScalarVar={scalar_var}
-        Absolute='F' 
-        ExcludeBlanked='F'
-        XVariable=1 YVariable=2 ZVariable=3
-        IntegrateOver='Cells'
-        IntegrateBy='Zones'
-        PlotResults='F'
-        PlotAs='Result'
-    '''.format(scalar_var=dataset.variable("vir_friction").index + 1, index = 5 + 1))
-
-    frame = tecplot.active_frame()
-    vir_friction_integral = float(frame.aux_data['CFDA.INTEGRATION_TOTAL'])
-    print("vir_friction_integral =", vir_friction_integral)
-    print("dU_Square = ", dU_Square)
-
-    Pressure_prediction = vir_lamb_integral + vir_friction_integral + dU_Square
-    print("Pressure_prediction = ", Pressure_prediction)
-
-
-    new_line = pd.DataFrame([[time, pressure_CFD, dU_Square, vir_lamb_integral, vir_friction_integral, Pressure_prediction]], 
-                            columns=['time','Pressure','dU_Square','vir_lamb','vir_friction','Pressure_prediction'])
-
-    pressure_data = Pressure_data.append(new_line, ignore_index=True)
+
+        path = read_dir + "Worksheet/fluid_plt/fluid_" + str(int(step)) + ".plt"
+        dataset = load_data(path)
+
+        access.set_dataset(dataset)
+        access.create_variables(derived_variables)
+
+        mesh_data = read_data(read_dir + "Worksheet/fluid/fluid_" + str(int(step)))
+
+        # No connectivity is written for a moving mesh: the cell of the
+        # Tecplot probe is mapped to its row by the index
+        probe_index = ProbeIndex.from_data(mesh_data)
+        position_index = probe_position(probe_index, path)
+
+        # Cell volumes and face areas of the current mesh
+        fluid_integrator = Integrator(mesh_data["Cell Volume"].values)
+        boundary_integrator = Integrator(read_data(read_dir + "Worksheet/" + boundary_name + "/" + boundary_name + "_" + str(int(step)))["Cell Volume"].values)
+
+        # The flow variables of the step are fetched from Tecplot once
+        fluid_data = access.fetch(0, ["pressure", "U", "V", "W", "X vorticity", "Y vorticity", "Z vorticity"])
+        boundary_data = access.fetch(boundary_index, ["X vorticity", "Y vorticity", "Z vorticity"])
+
+    with (access.step() if use_tecplot else nullcontext()), timing.span("compute", zone = "virtualpower"):
+
+        # Pressure data
+        pressure_CFD = np.asarray(fluid_data['pressure'])[position_index]
+
+        U_CFD = np.asarray(fluid_data['U'])[position_index]
+        V_CFD = np.asarray(fluid_data['V'])[position_index]
+        W_CFD = np.asarray(fluid_data['W'])[position_index]
+
+        print('Pressure_CFD = ', pressure_CFD)
+
+        dU_Square = 0.5 - (U_CFD * U_CFD + V_CFD * V_CFD + W_CFD * W_CFD) / 2
+        # dU_Square = 0.0266141 + 0.516767 - (U_CFD * U_CFD + V_CFD * V_CFD + W_CFD * W_CFD) / 2
+
+        print(U_CFD, V_CFD, W_CFD)
+        print((U_CFD * U_CFD + V_CFD * V_CFD + W_CFD * W_CFD) / 2)
+        print("index = ", position_index)
+
+        # Virtual flow field
+        df = read_data(read_dir + "Worksheet2/fluid/fluid_" + str(int(step)))
+
+        vir_U, vir_V, vir_W = df["vir_U"].values, df["vir_V"].values, df["vir_W"].values
+        virU = VectorField.from_components(vir_U, vir_V, vir_W)
+        fluid_virU = virU
+
+        # Calculate weighted lamb vector
+        velocity = VectorField.from_components(np.asarray(fluid_data["U"]),
+                                               np.asarray(fluid_data["V"]),
+                                               np.asarray(fluid_data["W"]))
+        vorticity = VectorField.from_components(np.asarray(fluid_data["X vorticity"]),
+                                                np.asarray(fluid_data["Y vorticity"]),
+                                                np.asarray(fluid_data["Z vorticity"]))
+
+        # (vorticity x velocity) . virU in one fused pass
+        vir_lamb = triple_product(vorticity, velocity, virU)
+
+        if push_derived:
+            access.push(0, {"vir_U": vir_U, "vir_V": vir_V, "vir_W": vir_W, "vir_lamb": vir_lamb})
+
+        vir_lamb_integral = integrate(fluid_integrator, vir_lamb, "vir_lamb", 0)
+        print("vir_lamb_integral = ", vir_lamb_integral)
+
+        # Calculate weighted friction
+        df = read_data(read_dir + "Worksheet2/" + boundary_name + "/" + boundary_name + "_" + str(int(step)))
+
+        normal_x, normal_y, normal_z = df["normal_x"].values, df["normal_y"].values, df["normal_z"].values
+        normal = VectorField.from_components(normal_x, normal_y, normal_z)
+
+        vorticity = VectorField.from_components(np.asarray(boundary_data["X vorticity"]),
+                                                np.asarray(boundary_data["Y vorticity"]),
+                                                np.asarray(boundary_data["Z vorticity"]))
+
+        vir_U, vir_V, vir_W = df["virU_x"].values, df["virU_y"].values, df["virU_z"].values
+        virU = VectorField.from_components(vir_U, vir_V, vir_W)
+
+        # (normal x vorticity) . virU in one fused pass
+        vir_friction = triple_product(normal, vorticity, virU)
+        vir_friction *= mu * (-1)
+
+        ### 修正奇点
+
+        ###
+
+        if push_derived:
+            access.push(boundary_index, {"vir_friction": vir_friction})
+
+        vir_friction_integral = integrate(boundary_integrator, vir_friction, "vir_friction", boundary_index)
+        print("vir_friction_integral =", vir_friction_integral)
+        print("dU_Square = ", dU_Square)
+
+        Pressure_prediction = vir_lamb_integral + vir_friction_integral + dU_Square
+        print("Pressure_prediction = ", Pressure_prediction)
+
+        # The full dataset is only written on request
+        if(visualization_control.whether_write_full_dataset()):
+
+            write_name = write_dir + "fluid_vir_" + str(int(step)) + ".plt"
+            with timing.span("tecplot", zone = "save_tecplot_plt"):
+                tecplot.data.save_tecplot_plt(
+                    write_name, 
+                    dataset=dataset) 
+
+
+    # The probe values are arrays of the located cell
+    result_sink.append([time, np.ravel(pressure_CFD)[0], np.ravel(dU_Square)[0],
+                        vir_lamb_integral, vir_friction_integral, np.ravel(Pressure_prediction)[0]])
     
-    write_dir = result_dir + "fluid_vir/"
-    if not os.path.exists(write_dir):
-        os.makedirs(write_dir)
+    # Derived variables of the step, they reference the step data instead
+    # of repeating it
+    if(visualization_control.whether_write_derived()):
+
+        write_derived(write_dir + "fluid_vir_" + str(int(step)),
+                      pd.DataFrame({"vir_U": fluid_virU.x(), "vir_V": fluid_virU.y(), "vir_W": fluid_virU.z(), "vir_lamb": vir_lamb}),
+                      split_control.get_write_format())
+        write_derived(write_dir + boundary_name + "_vir_" + str(int(step)),
+                      pd.DataFrame({"vir_friction": vir_friction}),
+                      split_control.get_write_format())
+
+        if static_mesh:
+            sources = [read_dir + "Worksheet/fluid_plt/mesh.plt",
+                       read_dir + "Worksheet/fluid/fluid_" + str(int(step))]
+        else:
+            sources = [path]
+
+        derived_index.append(step, time, sources)
+
+result_sink.close()
 
-    write_name = write_dir + "fluid_vir_" + str(int(step)) + ".plt"
-    tecplot.data.save_tecplot_plt(
-        write_name, 
-        dataset=dataset) 
+print("Tecplot calls: ", access.get_calls())
 
-    break
+if(visualization_control.whether_write_excel()):
+    result_sink.to_excel(result_dir + "pressure.xlsx")
 
-pressure_data.to_excel(result_dir + "pressure.xlsx",index=False) 
\ No newline at end of file
+timing.close()
@@ -0,0 +1,74 @@
+# The startup profile times the imports below, it is installed first
+from Package.profiling.startupprofile import startup_profile
+startup = startup_profile()
+
+from Package.solvercontrol.splitcontrol import SplitControl
+from Package.solvercontrol.theorycontrol import TheoryControl
+from Package.solvercontrol.visualizationcontrol import VisualizationControl
+from Package.virtualpower.virtualpower import columns, probe_columns, evaluate_steps
+from Package.result.resultsink import ResultSink
+from Package.profiling.timing import get_timing
+
+import numpy as np
+import os
+
+
+# The main function
+if __name__ == "__main__":
+
+    # Read control file
+    split_control = SplitControl("input/splitControlDict")
+    theory_control = TheoryControl("input/theoryControlDict")
+    visualization_control = VisualizationControl("input/visualizationControlDict")
+
+    startup.report()
+
+    # The worker processes record their spans in the run of this script
+    timing = get_timing()
+
+    # Create a folder named "result", which is used to store flow visualization data
+    result_dir = split_control.get_write_path() + "_DataDir/Result/"
+    if not os.path.exists(result_dir):
+        os.makedirs(result_dir)
+
+    # Read the list of the time
+    read_dir = split_control.get_write_path() + "_DataDir/"
+    solution_time = np.loadtxt(read_dir + "Worksheet/" + "time.dat", ndmin = 2)
+    step_list = solution_time[:,0]
+    time_list = solution_time[:,1]
+
+    print("The Reynolds number is ", 1/visualization_control.get_viscosity())
+
+    # The virtual power integrals are evaluated without Tecplot, the time
+    # steps are distributed over a process pool and written in order
+    result_sink = ResultSink(result_dir + "pressure." + visualization_control.get_result_format(),
+                             columns,
+                             format=visualization_control.get_result_format())
+
+    # Predicted against CFD pressure of every probe point
+    if theory_control.whether_probes():
+        probe_sink = ResultSink(result_dir + "probes." + visualization_control.get_result_format(),
+                                probe_columns,
+                                format=visualization_control.get_result_format(),
+                                flush_every=len(theory_control.get_probe_points()))
+
+    for row, probe_rows in evaluate_steps(step_list, time_list, visualization_control.get_num_workers()):
+
+        print("time = ", row[0], ", Pressure_prediction = ", row[5])
+        result_sink.append(row)
+
+        if probe_rows is not None:
+            for probe_row in probe_rows:
+                probe_sink.append(probe_row)
+
+    result_sink.close()
+
+    if theory_control.whether_probes():
+        probe_sink.close()
+
+    if(visualization_control.whether_write_excel()):
+        result_sink.to_excel(result_dir + "pressure.xlsx")
+
+    timing.close()
+
+    print("Virtual power evaluated successfully")
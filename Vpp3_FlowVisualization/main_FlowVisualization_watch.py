@@ -0,0 +1,140 @@
+# The startup profile times the imports below, it is installed first
+from Package.profiling.startupprofile import startup_profile
+startup = startup_profile()
+
+from Package.solvercontrol.splitcontrol import SplitControl
+from Package.solvercontrol.theorycontrol import TheoryControl
+from Package.solvercontrol.visualizationcontrol import VisualizationControl
+from Package.virtualpower.virtualpower import VirtualPower, columns, probe_columns
+from Package.result.resultsink import ResultSink
+from Package.watch.casewatcher import CaseWatcher
+from Package.profiling.timing import get_timing
+
+import numpy as np
+import pandas as pd
+import argparse
+import subprocess
+import sys
+import os
+import time as clock
+
+
+# Folders of the split and virtual flow stages, next to the folder of this
+# script wherever it is started from
+repository = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+split_stage = os.path.join(repository, "Vpp1_SplitFluidData")
+calc_stage = os.path.join(repository, "Vpp2_CalcVirtualFlow")
+
+
+def run_stage(directory, script, times):
+
+    # The stage runs in its own folder on the given solution times only
+    subprocess.run([sys.executable, script, "--times", ",".join(repr(float(time)) for time in times)],
+                   cwd = directory, check = True)
+
+
+def select_steps(times):
+
+    # Steps of the split time list which belong to the given times
+    solution_time = np.loadtxt(read_dir + "Worksheet/time.dat", ndmin = 2)
+    selected = np.isclose(solution_time[:, 1][:, None], np.asarray(times)[None, :], rtol = 1e-9, atol = 0).any(axis = 1)
+
+    return solution_time[selected]
+
+
+# The main function
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Predict the force while the OpenFOAM case is running")
+    parser.add_argument("--once", action = "store_true",
+                        help = "process the completed time steps and stop instead of polling")
+    parser.add_argument("--startup-profile", action = "store_true",
+                        help = "print the import time of the packages once the control files are read")
+    args = parser.parse_args()
+
+    # Read control file
+    split_control = SplitControl("input/splitControlDict")
+    theory_control = TheoryControl("input/theoryControlDict")
+    visualization_control = VisualizationControl("input/visualizationControlDict")
+
+    startup.report()
+
+    # The stages started below record their spans in the same run
+    timing = get_timing()
+
+    result_dir = split_control.get_write_path() + "_DataDir/Result/"
+    if not os.path.exists(result_dir):
+        os.makedirs(result_dir)
+
+    read_dir = split_control.get_write_path() + "_DataDir/"
+
+    watcher = CaseWatcher(split_control.get_case_path(), visualization_control.get_watch_settle())
+
+    # The force history grows with every processed step, a restarted watcher
+    # continues it. Rows are appended in the order they are processed.
+    result_path = result_dir + "pressure_watch.dat"
+    if os.path.exists(result_path):
+        watcher.mark_processed(pd.read_csv(result_path)["time"].values)
+
+    result_sink = ResultSink(result_path, columns, append = True)
+
+    if theory_control.whether_probes():
+        probe_sink = ResultSink(result_dir + "probes_watch.dat", probe_columns,
+                                capacity = len(theory_control.get_probe_points()),
+                                flush_every = len(theory_control.get_probe_points()),
+                                append = True)
+
+    print("watch ", watcher.get_case_dir(), ", ", watcher.get_num_processed(), " steps already processed")
+
+    # Created once the first steps are split, it keeps the mesh between polls
+    virtual_power = None
+
+    try:
+
+        while True:
+
+            times = watcher.pending(visualization_control.get_watch_batch())
+
+            if not times:
+
+                if args.once:
+                    break
+
+                clock.sleep(visualization_control.get_watch_interval())
+                continue
+
+            start = clock.perf_counter()
+
+            run_stage(split_stage, "main_SplitFluidData.py", times)
+            run_stage(calc_stage, "main_CalcVirtualFlow_theory.py", times)
+
+            if virtual_power is None:
+                virtual_power = VirtualPower()
+
+            for step, time in select_steps(times):
+
+                row, probe_rows = virtual_power.evaluate(step, time)
+                result_sink.append(row)
+
+                if probe_rows is not None:
+                    for probe_row in probe_rows:
+                        probe_sink.append(probe_row)
+
+                print("time = ", time, ", Pressure_prediction = ", row[5])
+
+            watcher.mark_processed(times)
+
+            print(len(times), " steps processed in ", clock.perf_counter() - start, " s")
+
+    except KeyboardInterrupt:
+
+        print("Watch stopped")
+
+    finally:
+
+        result_sink.close()
+
+        if theory_control.whether_probes():
+            probe_sink.close()
+
+        timing.close()
@@ -0,0 +1,117 @@
+# The startup profile times the imports below, it is installed first
+from Package.profiling.startupprofile import startup_profile
+startup = startup_profile()
+
+from Package.pipeline.pipeline import Pipeline
+from Package.pipeline.scheduler import Stage, StepScheduler
+from Package.virtualpower.virtualpower import columns, probe_columns
+from Package.result.resultsink import ResultSink
+from Package.tecplotio.session import TecplotSession
+from Package.profiling.timing import get_timing
+
+import argparse
+import shutil
+import os
+
+
+# The main function
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = "Split, virtual flow and virtual power in one process")
+    parser.add_argument("--checkpoint", action = "store_true", default = None,
+                        help = "write the worksheets of every step (also 'checkpoint' in visualizationControlDict)")
+    parser.add_argument("--startup-profile", action = "store_true",
+                        help = "print the import time of the packages once the control files are read")
+    args = parser.parse_args()
+
+    # PyTecplot is imported and connected when the case is loaded
+    tecplot = TecplotSession(port=7600)
+
+    # The control files of the three stages are read once, from this folder
+    pipeline = Pipeline("input/", args.checkpoint)
+
+    startup.report()
+
+    # Spans of the stages of each step (VPP_TIMING)
+    timing = get_timing()
+
+    virtual_power = pipeline.get_virtual_power()
+    split_control = virtual_power.get_split_control()
+    theory_control = virtual_power.get_theory_control()
+    visualization_control = virtual_power.get_visualization_control()
+
+    result_dir = split_control.get_write_path() + "_DataDir/Result/"
+    if not os.path.exists(result_dir):
+        os.makedirs(result_dir)
+
+    # The checkpoint holds the grid with every step, a static mesh written by
+    # an earlier split would be read instead
+    mesh_dir = split_control.get_write_path() + "_DataDir/Worksheet/mesh/"
+    if pipeline.whether_checkpoint() and os.path.exists(mesh_dir):
+        shutil.rmtree(mesh_dir)
+
+    print("The Reynolds number is ", 1/visualization_control.get_viscosity())
+
+    steps = pipeline.load_case(tecplot)
+
+    result_sink = ResultSink(result_dir + "pressure." + visualization_control.get_result_format(),
+                             columns,
+                             format=visualization_control.get_result_format())
+
+    if theory_control.whether_probes():
+        probe_sink = ResultSink(result_dir + "probes." + visualization_control.get_result_format(),
+                                probe_columns,
+                                format=visualization_control.get_result_format(),
+                                flush_every=len(theory_control.get_probe_points()))
+
+    def extract(item, payload):
+
+        # The Tecplot session is only used by the scheduling thread
+        timing.set_step(item[0])
+        with pipeline.get_access().step():
+            return pipeline.split(item[0])
+
+    def virtual_flow(item, payload):
+
+        timing.set_step(item[0])
+        return payload + pipeline.virtual_flow(item[1], *payload)
+
+    def integrate(item, payload):
+
+        timing.set_step(item[0])
+        return pipeline.integrate(item[0], item[1], *payload)
+
+    # Step k is integrated while step k+1 gets its virtual flow and step
+    # k+2 is extracted
+    scheduler = StepScheduler([Stage("extract", extract, inline = True),
+                               Stage("virtualflow", virtual_flow, visualization_control.get_stage_limit("virtualflow")),
+                               Stage("integrate", integrate, visualization_control.get_stage_limit("integrate"))],
+                              memory_limit = visualization_control.get_memory_limit(),
+                              log_path = result_dir + "schedule.jsonl")
+
+    for (step, time), (row, probe_rows) in scheduler.run(steps):
+
+        print("time = ", time, ", Pressure_prediction = ", row[5])
+        result_sink.append(row)
+
+        if probe_rows is not None:
+            for probe_row in probe_rows:
+                probe_sink.append(probe_row)
+
+    print(scheduler.summary())
+    print("Peak memory of the steps in flight: ", scheduler.get_peak_bytes() / 1024 / 1024, " MB")
+
+    if pipeline.whether_checkpoint():
+        pipeline.write_time_list(steps)
+
+    result_sink.close()
+
+    if theory_control.whether_probes():
+        probe_sink.close()
+
+    if(visualization_control.whether_write_excel()):
+        result_sink.to_excel(result_dir + "pressure.xlsx")
+
+    timing.close()
+
+    print("Pipeline finished successfully")